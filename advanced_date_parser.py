@@ -2,15 +2,69 @@
 # -*- coding: utf-8 -*-
 
 import re
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
-import calendar
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from itertools import islice
+from time import perf_counter
+from operator import attrgetter
+from typing import Optional, Dict, Any, NamedTuple, Tuple, Iterable, Iterator, List, Union
+from calendar_anchors import CalendarAnchors
+from keyword_automaton import KeywordAutomaton
+from date_cache import LRUCache
+from metrics import metrics
+
+# 時刻指定がない場合の既定の時刻
+DEFAULT_HOUR = 12
+
+# 時刻の確からしさ（数値で明示された時刻 / 「朝」「夜」などからの推定）
+TIME_CONFIDENCE_EXPLICIT = 1.0
+TIME_CONFIDENCE_APPROXIMATE = 0.5
+
+
+class DateAnalysis(NamedTuple):
+    """テキスト1件の日付解析の結果"""
+    due: Optional[str]                        # 解析した期日（なければNone）
+    date_spans: Tuple[Tuple[int, int], ...]    # 日付表記（「6月17日」「2025-6-17」）の位置
+    keywords: Tuple[Tuple[int, str], ...] = ()  # 日付キーワードの (位置, キーワード)（小文字化後）
+
+
+class TimeOfDay(NamedTuple):
+    """テキストから抽出した時刻（時）"""
+    hour: int
+    span: Tuple[int, int]  # 正規化（小文字化）後のテキスト上の位置
+    confidence: float
+
+# 解析の段階（名前, メソッド名）。上から順に試し、最初に結果を返した段階を採用する
+PARSE_STAGES = (
+    ('complex', '_parse_complex_expressions'),   # 複合表現
+    ('numeric', '_parse_numeric_relative'),      # 数値相対表現
+    ('period', '_parse_periods'),                # 期間表現
+    ('basic', '_parse_basic_relative'),          # 基本相対表現
+    ('weekday', '_parse_weekdays_advanced'),     # 曜日表現
+    ('absolute', '_parse_absolute_dates'),       # 絶対日付
+)
+
+# キャッシュ未登録を表す番兵
+_MISSING = object()
+
+
+def _required_literal(pattern: str) -> str:
+    """パターンに一致する文字列が必ず含む最長の固定部分を返す"""
+    fragments = re.sub(r'\([^)]*\)|.\?', '\0', pattern).split('\0')
+    return max(fragments, key=len)
+
 
 class AdvancedDateParser:
     """高度な日本語日付解析エンジン"""
     
-    def __init__(self):
+    def __init__(self, cache_size: int = 1024, cache_ttl: Optional[float] = None):
         self.setup_patterns()
+        # 解析の段階（名前, 解析メソッド）
+        self._stages = tuple((stage, getattr(self, method)) for stage, method in PARSE_STAGES)
+        # 同じ言い回しの再解析を避けるキャッシュ（cache_size=0で無効）
+        self.cache = LRUCache(cache_size, cache_ttl) if cache_size > 0 else None
+        # 直近の基準日の暦テーブル（同じ日の解析で使い回す）
+        self._anchors: Optional[CalendarAnchors] = None
     
     def setup_patterns(self):
         """パターンの初期化"""
@@ -41,16 +95,30 @@ class AdvancedDateParser:
             r'(\d+)年後': lambda y: timedelta(days=int(y) * 365),  # 概算
         }
         
-        # 期間パターン
+        # 期間パターン（基準日の暦テーブルから引く）
         self.period_patterns = {
-            r'今週末': self._get_this_weekend,
-            r'来週末': self._get_next_weekend,
-            r'月末': self._get_month_end,
-            r'来月末': self._get_next_month_end,
-            r'年末': self._get_year_end,
-            r'来年': self._get_next_year,
-            r'今月(\d{1,2})日': self._get_this_month_day,
-            r'来月(\d{1,2})日': self._get_next_month_day,
+            r'今週末': attrgetter('this_weekend'),
+            r'来週末': attrgetter('next_weekend'),
+            r'月末': attrgetter('month_end'),
+            r'来月末': attrgetter('next_month_end'),
+            r'年末': attrgetter('year_end'),
+            r'来年': attrgetter('next_year'),
+            r'今月(\d{1,2})日': CalendarAnchors.this_month_day,
+            r'来月(\d{1,2})日': CalendarAnchors.next_month_day,
+        }
+        
+        # 基本相対パターン
+        self.basic_relative_patterns = {
+            '今日': timedelta(days=0),
+            'きょう': timedelta(days=0),
+            '明日': timedelta(days=1),
+            'あした': timedelta(days=1),
+            'あす': timedelta(days=1),
+            '明後日': timedelta(days=2),
+            'あさって': timedelta(days=2),
+            '来週': timedelta(weeks=1),
+            '再来週': timedelta(weeks=2),
+            '来月': timedelta(days=30),  # 概算
         }
         
         # 曜日パターン（改良版）
@@ -58,60 +126,235 @@ class AdvancedDateParser:
             '月曜': 0, '火曜': 1, '水曜': 2, '木曜': 3,
             '金曜': 4, '土曜': 5, '日曜': 6
         }
+        
+        # 複合表現パターン（来週の月曜の午前中 など）
+        self.complex_patterns = [
+            r'来週の(\w+)の(\w+)',
+            r'今度の(\w+)の(\w+)',
+            r'次の(\w+)の(\w+)',
+        ]
+        
+        # 絶対日付パターン
+        self.absolute_date_patterns = [
+            r'(\d{1,2})月(\d{1,2})日',
+            r'(\d{4})年(\d{1,2})月(\d{1,2})日',
+            r'(\d{1,2})/(\d{1,2})',
+            r'(\d{4})-(\d{1,2})-(\d{1,2})',
+        ]
+        
+        # 「明後日」「明々後日」などの誤認防止（明[々後日]+ と等価）
+        self.weekday_guard_keywords = ('明々', '明後', '明日')
+        
+        self._compile_patterns()
+    
+    def _compile_patterns(self):
+        """正規表現のプリコンパイルとキーワード走査器の構築"""
+        # 各パターンは「必ず含む固定部分（アンカー）」と組にする。
+        # アンカーが走査で見つからなければ正規表現は実行しない。
+        # 固定文字列のパターンはアンカーそのものなので、走査結果だけで判定できる。
+        def compile_entries(patterns):
+            return [
+                (pattern, _required_literal(pattern), re.compile(pattern), calc_func)
+                for pattern, calc_func in patterns
+            ]
+        
+        self._compiled_time_patterns = compile_entries(self.time_patterns)
+        self._compiled_numeric_patterns = compile_entries(self.numeric_relative_patterns.items())
+        self._compiled_period_patterns = compile_entries(self.period_patterns.items())
+        self._compiled_complex_patterns = compile_entries(
+            (pattern, None) for pattern in self.complex_patterns
+        )
+        self._compiled_absolute_patterns = compile_entries(
+            (pattern, None) for pattern in self.absolute_date_patterns
+        )
+        
+        keywords = set(self.basic_relative_patterns)
+        keywords.update(self.weekday_patterns)
+        keywords.update(self.weekday_guard_keywords)
+        keywords.update(['来週', '次'])
+        for entries in (self._compiled_time_patterns, self._compiled_numeric_patterns,
+                        self._compiled_period_patterns, self._compiled_complex_patterns,
+                        self._compiled_absolute_patterns):
+            keywords.update(anchor for _, anchor, _, _ in entries)
+        
+        # キーワードは一度の走査でまとめて探す
+        self.keyword_automaton = KeywordAutomaton(keywords)
+        
+        # キャッシュキー用：キーワードの前後で一致に関わりうる文字（数字・「ヶ」「日」、複合表現の続き）
+        self._complex_anchors = frozenset(anchor for _, anchor, _, _ in self._compiled_complex_patterns)
+        self._key_left_extension = re.compile(r'\d*ヶ?$')
+        self._key_right_extension = re.compile(r'\d*日?')
+        self._key_right_extension_complex = re.compile(r'\w*')
+        
+        # 日付表記の位置（タイトルから取り除く「6月17日」「2025-6-17」）
+        self._date_span_pattern = re.compile(r'\d{1,2}月\d{1,2}日|\d{4}-\d{1,2}-\d{1,2}')
+        self._date_span_anchors = ('月', '-')
+    
+    def _scan(self, text: str) -> Dict[str, int]:
+        """テキストを一度だけ走査し、出現キーワードと最初の位置を返す"""
+        return self.keyword_automaton.find(text)
+    
+    def date_bearing_text(self, text: str, text_lower: Optional[str] = None,
+                          keywords: Optional[Iterable[Tuple[int, str]]] = None) -> str:
+        """解析結果を左右する部分（日付表現を含む範囲）だけを切り出す
+        
+        小文字化したテキストとその走査結果（keywords）が既にあれば渡すと、求め直さない。
+        """
+        if text_lower is None:
+            text_lower = text.lower()
+        if keywords is None:
+            keywords = self.keyword_automaton.matches(text_lower)
+        start = end = None
+        has_complex = False
+        for position, keyword in keywords:
+            if start is None:
+                start = position
+            end = max(end or 0, position + len(keyword))
+            has_complex = has_complex or keyword in self._complex_anchors
+        
+        if start is None:
+            return ''
+        
+        start = self._key_left_extension.search(text_lower, 0, start).start()
+        right_extension = self._key_right_extension_complex if has_complex else self._key_right_extension
+        end = right_extension.match(text_lower, end).end()
+        return text_lower[start:end]
+    
+    def date_spans(self, text: str) -> Tuple[Tuple[int, int], ...]:
+        """日付表記（「6月17日」「2025-6-17」）の (開始, 終了) 位置を文中の順に返す"""
+        if not any(anchor in text for anchor in self._date_span_anchors):
+            return ()
+        return tuple(match.span() for match in self._date_span_pattern.finditer(text))
+    
+    def analyze(self, text: str, base_date: Optional[datetime] = None,
+                text_lower: Optional[str] = None) -> DateAnalysis:
+        """期日・日付キーワード・日付表記の位置をまとめて求める（キーワードの走査は一度だけ）"""
+        if text_lower is None:
+            text_lower = text.lower()
+        keywords = tuple(self.keyword_automaton.matches(text_lower))
+        due = self._parse(text, base_date, text_lower, keywords)
+        if any(keyword.startswith(self._date_span_anchors) for _, keyword in keywords):
+            date_spans = tuple(match.span() for match in self._date_span_pattern.finditer(text))
+        else:
+            date_spans = ()
+        return DateAnalysis(due, date_spans, keywords)
     
     def parse(self, text: str, base_date: Optional[datetime] = None) -> Optional[str]:
         """テキストから日時を解析"""
+        return self._parse(text, base_date)
+    
+    def _parse(self, text: str, base_date: Optional[datetime],
+               text_lower: Optional[str] = None,
+               keywords: Optional[Iterable[Tuple[int, str]]] = None) -> Optional[str]:
+        """parse()の本体（analyze()からは走査済みの結果を受け取る）"""
         if base_date is None:
             base_date = datetime.now()
+            if self.cache is not None:
+                self.cache.roll_over(base_date.date())
         
-        text_lower = text.lower()
+        if self.cache is None:
+            if keywords is None:
+                return self._parse_uncached(text, base_date)
+            return self._parse_uncached(text, base_date, text_lower,
+                                        self.keyword_automaton.collect(keywords))
         
-        # 段階1: 複合表現の解析
-        result = self._parse_complex_expressions(text_lower, base_date)
-        if result:
-            return result
+        # 結果は基準日の「日付」と日付表現の部分だけで決まる
+        key_text = self.date_bearing_text(text, text_lower, keywords)
+        key = (key_text, base_date.date())
+        result = self.cache.get(key, _MISSING)
+        if result is _MISSING:
+            result = self._parse_uncached(key_text, base_date)
+            self.cache.put(key, result)
+        return result
+    
+    def parse_many(self, texts: Iterable[str], base_date: Optional[datetime] = None,
+                   processes: Optional[int] = None, chunk_size: int = 1000) -> Iterator[Optional[str]]:
+        """複数のテキストをまとめて解析し、入力順に結果を返す（ジェネレーター）
         
-        # 段階2: 数値相対表現の解析
-        result = self._parse_numeric_relative(text_lower, base_date)
-        if result:
-            return result
-            
-        # 段階3: 期間表現の解析
-        result = self._parse_periods(text_lower, base_date)
-        if result:
-            return result
-        
-        # 段階4: 基本相対表現の解析
-        result = self._parse_basic_relative(text_lower, base_date)
-        if result:
-            return result
-            
-        # 段階5: 曜日表現の解析（改良版）
-        result = self._parse_weekdays_advanced(text_lower, base_date)
-        if result:
-            return result
+        基準日は全件で共通。チャンク内の同一テキストは一度だけ解析する。
+        processesを指定すると、大きなチャンクはプロセスプールで並列に解析する。
+        """
+        if base_date is None:
+            base_date = datetime.now()
+            if self.cache is not None:
+                self.cache.roll_over(base_date.date())
+        
+        executor = ProcessPoolExecutor(processes) if processes and processes > 1 else None
+        try:
+            iterator = iter(texts)
+            while True:
+                chunk = list(islice(iterator, chunk_size))
+                if not chunk:
+                    break
+                
+                unique_texts = list(dict.fromkeys(chunk))
+                if executor is not None and len(unique_texts) >= PROCESS_POOL_MIN_TEXTS:
+                    slice_size = -(-len(unique_texts) // processes)
+                    slices = [unique_texts[i:i + slice_size] for i in range(0, len(unique_texts), slice_size)]
+                    parsed: List[Optional[str]] = []
+                    for results in executor.map(_parse_in_worker, slices, [base_date] * len(slices)):
+                        parsed.extend(results)
+                else:
+                    parsed = [self.parse(text, base_date) for text in unique_texts]
+                
+                results_by_text = dict(zip(unique_texts, parsed))
+                for text in chunk:
+                    yield results_by_text[text]
+        finally:
+            if executor is not None:
+                executor.shutdown()
+    
+    def anchors_for(self, base_date: Union[date, datetime]) -> CalendarAnchors:
+        """基準日の暦テーブルを取得（日付が変わったときだけ作り直す）"""
+        day = base_date.date() if isinstance(base_date, datetime) else base_date
+        anchors = self._anchors
+        if anchors is None or anchors.today != day:
+            anchors = CalendarAnchors(day)
+            self._anchors = anchors
+        return anchors
+    
+    def _parse_uncached(self, text: str, base_date: datetime, text_lower: Optional[str] = None,
+                        tokens: Optional[Dict[str, int]] = None) -> Optional[str]:
+        """キャッシュを使わずに解析（小文字化・走査済みならその結果を使う）"""
+        anchors = self.anchors_for(base_date)
+        if text_lower is None:
+            text_lower = text.lower()
+        if tokens is None:
+            tokens = self._scan(text_lower)
+        time_of_day = self._extract_time(text_lower, tokens)
         
-        # 段階6: 絶対日付の解析
-        result = self._parse_absolute_dates(text_lower, base_date)
-        if result:
-            return result
+        # 段階ごとに解析し、最初に結果を返した段階で終わる（順序重要）
+        if not metrics.enabled:
+            for _, parse_stage in self._stages:
+                result = parse_stage(text_lower, anchors, tokens, time_of_day)
+                if result:
+                    return result
+            return None
         
+        for stage, parse_stage in self._stages:
+            started = perf_counter()
+            result = parse_stage(text_lower, anchors, tokens, time_of_day)
+            metrics.observe('shibu_parse_stage_seconds', perf_counter() - started, (('stage', stage),))
+            if result:
+                metrics.inc('shibu_parse_stage_matched_total', (('stage', stage),))
+                return result
+        metrics.inc('shibu_parse_stage_matched_total', (('stage', 'none'),))
         return None
     
-    def _parse_complex_expressions(self, text: str, base_date: datetime) -> Optional[str]:
+    def _parse_complex_expressions(self, text: str, anchors: CalendarAnchors,
+                                   tokens: Optional[Dict[str, int]] = None,
+                                   time_of_day: Optional[TimeOfDay] = None) -> Optional[str]:
         """複合表現の解析"""
-        # 来週の月曜の午前中
-        complex_patterns = [
-            r'来週の(\w+)の(\w+)',
-            r'今度の(\w+)の(\w+)',
-            r'次の(\w+)の(\w+)',
-        ]
+        if tokens is None:
+            tokens = self._scan(text)
         
-        for pattern in complex_patterns:
-            match = re.search(pattern, text)
+        # 来週の月曜の午前中
+        for _, anchor, compiled, _ in self._compiled_complex_patterns:
+            if anchor not in tokens:
+                continue
+            match = compiled.search(text)
             if match:
                 weekday_str = match.group(1)
-                time_str = match.group(2)
                 
                 # 曜日を取得
                 weekday = None
@@ -121,146 +364,141 @@ class AdvancedDateParser:
                         break
                 
                 if weekday is not None:
-                    # 来週の指定曜日を計算
-                    days_ahead = weekday - base_date.weekday()
-                    if '来週' in text or '次' in text:
-                        days_ahead += 7
-                    elif days_ahead <= 0:
-                        days_ahead += 7
-                    
-                    target_date = base_date + timedelta(days=days_ahead)
-                    
-                    # 時間を設定
-                    hour = self._parse_time(time_str)
-                    target_date = target_date.replace(hour=hour, minute=0, second=0, microsecond=0)
+                    # 来週の指定曜日を取得
+                    if '来週' in tokens or '次' in tokens:
+                        target_date = anchors.next_week_weekdays[weekday]
+                    else:
+                        target_date = anchors.upcoming_weekdays[weekday]
                     
-                    return target_date.strftime("%Y-%m-%dT%H:%M")
+                    # 時間を設定（時刻部分の範囲内だけを見る）
+                    time_of_day = self._extract_time(text, tokens, *match.span(2))
+                    hour = time_of_day.hour if time_of_day else DEFAULT_HOUR
+                    return self._format_at_hour(target_date, hour)
         
         return None
     
-    def _parse_numeric_relative(self, text: str, base_date: datetime) -> Optional[str]:
+    def _parse_numeric_relative(self, text: str, anchors: CalendarAnchors,
+                                tokens: Optional[Dict[str, int]] = None,
+                                time_of_day: Optional[TimeOfDay] = None) -> Optional[str]:
         """数値相対表現の解析"""
-        for pattern, calc_func in self.numeric_relative_patterns.items():
-            match = re.search(pattern, text)
+        if tokens is None:
+            tokens = self._scan(text)
+            time_of_day = self._extract_time(text, tokens)
+        
+        for _, anchor, compiled, calc_func in self._compiled_numeric_patterns:
+            if anchor not in tokens:
+                continue
+            match = compiled.search(text)
             if match:
                 try:
                     delta = calc_func(match.group(1))
-                    target_date = base_date + delta
+                    target_date = anchors.after_days(delta.days)
                     
                     # 時間を解析
-                    hour = self._parse_time(text)
-                    target_date = target_date.replace(hour=hour, minute=0, second=0, microsecond=0)
-                    
-                    return target_date.strftime("%Y-%m-%dT%H:%M")
+                    hour = time_of_day.hour if time_of_day else DEFAULT_HOUR
+                    return self._format_at_hour(target_date, hour)
                 except Exception as e:
                     print(f"数値相対解析エラー: {e}")
                     continue
         
         return None
     
-    def _parse_periods(self, text: str, base_date: datetime) -> Optional[str]:
+    def _parse_periods(self, text: str, anchors: CalendarAnchors,
+                       tokens: Optional[Dict[str, int]] = None,
+                       time_of_day: Optional[TimeOfDay] = None) -> Optional[str]:
         """期間表現の解析"""
-        for pattern, calc_func in self.period_patterns.items():
-            if re.search(pattern, text):
-                try:
-                    if '今月' in pattern and r'(\d{1,2})日' in pattern:
-                        match = re.search(pattern, text)
-                        if match:
-                            target_date = calc_func(base_date, int(match.group(1)))
-                        else:
-                            continue
-                    elif '来月' in pattern and r'(\d{1,2})日' in pattern:
-                        match = re.search(pattern, text)
-                        if match:
-                            target_date = calc_func(base_date, int(match.group(1)))
-                        else:
-                            continue
-                    else:
-                        target_date = calc_func(base_date)
-                    
-                    # 時間を解析
-                    hour = self._parse_time(text)
-                    target_date = target_date.replace(hour=hour, minute=0, second=0, microsecond=0)
-                    
-                    return target_date.strftime("%Y-%m-%dT%H:%M")
-                except Exception as e:
-                    print(f"期間解析エラー: {e}")
+        if tokens is None:
+            tokens = self._scan(text)
+            time_of_day = self._extract_time(text, tokens)
+        
+        for pattern, anchor, compiled, calc_func in self._compiled_period_patterns:
+            if anchor not in tokens:
+                continue
+            if anchor == pattern:
+                match = None
+            else:
+                match = compiled.search(text)
+                if not match:
                     continue
+            
+            try:
+                if match:
+                    target_date = calc_func(anchors, int(match.group(1)))
+                else:
+                    target_date = calc_func(anchors)
+                
+                # 時間を解析
+                hour = time_of_day.hour if time_of_day else DEFAULT_HOUR
+                return self._format_at_hour(target_date, hour)
+            except Exception as e:
+                print(f"期間解析エラー: {e}")
+                continue
         
         return None
     
-    def _parse_basic_relative(self, text: str, base_date: datetime) -> Optional[str]:
+    def _parse_basic_relative(self, text: str, anchors: CalendarAnchors,
+                              tokens: Optional[Dict[str, int]] = None,
+                              time_of_day: Optional[TimeOfDay] = None) -> Optional[str]:
         """基本相対表現の解析"""
-        basic_patterns = {
-            '今日': timedelta(days=0),
-            'きょう': timedelta(days=0),
-            '明日': timedelta(days=1),
-            'あした': timedelta(days=1),
-            'あす': timedelta(days=1),
-            '明後日': timedelta(days=2),
-            'あさって': timedelta(days=2),
-            '来週': timedelta(weeks=1),
-            '再来週': timedelta(weeks=2),
-            '来月': timedelta(days=30),  # 概算
-        }
+        if tokens is None:
+            tokens = self._scan(text)
+            time_of_day = self._extract_time(text, tokens)
         
-        for keyword, delta in basic_patterns.items():
-            if keyword in text:
-                target_date = base_date + delta
+        for keyword, delta in self.basic_relative_patterns.items():
+            if keyword in tokens:
+                target_date = anchors.after_days(delta.days)
                 
                 # 時間を解析
-                hour = self._parse_time(text)
-                target_date = target_date.replace(hour=hour, minute=0, second=0, microsecond=0)
-                
-                return target_date.strftime("%Y-%m-%dT%H:%M")
+                hour = time_of_day.hour if time_of_day else DEFAULT_HOUR
+                return self._format_at_hour(target_date, hour)
         
         return None
     
-    def _parse_weekdays_advanced(self, text: str, base_date: datetime) -> Optional[str]:
+    def _parse_weekdays_advanced(self, text: str, anchors: CalendarAnchors,
+                                 tokens: Optional[Dict[str, int]] = None,
+                                 time_of_day: Optional[TimeOfDay] = None) -> Optional[str]:
         """改良版曜日解析"""
+        if tokens is None:
+            tokens = self._scan(text)
+            time_of_day = self._extract_time(text, tokens)
+        
         # 「明後日」などの誤認を防ぐ
-        if re.search(r'明[々後日]+', text):
+        if any(keyword in tokens for keyword in self.weekday_guard_keywords):
             return None
         
         for day_name, target_weekday in self.weekday_patterns.items():
             # より厳密なマッチング（単語境界を考慮）
-            if day_name in text:
-                current_weekday = base_date.weekday()
-                days_ahead = target_weekday - current_weekday
-                
-                if '来週' in text:
-                    days_ahead += 7
-                elif days_ahead <= 0:
-                    days_ahead += 7
-                
-                target_date = base_date + timedelta(days=days_ahead)
+            if day_name in tokens:
+                if '来週' in tokens:
+                    target_date = anchors.next_week_weekdays[target_weekday]
+                else:
+                    target_date = anchors.upcoming_weekdays[target_weekday]
                 
                 # 時間を解析
-                hour = self._parse_time(text)
-                target_date = target_date.replace(hour=hour, minute=0, second=0, microsecond=0)
-                
-                return target_date.strftime("%Y-%m-%dT%H:%M")
+                hour = time_of_day.hour if time_of_day else DEFAULT_HOUR
+                return self._format_at_hour(target_date, hour)
         
         return None
     
-    def _parse_absolute_dates(self, text: str, base_date: datetime) -> Optional[str]:
+    def _parse_absolute_dates(self, text: str, anchors: CalendarAnchors,
+                              tokens: Optional[Dict[str, int]] = None,
+                              time_of_day: Optional[TimeOfDay] = None) -> Optional[str]:
         """絶対日付の解析"""
-        patterns = [
-            r'(\d{1,2})月(\d{1,2})日',
-            r'(\d{4})年(\d{1,2})月(\d{1,2})日',
-            r'(\d{1,2})/(\d{1,2})',
-            r'(\d{4})-(\d{1,2})-(\d{1,2})',
-        ]
+        if tokens is None:
+            tokens = self._scan(text)
+            time_of_day = self._extract_time(text, tokens)
         
-        for pattern in patterns:
-            match = re.search(pattern, text)
+        for _, anchor, compiled, _ in self._compiled_absolute_patterns:
+            if anchor not in tokens:
+                continue
+            match = compiled.search(text)
             if match:
                 groups = match.groups()
                 
                 try:
                     if len(groups) == 2:  # 月日のみ
                         month, day = int(groups[0]), int(groups[1])
-                        year = base_date.year
+                        year = anchors.today.year
                     elif len(groups) == 3:  # 年月日
                         year, month, day = int(groups[0]), int(groups[1]), int(groups[2])
                     
@@ -269,82 +507,71 @@ class AdvancedDateParser:
                         target_date = datetime(year, month, day)
                         
                         # 時間を解析
-                        hour = self._parse_time(text)
-                        target_date = target_date.replace(hour=hour, minute=0, second=0, microsecond=0)
-                        
-                        return target_date.strftime("%Y-%m-%dT%H:%M")
+                        hour = time_of_day.hour if time_of_day else DEFAULT_HOUR
+                        return self._format_at_hour(target_date, hour)
                         
                 except ValueError:
                     continue
         
         return None
     
-    def _parse_time(self, text: str) -> int:
-        """時間を解析（デフォルトは12時）"""
-        for pattern, calc_func in self.time_patterns:
-            match = re.search(pattern, text)
+    def parse_time_of_day(self, text: str) -> Optional[TimeOfDay]:
+        """テキストから時刻だけを解析（日付の解決は行わない）"""
+        text_lower = text.lower()
+        return self._extract_time(text_lower, self._scan(text_lower))
+    
+    def _extract_time(self, text: str, tokens: Dict[str, int],
+                      start: int = 0, end: Optional[int] = None) -> Optional[TimeOfDay]:
+        """走査結果から時刻を抽出（start〜endの範囲に限定可能）"""
+        if end is None:
+            end = len(text)
+        
+        for pattern, anchor, compiled, calc_func in self._compiled_time_patterns:
+            if anchor not in tokens:
+                continue
+            if anchor == pattern:
+                position = text.find(pattern, start, end)
+                if position < 0:
+                    continue
+                span = (position, position + len(pattern))
+                return TimeOfDay(calc_func(), span, TIME_CONFIDENCE_APPROXIMATE)
+            match = compiled.search(text, start, end)
             if match:
                 try:
-                    if match.groups():
-                        return calc_func(match.group(1))
-                    else:
-                        return calc_func()
+                    return TimeOfDay(calc_func(match.group(1)), match.span(), TIME_CONFIDENCE_EXPLICIT)
                 except:
                     continue
         
-        return 12  # デフォルト
-    
-    # 期間計算ヘルパーメソッド
-    def _get_this_weekend(self, base_date: datetime) -> datetime:
-        """今週末（土曜日）"""
-        days_until_saturday = (5 - base_date.weekday()) % 7
-        if days_until_saturday == 0 and base_date.weekday() != 5:
-            days_until_saturday = 7
-        return base_date + timedelta(days=days_until_saturday)
-    
-    def _get_next_weekend(self, base_date: datetime) -> datetime:
-        """来週末（土曜日）"""
-        return self._get_this_weekend(base_date) + timedelta(weeks=1)
-    
-    def _get_month_end(self, base_date: datetime) -> datetime:
-        """月末"""
-        last_day = calendar.monthrange(base_date.year, base_date.month)[1]
-        return base_date.replace(day=last_day)
-    
-    def _get_next_month_end(self, base_date: datetime) -> datetime:
-        """来月末"""
-        if base_date.month == 12:
-            next_month_date = base_date.replace(year=base_date.year + 1, month=1)
-        else:
-            next_month_date = base_date.replace(month=base_date.month + 1)
-        return self._get_month_end(next_month_date)
-    
-    def _get_year_end(self, base_date: datetime) -> datetime:
-        """年末"""
-        return base_date.replace(month=12, day=31)
-    
-    def _get_next_year(self, base_date: datetime) -> datetime:
-        """来年（1月1日）"""
-        return base_date.replace(year=base_date.year + 1, month=1, day=1)
+        return None
     
-    def _get_this_month_day(self, base_date: datetime, day: int) -> datetime:
-        """今月の指定日"""
-        try:
-            return base_date.replace(day=day)
-        except ValueError:
-            # 日付が無効な場合は月末
-            return self._get_month_end(base_date)
+    def _parse_time(self, text: str) -> int:
+        """時間を解析（デフォルトは12時）"""
+        time_of_day = self.parse_time_of_day(text)
+        return time_of_day.hour if time_of_day else DEFAULT_HOUR
     
-    def _get_next_month_day(self, base_date: datetime, day: int) -> datetime:
-        """来月の指定日"""
-        try:
-            if base_date.month == 12:
-                return base_date.replace(year=base_date.year + 1, month=1, day=day)
-            else:
-                return base_date.replace(month=base_date.month + 1, day=day)
-        except ValueError:
-            # 日付が無効な場合は来月末
-            return self._get_next_month_end(base_date)
+    @staticmethod
+    def _format_at_hour(target_date: Union[date, datetime], hour: int) -> str:
+        """指定時刻（正時）のISO8601形式（分まで）に整形"""
+        if not 0 <= hour <= 23:
+            raise ValueError("hour must be in 0..23")
+        if target_date.year < 1000:
+            return datetime(target_date.year, target_date.month, target_date.day, hour).strftime("%Y-%m-%dT%H:%M")
+        return f"{target_date.year}-{target_date.month:02d}-{target_date.day:02d}T{hour:02d}:00"
+
+
+# プロセスプールに回すチャンク内ユニーク件数の下限（これ未満はプロセス間通信の方が高くつく）
+PROCESS_POOL_MIN_TEXTS = 5000
+
+# ワーカープロセスごとのパーサー
+_worker_parser: Optional[AdvancedDateParser] = None
+
+
+def _parse_in_worker(texts: List[str], base_date: datetime) -> List[Optional[str]]:
+    """プロセスプールのワーカーで解析"""
+    global _worker_parser
+    if _worker_parser is None:
+        _worker_parser = AdvancedDateParser()
+    return [_worker_parser.parse(text, base_date) for text in texts]
 
 
 # テスト関数
@@ -4,13 +4,311 @@
 ShibuTaskAgent Web Interface
 """
 
-from flask import Flask, render_template, request, jsonify, Response
-from shibu_task_agent import ShibuTaskAgent
+from flask import Flask, g, render_template, request, jsonify, Response
+from advanced_date_parser import AdvancedDateParser
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, dump_profile, metrics
+from reminder_scheduler import Reminder, ReminderScheduler
+from shibu_task_agent import DEFAULT_PAGE_SIZE, DEFAULT_UPCOMING_TASKS, ShibuTaskAgent, dump_json, parse_revision_token
+from sqlite_task_store import SQLiteDatabase, SQLiteTaskStore
+from task_store import SORT_ORDERS, STATUS_DONE, STATUS_TODO, TaskPage, TaskQuery, TaskStore, due_key
+from user_partitions import UserPartitions, DEFAULT_USER
+from datetime import datetime, timedelta
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from time import perf_counter
+import base64
+import cProfile
+import hashlib
 import json
+import logging
+import os
 
 app = Flask(__name__, static_folder='public/static')
 app.config['JSON_AS_ASCII'] = False  # 日本語をUnicodeエスケープしない
-agent = ShibuTaskAgent()
+
+
+# SHIBU_TASK_DBを指定するとSQLiteに保存（指定しなければインメモリ）
+DB_PATH = os.environ.get('SHIBU_TASK_DB')
+
+# SHIBU_PROFILE_DIRを指定すると、?profile付きのリクエストのcProfileをそこに保存する
+PROFILE_DIR = os.environ.get('SHIBU_PROFILE_DIR')
+database = SQLiteDatabase(DB_PATH) if DB_PATH else None
+
+# バッチで一度に受け付ける入力の上限
+MAX_BATCH_INPUTS = 500
+
+# 期日順の一覧で一度に返す件数の上限
+MAX_DUE_TASKS = 500
+
+# 一覧のページで一度に返す件数の上限
+MAX_PAGE_SIZE = 500
+
+# どれかが指定されたら、/api/tasksは全件ではなくページで返す
+PAGE_PARAMS = ('limit', 'cursor', 'status', 'link', 'due_from', 'due_to', 'q', 'sort')
+
+# ?status= に使える別名
+STATUS_ALIASES = {'todo': STATUS_TODO, 'done': STATUS_DONE}
+
+# 日付パーサーは全ユーザーで共有する
+date_parser = AdvancedDateParser()
+
+
+def parse_reminder_offsets(value: str) -> Tuple[timedelta, ...]:
+    """リマインダーのタイミング（期日の何分前かをカンマ区切りで）。不正ならValueError"""
+    return tuple(timedelta(minutes=int(minutes)) for minutes in value.split(',') if minutes.strip())
+
+
+def log_reminder(reminder: Reminder) -> None:
+    """リマインダーをログに出す（既定の通知先）"""
+    if metrics.enabled:
+        metrics.inc('shibu_reminders_fired_total')
+    logging.getLogger('shibu.reminders').info(
+        '%s: 「%s」の期日 %s の%d分前です', reminder.user, reminder.title, reminder.due,
+        reminder.offset.total_seconds() // 60)
+
+
+# SHIBU_REMINDER_OFFSETSを指定すると（例: 60,10）期日の前にリマインダーを出す
+REMINDER_OFFSETS = os.environ.get('SHIBU_REMINDER_OFFSETS')
+reminders = ReminderScheduler(log_reminder, parse_reminder_offsets(REMINDER_OFFSETS)) if REMINDER_OFFSETS else None
+
+
+def create_agent(user: str) -> ShibuTaskAgent:
+    """ユーザーのエージェントを作成"""
+    store = SQLiteTaskStore(database, user=user) if database is not None else TaskStore()
+    on_change = partial(reminders.task_changed, user) if reminders is not None else None
+    return ShibuTaskAgent(store, date_parser=date_parser, on_change=on_change)
+
+
+def forget_reminders(user: str, agent: ShibuTaskAgent) -> None:
+    """インメモリの区画を破棄したら、消えたタスクのリマインダーも取り消す"""
+    if reminders is not None and not agent.store.persistent:
+        reminders.cancel_user(user)
+
+
+def reminder_sources() -> Iterator[Tuple[str, SQLiteTaskStore]]:
+    """起動時にリマインダーを登録し直すストア（インメモリなら起動時のタスクはない）"""
+    if database is not None:
+        for user in database.users():
+            yield user, SQLiteTaskStore(database, user=user)
+
+
+def create_partitions() -> UserPartitions:
+    """ユーザーごとのタスク区画を作成（上限は環境変数で変更できる）
+
+    インメモリでは区画の破棄でタスクが消えるため、放置時間・総タスク数の上限は
+    SHIBU_IDLE_TIMEOUT / SHIBU_MAX_TASKSを指定したときだけ使う（SQLiteでは放置時間の既定は1時間）。
+    """
+    idle_timeout = os.environ.get('SHIBU_IDLE_TIMEOUT', 3600 if database is not None else None)
+    max_tasks = os.environ.get('SHIBU_MAX_TASKS')
+    return UserPartitions(
+        create_agent,
+        max_users=int(os.environ.get('SHIBU_MAX_USERS', 1000)),
+        idle_timeout=float(idle_timeout) if idle_timeout is not None else None,
+        max_tasks=int(max_tasks) if max_tasks is not None else None,
+        on_evict=forget_reminders,
+    )
+
+
+partitions = create_partitions()
+
+
+@contextmanager
+def using_partitions(user_partitions: Optional[UserPartitions] = None) -> Iterator[UserPartitions]:
+    """一時的に別の区画でリクエストを処理する（省略時は新しく作る。テスト・ベンチマーク用、終われば元に戻す）"""
+    global partitions
+    saved = partitions
+    partitions = user_partitions if user_partitions is not None else create_partitions()
+    try:
+        yield partitions
+    finally:
+        partitions = saved
+
+
+def request_user() -> str:
+    """リクエストのユーザー名（本文のuser → クエリのuser → anonymous）"""
+    data = request.get_json(silent=True) or {}
+    return data.get('user') or request.args.get('user') or DEFAULT_USER
+
+
+def parse_batch_inputs(data) -> List[str]:
+    """バッチの入力（文字列の配列、MAX_BATCH_INPUTS件まで）。不正ならValueError"""
+    inputs = data.get('inputs') if isinstance(data, dict) else None
+    if not isinstance(inputs, list) or not inputs:
+        raise ValueError('inputs must be a non-empty array of strings')
+    if len(inputs) > MAX_BATCH_INPUTS:
+        raise ValueError(f'too many inputs (max {MAX_BATCH_INPUTS})')
+    if not all(isinstance(user_input, str) for user_input in inputs):
+        raise ValueError('inputs must be a non-empty array of strings')
+    return inputs
+
+
+def parse_revision(value) -> Optional[str]:
+    """クライアントが持っているリビジョン（以前に返した "<store_id>-<revision>"。指定なしはNone、不正な値はValueError）"""
+    if value is None or value == '':
+        return None
+    if not isinstance(value, str):
+        raise ValueError(f'invalid revision: {value}')
+    parse_revision_token(value)
+    return value
+
+
+def metrics_text(user_partitions: Optional[UserPartitions] = None) -> str:
+    """計測値とその時点の統計（解析キャッシュ・ユーザー区画）をPrometheusのテキスト形式で返す"""
+    if user_partitions is None:
+        user_partitions = partitions
+    counters = []
+    gauges = []
+    if date_parser.cache is not None:
+        cache_stats = date_parser.cache.stats()
+        counters.append(('shibu_parse_cache_hits_total', (), cache_stats['hits']))
+        counters.append(('shibu_parse_cache_misses_total', (), cache_stats['misses']))
+        gauges.append(('shibu_parse_cache_entries', (), cache_stats['size']))
+    partition_stats = user_partitions.stats()
+    counters.append(('shibu_partition_evictions_total', (), partition_stats['evictions']))
+    gauges.append(('shibu_users', (), partition_stats['users']))
+    gauges.append(('shibu_resident_tasks', (), partition_stats['resident_tasks']))
+    if reminders is not None:
+        gauges.append(('shibu_pending_reminders', (), reminders.pending()))
+    return metrics.render(counters, gauges)
+
+
+def parse_due_query(args, default_limit: Optional[int]) -> Tuple[Optional[datetime], Optional[int]]:
+    """期日順の一覧のクエリ（now=基準時刻のISO8601、limit=件数）。不正ならValueError"""
+    now = args.get('now')
+    now = datetime.fromisoformat(now) if now else None
+    limit = args.get('limit')
+    if limit is None or limit == '':
+        return now, default_limit
+    limit = int(limit)
+    if not 0 < limit <= MAX_DUE_TASKS:
+        raise ValueError(f'limit must be between 1 and {MAX_DUE_TASKS}')
+    return now, limit
+
+
+def wants_page(args) -> bool:
+    """一覧をページで返すか（ページ・絞り込み・並び順のどれかが指定されている）"""
+    return any(name in args for name in PAGE_PARAMS)
+
+
+def parse_task_query(args) -> Tuple[TaskQuery, int, Optional[tuple]]:
+    """一覧のクエリ（絞り込み・並び順・件数・カーソル）。不正ならValueError
+
+    status=未着手|完了（todo|done）、link=アプリ名、due_from/due_to=ISO8601（due_toは含まない）、
+    q=タイトルに含む文字列、sort=id|-id|due|-due、limit=件数、cursor=前のページのnext_cursor
+    """
+    status = args.get('status') or None
+    if status is not None:
+        status = STATUS_ALIASES.get(status, status)
+        if status not in (STATUS_TODO, STATUS_DONE):
+            raise ValueError(f'unknown status: {args.get("status")}')
+    sort = args.get('sort') or 'id'
+    if sort not in SORT_ORDERS:
+        raise ValueError(f'sort must be one of {", ".join(SORT_ORDERS)}')
+    due_from, due_to = (args.get(name) for name in ('due_from', 'due_to'))
+    query = TaskQuery(
+        status=status,
+        link=args.get('link') or None,
+        due_from=due_key(datetime.fromisoformat(due_from)) if due_from else None,
+        due_to=due_key(datetime.fromisoformat(due_to)) if due_to else None,
+        title=args.get('q') or None,
+        sort=sort,
+    )
+    limit = args.get('limit')
+    limit = int(limit) if limit else DEFAULT_PAGE_SIZE
+    if not 0 < limit <= MAX_PAGE_SIZE:
+        raise ValueError(f'limit must be between 1 and {MAX_PAGE_SIZE}')
+    cursor = args.get('cursor')
+    return query, limit, decode_cursor(query, cursor) if cursor else None
+
+
+def encode_cursor(query: TaskQuery, key: tuple) -> str:
+    """続きの位置を、並び順と合わせてURLにそのまま使える文字列にする"""
+    raw = json.dumps([query.sort, *key], ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(query: TaskQuery, cursor: str) -> tuple:
+    """encode_cursorの逆（並び順が違う・壊れているならValueError）"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        sort, *key = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError('invalid cursor')
+    if sort != query.sort or len(key) != len(query.key({'id': 0, 'due': ''})):
+        raise ValueError('cursor does not match the sort order')
+    if not isinstance(key[-1], int) or (query.by_due and not _is_due(key[0])):
+        raise ValueError('invalid cursor')
+    return tuple(key)
+
+
+def _is_due(value) -> bool:
+    """期日として読める文字列か"""
+    try:
+        datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def page_variant(query: TaskQuery, limit: int, after: Optional[tuple]) -> str:
+    """ページのETagに付ける、クエリごとの識別子"""
+    return hashlib.sha1(repr((tuple(query), limit, after)).encode('utf-8')).hexdigest()[:16]
+
+
+def page_payload(revision: str, page: TaskPage, query: TaskQuery) -> Dict[str, Any]:
+    """一覧のページのレスポンス（続きがなければnext_cursorはnull）"""
+    next_cursor = encode_cursor(query, page.next_key) if page.next_key is not None else None
+    return {'revision': revision, 'tasks': page.tasks, 'next_cursor': next_cursor}
+
+
+def wants_pretty() -> bool:
+    """?prettyが指定されていれば整形出力する"""
+    return 'pretty' in request.args
+
+
+def json_response(payload, status: int = 200) -> Response:
+    """1回だけシリアライズしてJSONレスポンスを作る（?prettyで整形出力）"""
+    return body_response(dump_json(payload, wants_pretty()), status)
+
+
+def body_response(body: str, status: int = 200) -> Response:
+    """シリアライズ済みのJSONからレスポンスを作る"""
+    return Response(
+        body,
+        status=status,
+        mimetype='application/json',
+        headers={'Content-Type': 'application/json; charset=utf-8'}
+    )
+
+@app.before_request
+def start_reminders():
+    """最初のリクエストでリマインダーを動かし始める（gunicornなどでも、リクエストを受けるプロセスでだけ動く）"""
+    if reminders is not None and not reminders.started:
+        reminders.ensure_started(reminder_sources)
+
+@app.before_request
+def start_instrumentation():
+    """計測が有効なら処理時間を、?profileならcProfileを取り始める"""
+    if metrics.enabled:
+        g.request_started = perf_counter()
+    if PROFILE_DIR and 'profile' in request.args:
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+@app.after_request
+def finish_instrumentation(response: Response) -> Response:
+    """処理時間を記録し、プロファイルを保存する（ファイル名はX-Profile-Dumpヘッダーで返す）"""
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        path = dump_profile(profiler, PROFILE_DIR, request.endpoint)
+        response.headers['X-Profile-Dump'] = os.path.basename(path)
+    started = g.pop('request_started', None)
+    if started is not None:
+        metrics.observe('shibu_request_seconds', perf_counter() - started,
+                        (('endpoint', request.endpoint or 'unknown'),))
+    return response
 
 @app.route('/')
 def index():
@@ -26,21 +324,52 @@ def process_input():
         
         if not user_input:
             return jsonify({'error': 'Input is required'}), 400
+        try:
+            since = parse_revision(data.get('since'))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'since must be a revision returned by the server'}), 400
         
-        # ShibuTaskAgentで処理
-        result = agent.process_input(user_input)
-        tasks = json.loads(result)
+        # ユーザーのShibuTaskAgentで処理
+        with partitions.session(request_user()) as agent:
+            agent.apply_input(user_input)
+            # sinceを送ってきたクライアントには差分だけを返す
+            changes = agent.changes_since(since)
         
         response_data = {
             'success': True,
-            'tasks': tasks,
+            'tasks': changes['tasks'],
+            'revision': changes['revision'],
+            'full': changes['full'],
             'processed_input': user_input
         }
-        return Response(
-            json.dumps(response_data, ensure_ascii=False, indent=2),
-            mimetype='application/json',
-            headers={'Content-Type': 'application/json; charset=utf-8'}
-        )
+        return json_response(response_data)
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/process/batch', methods=['POST'])
+def process_batch():
+    """オフライン中にためた複数の入力を順に処理"""
+    try:
+        data = request.get_json(silent=True)
+        try:
+            inputs = parse_batch_inputs(data)
+            since = parse_revision(data.get('since'))
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # 全件を1回のロック・トランザクションで反映し、最後に一覧（または差分）を1回だけ返す
+        with partitions.session(request_user()) as agent:
+            results = agent.apply_batch(inputs)
+            changes = agent.changes_since(since)
+        
+        return json_response({
+            'success': True,
+            'results': results,
+            'tasks': changes['tasks'],
+            'revision': changes['revision'],
+            'full': changes['full']
+        })
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -49,25 +378,107 @@ def process_input():
 def get_tasks():
     """現在のタスク一覧を取得"""
     try:
-        result = agent.process_input("")  # 空入力で現在のタスクを取得
-        tasks = json.loads(result)
-        return Response(
-            json.dumps(tasks, ensure_ascii=False, indent=2),
-            mimetype='application/json',
-            headers={'Content-Type': 'application/json; charset=utf-8'}
-        )
+        try:
+            since = parse_revision(request.args.get('since'))
+        except ValueError:
+            return jsonify({'error': 'since must be a revision returned by the server'}), 400
+        pretty = wants_pretty()
+        if wants_page(request.args):
+            return get_task_page(pretty)
+        with partitions.session(request_user()) as agent:
+            if since is not None:
+                # ?since=<revision> には差分（古すぎる・別のストアなら全件）を返す
+                changes = agent.changes_since(since)
+                response = json_response(changes)
+                response.headers['X-Task-Revision'] = changes['revision']
+                return response
+            
+            # 変わっていなければシリアライズせずに304を返す
+            etag = agent.tasks_etag(pretty)
+            if request.if_none_match.contains(etag):
+                response = Response(status=304)
+            else:
+                revision, body = agent.tasks_json(pretty)
+                etag = agent.tasks_etag(pretty, revision)
+                response = body_response(body)
+                response.headers['X-Task-Revision'] = agent.revision_token(revision)
+        response.set_etag(etag)
+        # ブラウザは毎回If-None-Matchで問い合わせる（fetchのポーリングもそのまま304になる）
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def get_task_page(pretty: bool) -> Response:
+    """絞り込み・並び順・カーソルを指定した一覧の1ページ"""
+    try:
+        query, limit, after = parse_task_query(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    with partitions.session(request_user()) as agent:
+        # ページの内容はリビジョンとクエリで決まるので、変わっていなければ304を返す
+        variant = page_variant(query, limit, after)
+        etag = agent.tasks_etag(pretty, variant=variant)
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            revision, page = agent.task_page(query, limit, after)
+            etag = agent.tasks_etag(pretty, revision, variant)
+            token = agent.revision_token(revision)
+            response = json_response(page_payload(token, page, query))
+            response.headers['X-Task-Revision'] = token
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/api/tasks/upcoming', methods=['GET'])
+def get_upcoming_tasks():
+    """期日が近い順の未着手タスク（?limit=件数、?now=基準時刻）"""
+    try:
+        try:
+            now, limit = parse_due_query(request.args, DEFAULT_UPCOMING_TASKS)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        with partitions.session(request_user()) as agent:
+            now_key, tasks = agent.upcoming_tasks(limit, now)
+        return json_response({'now': now_key, 'tasks': tasks})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/tasks/overdue', methods=['GET'])
+def get_overdue_tasks():
+    """期日を過ぎた未着手タスク（?limit=件数、?now=基準時刻）"""
+    try:
+        try:
+            now, limit = parse_due_query(request.args, MAX_DUE_TASKS)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        with partitions.session(request_user()) as agent:
+            now_key, tasks = agent.overdue_tasks(limit, now)
+        return json_response({'now': now_key, 'tasks': tasks})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/reset', methods=['POST'])
 def reset_tasks():
-    """タスクをリセット"""
+    """タスクをリセット（誤って別のユーザーを消さないよう、userの指定を必須にする）"""
     try:
-        global agent
-        agent = ShibuTaskAgent()
+        data = request.get_json(silent=True) or {}
+        user = data.get('user') or request.args.get('user')
+        if not user:
+            return jsonify({'error': 'user is required'}), 400
+        with partitions.session(user) as agent:
+            agent.reset()
         return jsonify({'success': True, 'message': 'Tasks reset successfully'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """計測値（Prometheusのテキスト形式）"""
+    return Response(metrics_text(), content_type=METRICS_CONTENT_TYPE)
+
 if __name__ == '__main__':
+    if reminders is not None:
+        logging.basicConfig(level=logging.INFO)
     app.run(debug=True, host='0.0.0.0', port=8080) 
\ No newline at end of file
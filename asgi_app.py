@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ShibuTaskAgent ASGI Interface
+Flask版（app.py）と同じ /api/process・/api/process/batch・/api/tasks（/upcoming・/overdue）・
+/api/reset・/api/metrics をasyncioで提供します。
+文の解析（CPU処理）・書き込みロック待ち・全件のシリアライズ・SQLiteの問い合わせはスレッドプールで行い、
+イベントループを止めません。
+リマインダー（SHIBU_REMINDER_OFFSETS）は起動時にストアから登録し直し、同じイベントループで発火します。
+
+起動: uvicorn asgi_app:app --port 8080
+"""
+
+import asyncio
+import json
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+from app import (MAX_DUE_TASKS, create_partitions, metrics_text, page_payload, page_variant,
+                 parse_batch_inputs, parse_due_query, parse_revision, parse_task_query,
+                 reminder_sources, reminders as default_reminders, wants_page)
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, metrics
+from reminder_scheduler import ReminderScheduler
+from shibu_task_agent import DEFAULT_UPCOMING_TASKS, dump_json
+from user_partitions import DEFAULT_USER, UserPartitions
+
+JSON_HEADERS = [(b'content-type', b'application/json; charset=utf-8')]
+
+
+class Request:
+    """ASGIのscopeと本文から必要な値を取り出したもの"""
+
+    def __init__(self, scope: Dict[str, Any], body: bytes):
+        self.method = scope['method']
+        self.path = scope['path']
+        self.query = parse_qs(scope.get('query_string', b'').decode('latin-1'), keep_blank_values=True)
+        self.headers = {name.decode('latin-1').lower(): value.decode('latin-1')
+                        for name, value in scope.get('headers', ())}
+        self.body = body
+
+    def arg(self, name: str) -> Optional[str]:
+        values = self.query.get(name)
+        return values[0] if values else None
+
+    @property
+    def args(self) -> Dict[str, str]:
+        """クエリ文字列（同じ名前が複数あれば最初の値）"""
+        return {name: values[0] for name, values in self.query.items()}
+
+    @property
+    def pretty(self) -> bool:
+        return 'pretty' in self.query
+
+    def json(self) -> Dict[str, Any]:
+        """本文のJSON（空・不正ならValueError）"""
+        data = json.loads(self.body or b'null')
+        if not isinstance(data, dict):
+            raise ValueError('request body must be a JSON object')
+        return data
+
+    def user(self, data: Optional[Dict[str, Any]] = None) -> str:
+        """リクエストのユーザー名（本文のuser → クエリのuser → anonymous）"""
+        return (data or {}).get('user') or self.arg('user') or DEFAULT_USER
+
+    def if_none_match(self, etag: str) -> bool:
+        """If-None-Matchに指定のETagが含まれるか"""
+        header = self.headers.get('if-none-match')
+        if not header:
+            return False
+        for tag in header.split(','):
+            tag = tag.strip()
+            if tag.startswith('W/'):
+                tag = tag[2:]
+            if tag == '*' or tag.strip('"') == etag:
+                return True
+        return False
+
+
+Response = Tuple[int, List[Tuple[bytes, bytes]], bytes]
+
+
+def json_response(payload: Any, pretty: bool = False, status: int = 200) -> Response:
+    return status, list(JSON_HEADERS), dump_json(payload, pretty).encode('utf-8')
+
+
+def error_response(message: str, status: int) -> Response:
+    return json_response({'error': message}, status=status)
+
+
+class TaskAPI:
+    """タスクAPIのASGIアプリケーション"""
+
+    def __init__(self, partitions: Optional[UserPartitions] = None,
+                 executor: Optional[ThreadPoolExecutor] = None,
+                 reminders: Optional[ReminderScheduler] = default_reminders):
+        self.partitions = partitions if partitions is not None else create_partitions()
+        self.executor = executor if executor is not None else ThreadPoolExecutor(thread_name_prefix='shibu-parse')
+        self.reminders = reminders
+        self._reminder_task: Optional[asyncio.Task] = None
+        self.routes = {
+            ('POST', '/api/process'): self.process_input,
+            ('POST', '/api/process/batch'): self.process_batch,
+            ('GET', '/api/tasks'): self.get_tasks,
+            ('GET', '/api/tasks/upcoming'): self.get_upcoming_tasks,
+            ('GET', '/api/tasks/overdue'): self.get_overdue_tasks,
+            ('POST', '/api/reset'): self.reset_tasks,
+            ('GET', '/api/metrics'): self.get_metrics,
+        }
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+
+        started = perf_counter() if metrics.enabled else None
+        request = Request(scope, body)
+        handler = self.routes.get((request.method, request.path))
+        if handler is None:
+            status, headers, content = error_response('Not Found', 404)
+        else:
+            try:
+                status, headers, content = await handler(request)
+            except Exception as e:
+                status, headers, content = error_response(str(e), 500)
+        if started is not None and handler is not None:
+            metrics.observe('shibu_request_seconds', perf_counter() - started,
+                            (('endpoint', handler.__name__),))
+
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': content})
+
+    async def lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                if self.reminders is not None:
+                    await self.run_blocking(lambda: self.reminders.rebuild(reminder_sources()))
+                    self._reminder_task = asyncio.create_task(self.reminders.run())
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self._reminder_task is not None:
+                    self.reminders.stop()
+                    await self._reminder_task
+                    self._reminder_task = None
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def run_blocking(self, func, *args):
+        """解析やロック待ちを含む処理をスレッドプールで実行"""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def read_store(self, agent, func, *args):
+        """ストアの軽い読み出し（リビジョンなど）。SQLiteでは問い合わせになるのでスレッドプールで行う"""
+        if agent.store.persistent:
+            return await self.run_blocking(func, *args)
+        return func(*args)
+
+    async def process_input(self, request: Request) -> Response:
+        """音声入力を処理"""
+        try:
+            data = request.json()
+        except ValueError:
+            return error_response('Input is required', 400)
+        user_input = data.get('input', '')
+        if not user_input:
+            return error_response('Input is required', 400)
+        try:
+            since = parse_revision(data.get('since'))
+        except (TypeError, ValueError):
+            return error_response('since must be a revision returned by the server', 400)
+
+        with self.partitions.session(request.user(data)) as agent:
+            await self.run_blocking(agent.apply_input, user_input)
+            changes = await self.run_blocking(agent.changes_since, since)
+
+        return json_response({
+            'success': True,
+            'tasks': changes['tasks'],
+            'revision': changes['revision'],
+            'full': changes['full'],
+            'processed_input': user_input
+        }, request.pretty)
+
+    async def process_batch(self, request: Request) -> Response:
+        """オフライン中にためた複数の入力を順に処理"""
+        try:
+            data = request.json()
+            inputs = parse_batch_inputs(data)
+            since = parse_revision(data.get('since'))
+        except (TypeError, ValueError) as e:
+            return error_response(str(e), 400)
+
+        with self.partitions.session(request.user(data)) as agent:
+            results = await self.run_blocking(agent.apply_batch, inputs)
+            changes = await self.run_blocking(agent.changes_since, since)
+
+        return json_response({
+            'success': True,
+            'results': results,
+            'tasks': changes['tasks'],
+            'revision': changes['revision'],
+            'full': changes['full']
+        }, request.pretty)
+
+    async def get_tasks(self, request: Request) -> Response:
+        """現在のタスク一覧を取得（ETagの照合以外はスレッドプールで行う）"""
+        try:
+            since = parse_revision(request.arg('since'))
+        except ValueError:
+            return error_response('since must be a revision returned by the server', 400)
+        if wants_page(request.query):
+            return await self.get_task_page(request)
+
+        with self.partitions.session(request.user()) as agent:
+            if since is not None:
+                changes = await self.run_blocking(agent.changes_since, since)
+                status, headers, content = json_response(changes, request.pretty)
+                headers.append((b'x-task-revision', changes['revision'].encode('latin-1')))
+                return status, headers, content
+
+            etag = await self.read_store(agent, agent.tasks_etag, request.pretty)
+            if request.if_none_match(etag):
+                status, headers, content = 304, [], b''
+            else:
+                # 変更後の最初の取得は全件のシリアライズになる
+                revision, body = await self.run_blocking(agent.tasks_json, request.pretty)
+                etag = agent.tasks_etag(request.pretty, revision)
+                status, headers, content = 200, list(JSON_HEADERS), body.encode('utf-8')
+                headers.append((b'x-task-revision', agent.revision_token(revision).encode('latin-1')))
+        headers.append((b'etag', f'"{etag}"'.encode('latin-1')))
+        headers.append((b'cache-control', b'no-cache'))
+        return status, headers, content
+
+    async def get_task_page(self, request: Request) -> Response:
+        """絞り込み・並び順・カーソルを指定した一覧の1ページ"""
+        try:
+            query, limit, after = parse_task_query(request.args)
+        except ValueError as e:
+            return error_response(str(e), 400)
+        with self.partitions.session(request.user()) as agent:
+            variant = page_variant(query, limit, after)
+            etag = await self.read_store(agent, agent.tasks_etag, request.pretty, None, variant)
+            if request.if_none_match(etag):
+                status, headers, content = 304, [], b''
+            else:
+                # SQLiteでは問い合わせになるのでスレッドプールで行う
+                revision, page = await self.run_blocking(agent.task_page, query, limit, after)
+                etag = agent.tasks_etag(request.pretty, revision, variant)
+                token = agent.revision_token(revision)
+                status, headers, content = json_response(page_payload(token, page, query), request.pretty)
+                headers.append((b'x-task-revision', token.encode('latin-1')))
+        headers.append((b'etag', f'"{etag}"'.encode('latin-1')))
+        headers.append((b'cache-control', b'no-cache'))
+        return status, headers, content
+
+    async def get_upcoming_tasks(self, request: Request) -> Response:
+        """期日が近い順の未着手タスク（?limit=件数、?now=基準時刻）"""
+        return await self._due_tasks(request, DEFAULT_UPCOMING_TASKS, 'upcoming_tasks')
+
+    async def get_overdue_tasks(self, request: Request) -> Response:
+        """期日を過ぎた未着手タスク（?limit=件数、?now=基準時刻）"""
+        return await self._due_tasks(request, MAX_DUE_TASKS, 'overdue_tasks')
+
+    async def _due_tasks(self, request: Request, default_limit: int, method: str) -> Response:
+        try:
+            now, limit = parse_due_query(request.args, default_limit)
+        except ValueError as e:
+            return error_response(str(e), 400)
+        with self.partitions.session(request.user()) as agent:
+            # SQLiteでは問い合わせになるのでスレッドプールで行う
+            now_key, tasks = await self.run_blocking(getattr(agent, method), limit, now)
+        return json_response({'now': now_key, 'tasks': tasks}, request.pretty)
+
+    async def reset_tasks(self, request: Request) -> Response:
+        """タスクをリセット（誤って別のユーザーを消さないよう、userの指定を必須にする）"""
+        try:
+            data = request.json() if request.body else {}
+        except ValueError:
+            data = {}
+        user = data.get('user') or request.arg('user')
+        if not user:
+            return error_response('user is required', 400)
+        with self.partitions.session(user) as agent:
+            await self.run_blocking(agent.reset)
+        return json_response({'success': True, 'message': 'Tasks reset successfully'})
+
+    async def get_metrics(self, request: Request) -> Response:
+        """計測値（Prometheusのテキスト形式）"""
+        body = metrics_text(self.partitions)
+        return 200, [(b'content-type', METRICS_CONTENT_TYPE.encode())], body.encode('utf-8')
+
+
+app = TaskAPI()
+
+if __name__ == '__main__':
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit('ASGIサーバーが必要です: pip install uvicorn')
+    uvicorn.run(app, host='0.0.0.0', port=8080)
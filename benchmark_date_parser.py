@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import timeit
+from datetime import datetime
+from advanced_date_parser import AdvancedDateParser
+
+
+def benchmark_date_parser(number: int = 20000):
+    """日付解析の1入力あたりのレイテンシを計測"""
+    parser = AdvancedDateParser(cache_size=0)
+    cached_parser = AdvancedDateParser()
+    base_date = datetime(2025, 6, 18, 10, 30)
+
+    test_cases = [
+        '明日までに',
+        '今日の午後3時までに会議資料を作成する',
+        '3日後までにレポートを完成させる',
+        '来週の月曜の午前中までにプレゼンを準備する',
+        '月末までに予算書を提出する',
+        '6月21日までに企画書を作成する',
+        '金曜の夜までにメールを送る',
+        '2025年12月31日までに',
+        '営業資料をパワーポイントで作成してください',
+        '無効な日付',
+    ]
+
+    print('=== 日付解析マイクロベンチマーク ===')
+    print('  解析のみ  キャッシュ')
+    total = cached_total = 0.0
+    for text in test_cases:
+        elapsed = min(timeit.repeat(lambda: parser.parse(text, base_date), number=number, repeat=3))
+        cached = min(timeit.repeat(lambda: cached_parser.parse(text, base_date), number=number, repeat=3))
+        per_call = elapsed / number * 1e6
+        cached_per_call = cached / number * 1e6
+        total += per_call
+        cached_total += cached_per_call
+        print(f'{per_call:8.2f} μs {cached_per_call:8.2f} μs  {text}')
+
+    print(f'平均: {total / len(test_cases):.2f} μs/parse（キャッシュあり {cached_total / len(test_cases):.2f} μs/parse）')
+
+
+if __name__ == "__main__":
+    benchmark_date_parser()
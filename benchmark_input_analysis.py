@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import ast
+import os
+import timeit
+from datetime import datetime
+from typing import List
+from advanced_date_parser import AdvancedDateParser
+from shibu_task_agent import ShibuTaskAgent
+
+# 日付表現のコーパス（テストケースをそのまま使う）
+CORPUS_FILES = ('test_comprehensive_dates.py', 'test_time_comprehensive.py')
+
+
+def load_corpus() -> List[str]:
+    """テストファイルのtest_casesから日付表現を取り出す"""
+    phrases = []
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for name in CORPUS_FILES:
+        with open(os.path.join(directory, name), encoding='utf-8') as f:
+            tree = ast.parse(f.read())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Assign) and any(
+                    isinstance(target, ast.Name) and target.id == 'test_cases' for target in node.targets):
+                for case in ast.literal_eval(node.value):
+                    phrases.append(case[0] if isinstance(case, tuple) else case)
+    return phrases
+
+
+def legacy_is_task_completion(text: str) -> bool:
+    """変更前の完了判定（呼び出しごとにキーワードのリストを作って照合）"""
+    completion_keywords = [
+        '完了', '終了', '終わった', '済んだ', '済み', 'できた',
+        '終わり', '完成', '提出した', '送った', '提出'
+    ]
+    return any(keyword in text for keyword in completion_keywords)
+
+
+def legacy_is_task_creation(text: str) -> bool:
+    """変更前の作成判定"""
+    creation_keywords = [
+        'タスク', '作業', '仕事', 'やること', 'TODO', 'todo',
+        '作成', '作る', '書く', '準備', '用意', '調査', '確認',
+        'までに', 'まで', '期限', '締切', '資料', '報告書'
+    ]
+    return any(keyword in text for keyword in creation_keywords)
+
+
+def legacy_extract_link_label(text: str) -> str:
+    """変更前のアプリ判定"""
+    link_keywords = {
+        'powerpoint': 'PowerPoint Web', 'パワーポイント': 'PowerPoint Web',
+        'プレゼン': 'PowerPoint Web', 'スライド': 'PowerPoint Web',
+        'word': 'Word Web', 'ワード': 'Word Web', '文書': 'Word Web',
+        'excel': 'Excel Web', 'エクセル': 'Excel Web', '表': 'Excel Web', 'シート': 'Excel Web',
+        'outlook': 'Outlook Web', 'アウトルック': 'Outlook Web', 'メール': 'Outlook Web', '連絡': 'Outlook Web'
+    }
+    text_lower = text.lower()
+    for keyword, label in link_keywords.items():
+        if keyword in text_lower:
+            return label
+    return 'Word Web'
+
+
+def legacy_classify(text: str):
+    """変更前の3つのループで、意図とアプリを求める"""
+    if legacy_is_task_completion(text):
+        action = 'completed'
+    elif legacy_is_task_creation(text):
+        action = 'created'
+    else:
+        action = 'none'
+    return action, legacy_extract_link_label(text)
+
+
+def separate_steps(agent: ShibuTaskAgent, text: str, base_date: datetime):
+    """変更前どおり判定・タイトル・期日・アプリを別々に求める"""
+    if legacy_is_task_completion(text):
+        return 'completed', None
+    if legacy_is_task_creation(text):
+        return 'created', (agent.extract_title(text), agent.parse_date(text, base_date),
+                           legacy_extract_link_label(text))
+    return 'none', None
+
+
+def single_analysis(agent: ShibuTaskAgent, text: str, base_date: datetime):
+    """エージェントが実際に使う解析（作成のときだけ日付・タイトル・アプリをまとめて求める）"""
+    return agent.analyze_input(text, base_date)
+
+
+def analysis_fields(analysis):
+    """analyze_inputの結果をseparate_stepsと同じ形にする（結果の比較用）"""
+    if analysis.action != 'created':
+        return analysis.action, None
+    return analysis.action, (analysis.title, analysis.due, analysis.link_label)
+
+
+def per_utterance(func, utterances: List[str], number: int) -> float:
+    """utterancesをすべて処理したときの1発話あたりの時間（μs）"""
+    elapsed = min(timeit.repeat(lambda: [func(text) for text in utterances], number=number, repeat=3))
+    return elapsed / number / len(utterances) * 1e6
+
+
+def benchmark_classification(utterances: List[str], number: int = 2000):
+    """意図・アプリの判定を、変更前の3つのループと比べる"""
+    agent = ShibuTaskAgent()
+    for text in utterances:
+        assert tuple(agent.classify_input(text)) == legacy_classify(text), text
+    before = per_utterance(legacy_classify, utterances, number)
+    after = per_utterance(agent.classify_input, utterances, number)
+    print(f'意図・アプリの判定: 変更前 {before:5.2f} μs → classify_input {after:5.2f} μs/発話')
+
+
+def benchmark_input_analysis(number: int = 200):
+    """1発話あたりの解析時間を、変更前の別々の処理（3つのループを含む）とanalyze_inputで比べる"""
+    base_date = datetime(2025, 6, 18, 10, 30)
+    utterances = []
+    for phrase in load_corpus():
+        utterances.append(f'{phrase}会議資料をパワーポイントで作成してください')
+        utterances.append(f'{phrase}送る予定だった報告書を提出した')
+
+    print('=== 入力解析ベンチマーク ===')
+    print(f'コーパス: {len(utterances)}発話（{", ".join(CORPUS_FILES)}）')
+    benchmark_classification(utterances + ['こんにちは', 'EXCELで集計する作業', 'OutLookで連絡'])
+    for label, cache_size in (('キャッシュなし', 0), ('キャッシュあり', 1024)):
+        agent = ShibuTaskAgent(date_parser=AdvancedDateParser(cache_size=cache_size))
+        for text in utterances:
+            assert separate_steps(agent, text, base_date) == analysis_fields(
+                single_analysis(agent, text, base_date)), text
+
+        separate, single = (per_utterance(lambda text: step(agent, text, base_date), utterances, number)
+                            for step in (separate_steps, single_analysis))
+        print(f'{label}: 変更前の別々の処理 {separate:6.2f} μs → analyze_input {single:6.2f} μs/発話'
+              f'（{(1 - single / separate) * 100:.0f}%削減）')
+
+
+if __name__ == "__main__":
+    benchmark_input_analysis()
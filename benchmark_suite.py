@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+解析・エージェントの主要経路のベンチマーク
+乱数の種を固定した合成コーパスで、日付解析（段階別）・process_input（タスク10 / 1千 / 10万件）・
+完了対象の検索・Flaskの /api/process を計測します。
+結果はJSONのベースラインに保存でき、比較モードでは遅くなったベンチマークを報告します。
+
+    python benchmark_suite.py                                   # 計測して表示
+    python benchmark_suite.py --save benchmark_baseline.json    # ベースラインとして保存
+    python benchmark_suite.py --compare benchmark_baseline.json # ベースラインと比較（悪化があれば終了コード1）
+    python benchmark_suite.py --quick -k parser                 # 件数を減らし、名前に"parser"を含むものだけ
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+# 合成コーパスの乱数の種（同じ種なら毎回同じ入力になる）
+CORPUS_SEED = 20250618
+
+# 基準日時（日付解析の結果を実行日によらず一定にする）
+BASE_DATE = datetime(2025, 6, 18, 10, 30)
+
+# 1回の計測の最短時間（これに満たなければ繰り返し回数を増やす）
+MIN_RUN_TIME = 0.05
+
+# 計測の回数
+DEFAULT_RUNS = 5
+
+# 最小値がベースラインよりこの割合（とばらつき）以上遅ければ悪化とみなす
+DEFAULT_THRESHOLD = 0.10
+
+# 解析の段階ごとの日付表現（advanced_date_parser.PARSE_STAGESの順）
+STAGE_PHRASES = {
+    'complex': ['来週の月曜の午前中', '今度の土曜の夜', '次の金曜の夕方', '来週の水曜の午後'],
+    'numeric': ['3日後', '10日後', '2週間後', '2ヶ月後', '1年後', '3日後の18時'],
+    'period': ['今週末', '来週末', '月末', '来月末', '年末', '今月25日', '来月15日'],
+    'basic': ['今日', '明日', 'あした', '明後日', 'あさって', '来週', '再来週', '来月'],
+    'weekday': ['月曜', '火曜日', '金曜の夜', '来週の水曜', '明後日の日曜'],
+    'absolute': ['6月21日', '2025年12月31日', '12/3', '2025-07-01'],
+    'none': ['', 'いつか', '早めに'],
+}
+TIME_PHRASES = ['', '', 'の午後3時', 'の朝9時', 'の18時', 'の夕方']
+SUBJECTS = ['営業資料', '会議の議事録', '予算書', '企画書', '顧客データの調査', '週次レポート',
+            '採用計画', '見積書', '契約書のレビュー', '研修資料']
+APPS = ['', 'パワーポイントで', 'エクセルで', 'ワードで', 'メールで']
+ENDINGS = ['作成してください', 'を作成', '準備する', '用意する', '確認する']
+
+
+class BenchmarkResult(NamedTuple):
+    """1つのベンチマークの結果（1操作あたりの秒数）"""
+    name: str
+    median: float
+    minimum: float
+    stdev: float
+    runs: int
+    loops: int
+
+
+def synthetic_phrases(stage: str, count: int, seed: int = CORPUS_SEED) -> List[str]:
+    """段階ごとの日付表現（時刻付きを含む）をcount件作る"""
+    rng = random.Random(f'{seed}:{stage}')
+    phrases = STAGE_PHRASES[stage]
+    return [rng.choice(phrases) + (rng.choice(TIME_PHRASES) if stage != 'none' else '') + 'までに'
+            for _ in range(count)]
+
+
+def synthetic_utterances(count: int, seed: int = CORPUS_SEED) -> List[str]:
+    """タスク作成の発話をcount件作る"""
+    rng = random.Random(seed)
+    utterances = []
+    for _ in range(count):
+        stage = rng.choice(list(STAGE_PHRASES))
+        phrase = rng.choice(STAGE_PHRASES[stage])
+        utterances.append(f'{phrase}までに{rng.choice(SUBJECTS)}{rng.choice(APPS)}{rng.choice(ENDINGS)}')
+    return utterances
+
+
+def synthetic_completions(count: int, seed: int = CORPUS_SEED) -> List[str]:
+    """完了報告の発話をcount件作る"""
+    rng = random.Random(f'{seed}:done')
+    return [f'{rng.choice(SUBJECTS)}{rng.randrange(1000)}が{rng.choice(["完了しました", "終わった", "提出した"])}'
+            for _ in range(count)]
+
+
+def measure(name: str, func: Callable[..., Any], setup: Optional[Callable[[], Any]] = None,
+            inner: int = 1, runs: int = DEFAULT_RUNS) -> BenchmarkResult:
+    """funcの1操作あたりの時間を計測する
+
+    setupがあれば計測の外で毎回呼び、その戻り値をfuncに渡して1回だけ実行する（状態を持つ処理用）。
+    なければ1回の計測がMIN_RUN_TIMEを超えるまで繰り返し回数を増やす。innerはfunc 1回に含まれる操作数。
+    """
+    timer = time.perf_counter
+    if setup is None:
+        loops = 1
+        while True:
+            started = timer()
+            for _ in range(loops):
+                func()
+            if timer() - started >= MIN_RUN_TIME:
+                break
+            loops *= 2
+    else:
+        loops = 1
+
+    samples = []
+    for _ in range(runs):
+        if setup is None:
+            started = timer()
+            for _ in range(loops):
+                func()
+        else:
+            state = setup()
+            started = timer()
+            func(state)
+        samples.append((timer() - started) / (loops * inner))
+    return BenchmarkResult(name, statistics.median(samples), min(samples),
+                           statistics.stdev(samples) if len(samples) > 1 else 0.0, runs, loops)
+
+
+def prefilled_agent(task_count: int):
+    """task_count件のタスク（約半数が完了）を持つエージェントを作る"""
+    from shibu_task_agent import ShibuTaskAgent
+    from task_store import TaskStore
+
+    rng = random.Random(f'{CORPUS_SEED}:{task_count}')
+    store = TaskStore()
+    with store.batch():
+        for i in range(task_count):
+            task = store.add(f'{rng.choice(SUBJECTS)}{i % 1000}の作成', '2025-06-25T12:00', 'Word Web')
+            if rng.random() < 0.5:
+                store.complete(task['id'])
+    return ShibuTaskAgent(store)
+
+
+def benchmarks(quick: bool = False) -> Iterator[Tuple[str, Callable[[int], BenchmarkResult]]]:
+    """(名前, 計測関数) を返す。準備の重いものも、選ばれたときだけ準備する"""
+    from advanced_date_parser import AdvancedDateParser
+
+    corpus_size = 50 if quick else 200
+    task_counts = (10, 1000, 10000) if quick else (10, 1000, 100000)
+
+    for stage in STAGE_PHRASES:
+        def run_parser(runs: int, stage: str = stage) -> BenchmarkResult:
+            parser = AdvancedDateParser(cache_size=0)
+            texts = synthetic_phrases(stage, corpus_size)
+            return measure(f'parser.parse[{stage}]',
+                           lambda: [parser.parse(text, BASE_DATE) for text in texts],
+                           inner=len(texts), runs=runs)
+        yield f'parser.parse[{stage}]', run_parser
+
+    def run_cached_parser(runs: int) -> BenchmarkResult:
+        parser = AdvancedDateParser()
+        texts = synthetic_utterances(corpus_size)
+        return measure('parser.parse[cached]', lambda: [parser.parse(text, BASE_DATE) for text in texts],
+                       inner=len(texts), runs=runs)
+    yield 'parser.parse[cached]', run_cached_parser
+
+    for task_count in task_counts:
+        def run_process_input(runs: int, task_count: int = task_count) -> BenchmarkResult:
+            texts = synthetic_utterances(corpus_size)
+
+            def process(agent):
+                for text in texts:
+                    agent.process_input(text, structured=True)
+
+            # タスク数が増えないよう、計測ごとに作り直したエージェントで処理する
+            return measure(f'agent.process_input[{task_count}]', process,
+                           setup=lambda: prefilled_agent(task_count), inner=len(texts), runs=runs)
+        yield f'agent.process_input[{task_count}]', run_process_input
+
+        def run_find_task(runs: int, task_count: int = task_count) -> BenchmarkResult:
+            agent = prefilled_agent(task_count)
+            texts = synthetic_completions(corpus_size)
+            return measure(f'agent.find_task_to_complete[{task_count}]',
+                           lambda: [agent.find_task_to_complete(text) for text in texts],
+                           inner=len(texts), runs=runs)
+        yield f'agent.find_task_to_complete[{task_count}]', run_find_task
+
+    def run_flask_process(runs: int) -> BenchmarkResult:
+        import app as web
+
+        texts = synthetic_utterances(corpus_size)
+        client = web.app.test_client()
+
+        def fresh_partition():
+            # 計測ごとにベンチマーク用ユーザーの区画を作り直す
+            web.partitions.evict('bench')
+
+        def post_all(_):
+            for text in texts:
+                response = client.post('/api/process', json={'input': text, 'user': 'bench'})
+                if response.status_code != 200:
+                    raise RuntimeError(f'HTTP {response.status_code}')
+
+        # アプリの区画はベンチマークの間だけ差し替え、終わったら元に戻す
+        with web.using_partitions():
+            return measure('flask./api/process', post_all, setup=fresh_partition, inner=len(texts), runs=runs)
+    yield 'flask./api/process', run_flask_process
+
+
+def run_suite(selected: Optional[str] = None, quick: bool = False,
+              runs: int = DEFAULT_RUNS) -> List[BenchmarkResult]:
+    """名前にselectedを含むベンチマークを順に実行する"""
+    results = []
+    for name, run in benchmarks(quick):
+        if selected and selected not in name:
+            continue
+        result = run(runs)
+        print(format_result(result), flush=True)
+        results.append(result)
+    return results
+
+
+def format_result(result: BenchmarkResult) -> str:
+    return (f'{result.name:<40} {result.median * 1e6:>10.2f} μs '
+            f'(min {result.minimum * 1e6:.2f} ± {result.stdev * 1e6:.2f}, {result.runs}×{result.loops})')
+
+
+def to_baseline(results: List[BenchmarkResult]) -> Dict[str, Any]:
+    """結果をベースラインのJSONにする（時間はマイクロ秒）"""
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.platform(),
+        'benchmarks': {
+            result.name: {
+                'median_us': round(result.median * 1e6, 3),
+                'min_us': round(result.minimum * 1e6, 3),
+                'stdev_us': round(result.stdev * 1e6, 3),
+                'runs': result.runs,
+                'loops': result.loops,
+            }
+            for result in results
+        },
+    }
+
+
+def compare(baseline: Dict[str, Any], results: List[BenchmarkResult],
+            threshold: float = DEFAULT_THRESHOLD) -> List[Tuple[str, float, float, bool]]:
+    """ベースラインと比べて (名前, 基準のμs, 今回のμs, 悪化したか) を返す（ベースラインにないものは除く）
+
+    比べるのは最小値（他の処理に邪魔されにくい）。遅れがしきい値の割合に加えて
+    標準偏差（ベースラインと今回の大きい方）を超えたときだけ悪化とし、計測のぶれを悪化と数えない。
+    """
+    rows = []
+    for result in results:
+        entry = baseline.get('benchmarks', {}).get(result.name)
+        if entry is None:
+            continue
+        before = entry['min_us']
+        after = result.minimum * 1e6
+        noise = max(entry['stdev_us'], result.stdev * 1e6)
+        rows.append((result.name, before, after, after - before > before * threshold + noise))
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='解析・エージェントのベンチマーク')
+    parser.add_argument('--save', metavar='PATH', help='結果をベースラインとしてJSONに保存する')
+    parser.add_argument('--compare', metavar='PATH', help='ベースラインのJSONと比較する')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'悪化とみなす遅れの割合（標準偏差に上乗せする。既定 {DEFAULT_THRESHOLD}）')
+    parser.add_argument('-k', dest='selected', help='名前にこの文字列を含むベンチマークだけ実行する')
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS, help='計測の回数')
+    parser.add_argument('--quick', action='store_true', help='コーパスとタスク数を減らして短時間で実行する')
+    args = parser.parse_args(argv)
+
+    print(f'=== ベンチマーク（Python {platform.python_version()}） ===')
+    results = run_suite(args.selected, args.quick, args.runs)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(to_baseline(results), f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        print(f'ベースラインを保存しました: {args.save}')
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        rows = compare(baseline, results, args.threshold)
+        print(f'\n=== ベースラインとの比較（{baseline.get("created", "?")}、最小値、しきい値 {args.threshold:.0%}＋標準偏差） ===')
+        for name, before, after, regressed in rows:
+            mark = '❌ 悪化' if regressed else '✅'
+            print(f'{name:<40} {before:>10.2f} → {after:>10.2f} μs ({after / before - 1:+.1%}) {mark}')
+        if any(regressed for *_, regressed in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
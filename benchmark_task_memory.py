@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import gc
+import random
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Any, Callable, List
+from task_store import STATUS_DONE, STATUS_TODO, TASK_FIELDS, Task, TaskStore
+
+SUBJECTS = ('議事録', '予算書', '報告書', '見積書', '企画書', '請求書', '提案書', '営業資料', '仕様書', '日報')
+LINKS = ('Word Web', 'Excel Web', 'PowerPoint Web')
+BASE_DATE = datetime(2025, 6, 18, 9, 0)
+
+
+def synthetic_fields(count: int, seed: int = 0):
+    """(タイトル, 期日, アプリ名) を作る（期日は解析結果と同じく毎回新しい文字列）"""
+    rng = random.Random(seed)
+    for i in range(count):
+        due = (BASE_DATE + timedelta(minutes=30 * rng.randrange(20000))).strftime('%Y-%m-%dT%H:%M')
+        yield f'{rng.choice(SUBJECTS)}{i}の作成', due, rng.choice(LINKS)
+
+
+def bytes_per_task(build: Callable[[int], Any], count: int) -> float:
+    """buildが作ったものが保持しているメモリをタスク1件あたりにする"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build(count)
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del kept
+    return used / count
+
+
+def dict_tasks(count: int) -> List[dict]:
+    """従来の表現（5項目のdict、期日はISO8601の文字列）"""
+    return [dict(zip(TASK_FIELDS, (i, title, due, link, STATUS_TODO if i % 3 else STATUS_DONE)))
+            for i, (title, due, link) in enumerate(synthetic_fields(count), 1)]
+
+
+def slot_tasks(count: int) -> List[Task]:
+    """__slots__のTask（期日はエポック分の整数）"""
+    return [Task(i, title, due, link, STATUS_TODO if i % 3 else STATUS_DONE)
+            for i, (title, due, link) in enumerate(synthetic_fields(count), 1)]
+
+
+def filled_store(count: int) -> TaskStore:
+    """インデックス込みのインメモリストア（3件に1件を完了にする）"""
+    store = TaskStore()
+    for title, due, link in synthetic_fields(count):
+        store.add(title, due, link)
+    for task_id in range(1, count + 1, 3):
+        store.complete(task_id)
+    return store
+
+
+def benchmark_task_memory(count: int) -> None:
+    print('=== タスクのメモリ使用量 ===')
+    print(f'{count}件（タイトル・期日の文字列を含む）')
+    before = bytes_per_task(dict_tasks, count)
+    after = bytes_per_task(slot_tasks, count)
+    print(f'タスク単体: dict {before:6.0f} B → Task {after:6.0f} B/件（{(1 - after / before) * 100:.0f}%削減）')
+    print(f'TaskStore（インデックス込み）: {bytes_per_task(filled_store, count):6.0f} B/件')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='タスクの表現ごとのメモリ使用量')
+    parser.add_argument('-n', '--count', type=int, default=200000, help='タスク数')
+    benchmark_task_memory(parser.parse_args().count)
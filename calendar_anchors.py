@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+暦の基準点テーブル
+基準日ごとに一度だけ計算し、その日の日付解析で使い回します。
+"""
+
+import calendar
+from datetime import date, datetime, timedelta
+from typing import Dict, Tuple, Union
+
+# after_days() の結果を保持する日数の上限
+MAX_MEMOIZED_DAYS = 400
+
+
+class CalendarAnchors:
+    """基準日から決まる日付（明日・週末・月末・各曜日など）の一覧"""
+
+    def __init__(self, base_date: Union[date, datetime]):
+        today = base_date.date() if isinstance(base_date, datetime) else base_date
+        self.today = today
+        self.tomorrow = today + timedelta(days=1)
+
+        # 今週末・来週末（土曜日）
+        days_until_saturday = (5 - today.weekday()) % 7
+        self.this_weekend = today + timedelta(days=days_until_saturday)
+        self.next_weekend = self.this_weekend + timedelta(weeks=1)
+
+        # 月末・来月末・年末・来年
+        self.month_end = _month_end(today.year, today.month)
+        if today.month == 12:
+            self.next_month_end = _month_end(today.year + 1, 1)
+        else:
+            self.next_month_end = _month_end(today.year, today.month + 1)
+        self.year_end = today.replace(month=12, day=31)
+        self.next_year = date(today.year + 1, 1, 1)
+
+        # 各曜日（0=月曜）の直近の日付（今日は含まない）と「来週の◯曜」
+        weekday = today.weekday()
+        self.upcoming_weekdays: Tuple[date, ...] = tuple(
+            today + timedelta(days=(target - weekday) % 7 or 7) for target in range(7)
+        )
+        self.next_week_weekdays: Tuple[date, ...] = tuple(
+            today + timedelta(days=target - weekday + 7) for target in range(7)
+        )
+
+        self._days_ahead: Dict[int, date] = {}
+
+    def after_days(self, days: int) -> date:
+        """基準日からdays日後"""
+        result = self._days_ahead.get(days)
+        if result is None:
+            result = self.today + timedelta(days=days)
+            if 0 <= days <= MAX_MEMOIZED_DAYS:
+                self._days_ahead[days] = result
+        return result
+
+    def this_month_day(self, day: int) -> date:
+        """今月の指定日（無効な日付なら月末）"""
+        try:
+            return self.today.replace(day=day)
+        except ValueError:
+            return self.month_end
+
+    def next_month_day(self, day: int) -> date:
+        """来月の指定日（無効な日付なら来月末）"""
+        try:
+            return self.next_month_end.replace(day=day)
+        except ValueError:
+            return self.next_month_end
+
+
+def _month_end(year: int, month: int) -> date:
+    """指定月の末日"""
+    return date(year, month, calendar.monthrange(year, month)[1])
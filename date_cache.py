@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日付解析結果のLRUキャッシュ
+同じ言い回し（「明日までに」「月末までに」など）の再解析を避けます。
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """スレッドセーフなLRUキャッシュ（件数上限・有効期限・日付の切り替わりで破棄）"""
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._current_day: Optional[date] = None
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """キャッシュから取得（見つからなければdefault）"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """キャッシュに登録（上限を超えたら最も古いものから破棄）"""
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def roll_over(self, today: date) -> None:
+        """日付が変わっていたら全エントリを破棄"""
+        if today == self._current_day:
+            return
+        with self._lock:
+            if self._current_day is not None and today > self._current_day:
+                self._entries.clear()
+            if self._current_day is None or today > self._current_day:
+                self._current_day = today
+
+    def clear(self) -> None:
+        """全エントリと統計をリセット"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """ヒット率などの統計情報"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
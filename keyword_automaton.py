@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+キーワードの一括照合
+多数のキーワードを1つのトライ木状の正規表現にまとめ、テキストを一度だけ走査して
+出現したすべてのキーワードとその最初の位置を求めます（Aho–Corasick法と同じ役割）。
+"""
+
+import re
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, Tuple
+
+
+def trie_regex(words: Iterable[str]) -> str:
+    """キーワード群から最長一致優先のトライ木正規表現を生成"""
+    trie: Dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict[str, Any]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return '(?:' + body + ')?' if '' in node else body
+
+    return build(trie)
+
+
+class KeywordAutomaton:
+    """キーワードをまとめて照合する走査器（`keyword in text` と同じ結果）
+
+    先読みで全位置を一度に走査し、同じ位置から始まる短いキーワード（接頭辞）は後から補完する。
+    """
+
+    def __init__(self, keywords: Iterable[str] = ()):
+        self.keywords = frozenset(keywords)
+        ordered = sorted(self.keywords, key=len, reverse=True)
+        self._prefixes = {
+            keyword: tuple(prefix for prefix in ordered if keyword.startswith(prefix))
+            for keyword in ordered
+        }
+        self._scanner = re.compile(self._build_pattern(self.keywords))
+
+    @staticmethod
+    def _build_pattern(keywords: FrozenSet[str]) -> str:
+        if not keywords:
+            return '(?!)'
+        first_chars = ''.join(sorted({keyword[0] for keyword in keywords}))
+        return '(?=[' + re.escape(first_chars) + '])(?=(' + trie_regex(keywords) + '))'
+
+    def matches(self, text: str) -> Iterator[Tuple[int, str]]:
+        """各位置で最長一致したキーワードの (位置, 一致した文字列) を順に返す"""
+        for match in self._scanner.finditer(text):
+            yield match.start(), match.group(1)
+
+    def find(self, text: str) -> Dict[str, int]:
+        """出現したキーワードとその最初の位置"""
+        found: Dict[str, int] = {}
+        prefixes = self._prefixes
+        for match in self._scanner.finditer(text):
+            start = match.start()
+            for prefix in prefixes[match.group(1)]:
+                found.setdefault(prefix, start)
+        return found
+
+    def collect(self, matches: Iterable[Tuple[int, str]]) -> Dict[str, int]:
+        """matches()の結果から、接頭辞のキーワードも含めた最初の位置を求める（find()と同じ結果）"""
+        found: Dict[str, int] = {}
+        prefixes = self._prefixes
+        for start, surface in matches:
+            for prefix in prefixes[surface]:
+                found.setdefault(prefix, start)
+        return found
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+タスクAPIの負荷試験
+Flask版（app.py）とASGI版（asgi_app.py）に同じリクエストを送り、
+1秒あたりのリクエスト数とレイテンシ（p50 / p99）を比較します。
+
+    python load_test.py                         # 両方を起動して比較（ASGI版はuvicornが必要）
+    python load_test.py --url http://host:8080  # 起動済みのサーバーを測る
+"""
+
+import argparse
+import http.client
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+INPUTS = [
+    '明日までに会議の議事録を作成',
+    '6月17日までに営業資料をパワーポイントで作成してください',
+    '顧客データの調査をエクセルで来週金曜日まで',
+    '議事録が終わった',
+    '月末までに予算書を用意する',
+]
+
+
+def run_load(url: str, requests: int, concurrency: int, users: int) -> Dict[str, float]:
+    """requests件のリクエスト（作成・完了と一覧取得を交互）をconcurrency並列で送る"""
+    parts = urlsplit(url)
+    per_worker = requests // concurrency
+
+    def worker(n: int) -> List[float]:
+        conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+        user = f'load{n % users}'
+        latencies = []
+        for i in range(per_worker):
+            started = time.perf_counter()
+            if i % 2 == 0:
+                body = json.dumps({'input': INPUTS[i // 2 % len(INPUTS)], 'user': user})
+                conn.request('POST', '/api/process', body, {'Content-Type': 'application/json'})
+            else:
+                conn.request('GET', f'/api/tasks?user={user}')
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                raise RuntimeError(f'HTTP {response.status}')
+            latencies.append(time.perf_counter() - started)
+        conn.close()
+        return latencies
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        latencies = [latency for result in pool.map(worker, range(concurrency)) for latency in result]
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'rps': len(latencies) / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p99_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+    }
+
+
+def start_flask() -> str:
+    """Flask版をスレッド方式の開発サーバー（app.runと同じ）で起動"""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    from app import app
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{server.server_port}'
+
+
+def start_asgi() -> Optional[str]:
+    """ASGI版をuvicornで起動（入っていなければNone）"""
+    try:
+        import uvicorn
+    except ImportError:
+        return None
+    import socket
+    from asgi_app import app
+
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=port, log_level='warning'))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f'http://127.0.0.1:{port}'
+
+
+def print_result(name: str, result: Dict[str, float]) -> None:
+    print(f"{name:<8} {result['requests']:>6} 件  {result['rps']:>8.0f} req/s  "
+          f"p50 {result['p50_ms']:>7.2f} ms  p99 {result['p99_ms']:>7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='タスクAPIの負荷試験')
+    parser.add_argument('--url', help='起動済みのサーバーのURL（指定しなければFlask版とASGI版を起動して比較）')
+    parser.add_argument('-n', '--requests', type=int, default=2000)
+    parser.add_argument('-c', '--concurrency', type=int, default=32)
+    parser.add_argument('--users', type=int, default=8)
+    args = parser.parse_args()
+
+    if args.url:
+        targets = {'server': args.url}
+    else:
+        targets = {'flask': start_flask()}
+        asgi_url = start_asgi()
+        if asgi_url is None:
+            print('uvicornが入っていないためASGI版は測りません（pip install uvicorn）')
+        else:
+            targets['asgi'] = asgi_url
+
+    print(f'=== 負荷試験: {args.requests} リクエスト / 並列 {args.concurrency} ===')
+    for name, url in targets.items():
+        run_load(url, min(args.requests, args.concurrency * 10), args.concurrency, args.users)  # ウォームアップ
+        print_result(name, run_load(url, args.requests, args.concurrency, args.users))
+
+
+if __name__ == "__main__":
+    main()
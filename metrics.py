@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+計測（処理ごとの時間・回数）とプロファイル
+既定では無効で、計測箇所は `if metrics.enabled:` の分岐だけを通ります。
+環境変数 SHIBU_METRICS=1 で有効にし、/api/metrics からPrometheusのテキスト形式で取得します。
+"""
+
+import cProfile
+import os
+import threading
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# Prometheusのテキスト形式のContent-Type
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# 計測項目の説明（/api/metricsのHELP行）
+METRIC_HELP = {
+    'shibu_parse_stage_seconds': '日付解析の段階ごとの処理時間',
+    'shibu_parse_stage_matched_total': '日付解析で結果を返した段階（none は該当なし）',
+    'shibu_parse_fallback_total': '期日が読み取れず1週間後を期日にした回数',
+    'shibu_find_task_seconds': '完了対象のタスクの検索時間',
+    'shibu_json_encode_seconds': 'レスポンスのJSONのシリアライズ時間',
+    'shibu_tasks_json_cache_total': 'タスク一覧のJSONキャッシュの利用（hit / miss）',
+    'shibu_request_seconds': 'APIリクエストの処理時間',
+    'shibu_parse_cache_hits_total': '日付解析キャッシュのヒット数',
+    'shibu_parse_cache_misses_total': '日付解析キャッシュのミス数',
+    'shibu_parse_cache_entries': '日付解析キャッシュの件数',
+    'shibu_users': 'メモリ上のユーザー区画の数',
+    'shibu_resident_tasks': 'メモリ上のタスクの件数',
+    'shibu_partition_evictions_total': 'ユーザー区画を追い出した回数',
+    'shibu_reminders_fired_total': '発火したリマインダーの数',
+    'shibu_pending_reminders': 'リマインダーが登録されている未着手タスクの数',
+}
+
+
+class Metrics:
+    """スレッドセーフなカウンターとタイマー（回数と合計時間）"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._timers: Dict[str, Dict[Labels, List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, labels: Labels = (), value: float = 1) -> None:
+        """カウンターを増やす"""
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[labels] = series.get(labels, 0) + value
+
+    def observe(self, name: str, seconds: float, labels: Labels = ()) -> None:
+        """処理時間を1回分記録する"""
+        with self._lock:
+            entry = self._timers.setdefault(name, {}).setdefault(labels, [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+
+    def counter(self, name: str, labels: Labels = ()) -> float:
+        """カウンターの現在値"""
+        with self._lock:
+            return self._counters.get(name, {}).get(labels, 0)
+
+    def timer(self, name: str, labels: Labels = ()) -> Tuple[int, float]:
+        """タイマーの (回数, 合計秒)"""
+        with self._lock:
+            count, total = self._timers.get(name, {}).get(labels, (0, 0.0))
+            return count, total
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._timers.clear()
+
+    def render(self, counters: Iterable[Tuple[str, Labels, float]] = (),
+               gauges: Iterable[Tuple[str, Labels, float]] = ()) -> str:
+        """Prometheusのテキスト形式にする（counters・gaugesはその時点の値を追加で出力）"""
+        with self._lock:
+            counter_series = {name: dict(series) for name, series in self._counters.items()}
+            timer_series = {name: {labels: tuple(entry) for labels, entry in series.items()}
+                            for name, series in self._timers.items()}
+        for name, labels, value in counters:
+            counter_series.setdefault(name, {})[labels] = value
+        gauge_series: Dict[str, Dict[Labels, float]] = {}
+        for name, labels, value in gauges:
+            gauge_series.setdefault(name, {})[labels] = value
+
+        lines = []
+        for name in sorted(counter_series):
+            lines.extend(_header(name, 'counter'))
+            for labels, value in sorted(counter_series[name].items()):
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        for name in sorted(timer_series):
+            lines.extend(_header(name, 'summary'))
+            for labels, (count, total) in sorted(timer_series[name].items()):
+                lines.append(f'{name}_count{_format_labels(labels)} {count}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(total)}')
+        for name in sorted(gauge_series):
+            lines.extend(_header(name, 'gauge'))
+            for labels, value in sorted(gauge_series[name].items()):
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def _header(name: str, kind: str) -> List[str]:
+    lines = []
+    if name in METRIC_HELP:
+        lines.append(f'# HELP {name} {METRIC_HELP[name]}')
+    lines.append(f'# TYPE {name} {kind}')
+    return lines
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + '}'
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def dump_profile(profiler: cProfile.Profile, directory: str, name: Optional[str] = None) -> str:
+    """プロファイルをdirectoryに保存してパスを返す（snakevizやpstatsで読める）"""
+    os.makedirs(directory, exist_ok=True)
+    filename = f"{time.strftime('%Y%m%d-%H%M%S')}-{name or 'request'}-{uuid.uuid4().hex[:8]}.prof"
+    path = os.path.join(directory, filename)
+    profiler.dump_stats(path)
+    return path
+
+
+# プロセス全体の計測（SHIBU_METRICS=1で有効）
+metrics = Metrics(enabled=os.environ.get('SHIBU_METRICS') == '1')
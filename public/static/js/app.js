@@ -314,12 +314,19 @@ class ShibuTaskApp {
         if (!confirm('すべてのタスクをリセットしますか？')) return;
 
         try {
-            const response = await fetch('/api/reset', { method: 'POST' });
+            // サーバーはユーザーごとにタスクを分けているので、リセットするユーザーを送る
+            const username = this.currentUser ? this.currentUser.username : 'anonymous';
+            const response = await fetch('/api/reset', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({ user: username })
+            });
             const data = await response.json();
 
             if (data.success) {
                 // ローカルストレージもクリア
-                const username = this.currentUser ? this.currentUser.username : 'anonymous';
                 this.clearLocalTasks(username);
                 
                 this.showProcessResult('タスクをリセットしました');
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+リマインダーのスケジューラー
+タスクの作成・完了のたびに、期日の一定時間前に呼ぶコールバックを登録・取り消します。
+全ユーザーのタスクを定期的に見回す代わりに、発火時刻のヒープを1つ持ち、
+次の発火時刻まで眠るだけにします（asyncioのイベントループ上で動きます）。
+
+取り消しはヒープから探して消さず、タスクごとの世代番号を外して無効にします（遅延削除）。
+無効な項目が増えすぎたときだけヒープを作り直すので、1件あたりのメモリは一定です。
+複数のプロセスで動かすと同じリマインダーが重複して発火するため、1プロセスでだけ動かしてください。
+WSGIサーバーでは最初のリクエストでensure_startedを呼び、リクエストを受けるプロセスでだけ動かします。
+"""
+
+import asyncio
+import heapq
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+from shibu_task_agent import ACTION_COMPLETED, ACTION_CREATED, ACTION_RESET
+from task_store import BaseTaskStore, STATUS_TODO, due_key
+
+logger = logging.getLogger(__name__)
+
+# 既定の通知タイミング（期日の何分前か）
+DEFAULT_OFFSETS = (timedelta(hours=1),)
+
+# 次の発火が遠くても、この秒数ごとに起きて時計を確かめる（時刻の変更に追従する）
+MAX_SLEEP = 60.0
+
+# 無効な項目がこれより少なければヒープを作り直さない
+COMPACT_MIN_ENTRIES = 1024
+
+
+class Reminder(NamedTuple):
+    """発火したリマインダー"""
+    user: str
+    task_id: int
+    title: str
+    due: str
+    offset: timedelta
+    fire_at: float
+
+
+class ReminderScheduler:
+    """期日前のリマインダーを発火するスケジューラー
+
+    ヒープの項目は (発火時刻, 世代, ユーザー, タスクID, タイトル, 期日, 通知タイミングの番号) のタプルで、
+    ユーザー・タイトル・期日はタスクと同じ文字列を参照する。
+    """
+
+    def __init__(self, callback: Callable[[Reminder], None],
+                 offsets: Sequence[timedelta] = DEFAULT_OFFSETS,
+                 clock: Callable[[], float] = time.time):
+        if not offsets or any(offset < timedelta(0) for offset in offsets):
+            raise ValueError('offsets must be non-negative timedeltas')
+        self.callback = callback
+        # 早く発火するもの（期日から遠いもの）から並べる
+        self.offsets = tuple(sorted(set(offsets), reverse=True))
+        self._offset_seconds = tuple(offset.total_seconds() for offset in self.offsets)
+        self.clock = clock
+        self.fired = 0
+        self._heap: List[tuple] = []
+        # ユーザー → タスクID → 世代（ヒープの項目の世代と一致するものだけが有効）
+        self._pending: Dict[str, Dict[int, int]] = {}
+        self._pending_count = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def _entries(self, user: str, task: Dict, generation: int, now: float) -> List[tuple]:
+        """タスクのまだ来ていない通知タイミングの項目（未着手で期日があるものだけ）"""
+        due = task.get('due')
+        if not due or task.get('status', STATUS_TODO) != STATUS_TODO:
+            return []
+        try:
+            due_at = datetime.fromisoformat(due).timestamp()
+        except (TypeError, ValueError):
+            logger.warning('期日を読めないタスクのリマインダーは登録しません: %s %s %r', user, task['id'], due)
+            return []
+        entries = []
+        for index, seconds in enumerate(self._offset_seconds):
+            fire_at = due_at - seconds
+            if fire_at > now:
+                entries.append((fire_at, generation, user, task['id'], task['title'], due, index))
+        return entries
+
+    def _track(self, user: str, task_id: int, generation: Optional[int]) -> None:
+        """タスクの有効な世代を差し替える（Noneで取り消し）。ロックを持って呼ぶ"""
+        tasks = self._pending.get(user)
+        if tasks is not None and tasks.pop(task_id, None) is not None:
+            self._pending_count -= 1
+            if not tasks and generation is None:
+                del self._pending[user]
+        if generation is not None:
+            self._pending.setdefault(user, {})[task_id] = generation
+            self._pending_count += 1
+
+    def schedule(self, user: str, task: Dict) -> int:
+        """タスクのリマインダーを登録（登録済みなら置き換える）。登録した件数を返す"""
+        with self._lock:
+            self._generation += 1
+            entries = self._entries(user, task, self._generation, self.clock())
+            self._track(user, task['id'], self._generation if entries else None)
+            earliest = self._heap[0][0] if self._heap else None
+            for entry in entries:
+                heapq.heappush(self._heap, entry)
+            self._maybe_compact()
+        if entries and (earliest is None or entries[0][0] < earliest):
+            self._wake()
+        return len(entries)
+
+    def cancel(self, user: str, task_id: int) -> bool:
+        """タスクのリマインダーを取り消す（登録がなければFalse）"""
+        with self._lock:
+            if task_id not in self._pending.get(user, ()):
+                return False
+            self._track(user, task_id, None)
+            self._maybe_compact()
+            return True
+
+    def cancel_user(self, user: str) -> int:
+        """ユーザーのリマインダーをすべて取り消し、取り消したタスク数を返す"""
+        with self._lock:
+            tasks = self._pending.pop(user, {})
+            self._pending_count -= len(tasks)
+            self._maybe_compact()
+            return len(tasks)
+
+    def task_changed(self, user: str, action: str, task: Optional[Dict]) -> None:
+        """エージェントの変更通知（作成で登録、完了で取り消し、リセットで全件取り消し）"""
+        if action == ACTION_CREATED:
+            self.schedule(user, task)
+        elif action == ACTION_COMPLETED:
+            self.cancel(user, task['id'])
+        elif action == ACTION_RESET:
+            self.cancel_user(user)
+
+    def rebuild(self, sources: Iterable[Tuple[str, BaseTaskStore]]) -> int:
+        """ストアの未着手タスクから登録し直す（起動時用）。登録したタスク数を返す
+
+        sourcesは (ユーザー名, ストア) の組。項目をまとめて作ってからヒープにする（O(n)）。
+        """
+        now = self.clock()
+        now_key = due_key(datetime.fromtimestamp(now))
+        heap = []
+        pending: Dict[str, Dict[int, int]] = {}
+        count = 0
+        generation = self._generation
+        for user, store in sources:
+            for task in store.upcoming(now_key, len(store)):
+                generation += 1
+                entries = self._entries(user, task, generation, now)
+                if entries:
+                    heap.extend(entries)
+                    pending.setdefault(user, {})[task['id']] = generation
+                    count += 1
+        heapq.heapify(heap)
+        with self._lock:
+            self._heap = heap
+            self._pending = pending
+            self._pending_count = count
+            self._generation = generation
+        self._wake()
+        return count
+
+    def _valid(self, entry: tuple) -> bool:
+        """ヒープの項目がまだ有効か（取り消し・置き換えされていないか）"""
+        return self._pending.get(entry[2], {}).get(entry[3]) == entry[1]
+
+    def _maybe_compact(self) -> None:
+        """無効な項目が多くなったらヒープを作り直す。ロックを持って呼ぶ"""
+        live = self._pending_count * len(self.offsets)
+        if len(self._heap) > COMPACT_MIN_ENTRIES and len(self._heap) > 2 * live:
+            self._heap = [entry for entry in self._heap if self._valid(entry)]
+            heapq.heapify(self._heap)
+
+    def due_reminders(self, now: Optional[float] = None) -> List[Reminder]:
+        """発火時刻を過ぎたリマインダーをヒープから取り出す"""
+        if now is None:
+            now = self.clock()
+        reminders = []
+        with self._lock:
+            heap = self._heap
+            while heap and heap[0][0] <= now:
+                entry = heapq.heappop(heap)
+                if not self._valid(entry):
+                    continue
+                fire_at, _, user, task_id, title, due, index = entry
+                if index == len(self.offsets) - 1:
+                    # 最後の通知タイミングを過ぎたら登録を外す
+                    self._track(user, task_id, None)
+                reminders.append(Reminder(user, task_id, title, due, self.offsets[index], fire_at))
+        return reminders
+
+    def run_pending(self, now: Optional[float] = None) -> int:
+        """発火時刻を過ぎたリマインダーのコールバックを呼び、呼んだ件数を返す"""
+        reminders = self.due_reminders(now)
+        for reminder in reminders:
+            try:
+                self.callback(reminder)
+            except Exception:
+                logger.exception('リマインダーのコールバックでエラー: %s', reminder)
+        self.fired += len(reminders)
+        return len(reminders)
+
+    def next_fire_time(self) -> Optional[float]:
+        """次の発火時刻（なければNone）。無効な項目の時刻のこともある"""
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+
+    def pending(self) -> int:
+        """リマインダーが登録されているタスクの数"""
+        return self._pending_count
+
+    def __len__(self) -> int:
+        """ヒープの項目数（無効な項目を含む）"""
+        return len(self._heap)
+
+    async def run(self) -> None:
+        """イベントループ上で、発火時刻ごとにコールバックを呼び続ける（stopで終了）"""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._stopped = False
+        try:
+            while not self._stopped:
+                # 発火の確認より先に消しておき、その間の登録による起床を取りこぼさない
+                self._wakeup.clear()
+                self.run_pending()
+                next_fire = self.next_fire_time()
+                delay = MAX_SLEEP if next_fire is None else min(max(next_fire - self.clock(), 0.0), MAX_SLEEP)
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._loop = None
+            self._wakeup = None
+
+    def start(self) -> threading.Thread:
+        """専用スレッドのイベントループでrunを動かす（Flaskなどイベントループがない場合）"""
+        thread = threading.Thread(target=asyncio.run, args=(self.run(),),
+                                  name='shibu-reminders', daemon=True)
+        thread.start()
+        self._thread = thread
+        return thread
+
+    def ensure_started(self, sources: Callable[[], Iterable[Tuple[str, BaseTaskStore]]]) -> bool:
+        """まだ動いていなければ、sources()のストアから登録し直してstartする（動かし始めたらTrue）
+
+        WSGIアプリの最初のリクエストから呼ぶ。リクエストを受けないプロセス
+        （Werkzeugのリローダーの親プロセスなど）では動かない。
+        """
+        if self._thread is not None:
+            return False
+        with self._start_lock:
+            if self._thread is not None:
+                return False
+            self.rebuild(sources())
+            self.start()
+            return True
+
+    @property
+    def started(self) -> bool:
+        """startで動かし始めたか"""
+        return self._thread is not None
+
+    def stop(self) -> None:
+        """runを終了させる"""
+        self._stopped = True
+        self._wake()
+
+    def _wake(self) -> None:
+        """眠っているrunを起こし、次の発火時刻を計算し直させる（どのスレッドからでもよい）"""
+        loop, wakeup = self._loop, self._wakeup
+        if loop is not None and wakeup is not None:
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:
+                pass  # ループが終了済み
@@ -7,34 +7,237 @@ ShibuTaskAgent - タスク管理エージェント
 
 import json
 import re
+import threading
 from datetime import datetime
-from typing import List, Dict, Any, Optional
-from advanced_date_parser import AdvancedDateParser
+from time import perf_counter
+from typing import Callable, List, Dict, Any, NamedTuple, Optional, Tuple, Union
+from advanced_date_parser import AdvancedDateParser, DateAnalysis
+from metrics import metrics
+from task_store import BaseTaskStore, TaskPage, TaskQuery, TaskStore, STATUS_TODO, due_key, json_default, plain_tasks
+
+# 「次の期日」で既定で返す件数
+DEFAULT_UPCOMING_TASKS = 10
+
+# 一覧のページで既定で返す件数
+DEFAULT_PAGE_SIZE = 100
+
+# 差分がこの件数より多ければ全件を返す
+MAX_DELTA_TASKS = 100
+
+# 入力ごとの処理結果
+ACTION_CREATED = 'created'
+ACTION_COMPLETED = 'completed'
+ACTION_NONE = 'none'
+# 変更通知だけで使う（全タスクの削除）
+ACTION_RESET = 'reset'
+
+# 完了報告のキーワード（作成より先に判定する）
+COMPLETION_KEYWORDS = (
+    '完了', '終了', '終わった', '済んだ', '済み', 'できた',
+    '終わり', '完成', '提出した', '送った', '提出'
+)
+
+# 新規タスクのキーワード
+CREATION_KEYWORDS = (
+    'タスク', '作業', '仕事', 'やること', 'TODO', 'todo',
+    '作成', '作る', '書く', '準備', '用意', '調査', '確認',
+    'までに', 'まで', '期限', '締切', '資料', '報告書'
+)
+
+# アプリのキーワード（小文字で比較、上から順に優先）
+LINK_KEYWORDS = {
+    'powerpoint': 'PowerPoint Web',
+    'パワーポイント': 'PowerPoint Web',
+    'プレゼン': 'PowerPoint Web',
+    'スライド': 'PowerPoint Web',
+    'word': 'Word Web',
+    'ワード': 'Word Web',
+    '文書': 'Word Web',
+    'excel': 'Excel Web',
+    'エクセル': 'Excel Web',
+    '表': 'Excel Web',
+    'シート': 'Excel Web',
+    'outlook': 'Outlook Web',
+    'アウトルック': 'Outlook Web',
+    'メール': 'Outlook Web',
+    '連絡': 'Outlook Web'
+}
+
+# どのキーワードもなければWord Web
+DEFAULT_LINK_LABEL = 'Word Web'
+
+# タイトルから取り除く語尾（上から順に適用）
+TITLE_ENDING_PATTERNS = (
+    re.compile(r'(してください|します|する|です|である)$'),
+    re.compile(r'(まで|までに)$'),
+)
+WHITESPACE_PATTERN = re.compile(r'\s+')
+MONTH_DAY_PATTERN = re.compile(r'\d+月\d+日')
+
+
+class InputIntent(NamedTuple):
+    """入力1件の判定結果"""
+    action: str      # ACTION_CREATED / ACTION_COMPLETED / ACTION_NONE
+    link_label: str  # リンクするアプリ
+
+
+class InputAnalysis(NamedTuple):
+    """入力1件をまとめて解析した結果（ストアへの反映はこれを使い、テキストを解析し直さない）"""
+    action: str                   # ACTION_CREATED / ACTION_COMPLETED / ACTION_NONE
+    date: Optional[DateAnalysis]  # 日付キーワード・日付表記の位置・期日（作成のときだけ）
+    title: Optional[str]          # タスクのタイトル（作成のときだけ）
+    due: Optional[str]            # 期日（読み取れなければ1週間後。作成のときだけ）
+    link_label: Optional[str]     # リンクするアプリ（作成のときだけ）
+
+
+# 完了・該当なしの解析結果（入力によらないので使い回す）
+COMPLETED_ANALYSIS = InputAnalysis(ACTION_COMPLETED, None, None, None, None)
+NO_ACTION_ANALYSIS = InputAnalysis(ACTION_NONE, None, None, None, None)
+
+
+def dump_json(payload: Any, pretty: bool = False) -> str:
+    """APIレスポンス用のJSON文字列（既定は空白なし、prettyなら字下げ付き）"""
+    if not metrics.enabled:
+        return _encode_json(payload, pretty)
+    started = perf_counter()
+    body = _encode_json(payload, pretty)
+    metrics.observe('shibu_json_encode_seconds', perf_counter() - started)
+    return body
+
+
+def revision_token(store_id: str, revision: int) -> str:
+    """クライアントに渡すリビジョン（どのストアのリビジョンかを含む "<store_id>-<revision>"）"""
+    return f'{store_id}-{revision}'
+
+
+def parse_revision_token(token: str) -> Tuple[str, int]:
+    """revision_tokenを (store_id, リビジョン) に戻す（不正ならValueError）"""
+    store_id, _, revision = token.rpartition('-')
+    if not store_id or not revision.isdigit():
+        raise ValueError(f'invalid revision: {token}')
+    return store_id, int(revision)
+
+
+def _encode_json(payload: Any, pretty: bool) -> str:
+    payload = plain_tasks(payload)
+    if pretty:
+        return json.dumps(payload, ensure_ascii=False, indent=2, default=json_default)
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':'), default=json_default)
 
 
 class ShibuTaskAgent:
-    def __init__(self):
-        self.tasks: List[Dict[str, Any]] = []
-        self.next_id = 1
-        self.date_parser = AdvancedDateParser()
+    def __init__(self, store: Optional[BaseTaskStore] = None,
+                 date_parser: Optional[AdvancedDateParser] = None,
+                 on_change: Optional[Callable[[str, Optional[Dict[str, Any]]], None]] = None):
+        # 保存先（省略時はインメモリ）
+        self.store = store if store is not None else TaskStore()
+        # 日付パーサーはユーザー間で共有できる（解析キャッシュも共有される）
+        self.date_parser = date_parser if date_parser is not None else AdvancedDateParser()
+        # 書き込み（採番・完了・リセット）はこのロックで1つずつ行う。読み出しはロックしない
+        self.write_lock = threading.RLock()
+        # 作成・完了・リセットのたびに (action, タスク) で呼ぶ（write_lockを持ったまま呼ばれる）
+        self.on_change = on_change
+        # 整形の有無 → (リビジョン, 全タスクのJSON)
+        self._tasks_json: Dict[bool, Tuple[int, str]] = {}
+    
+    @property
+    def tasks(self) -> List[Dict[str, Any]]:
+        """全タスク（作成順）"""
+        return self.store.all()
     
     def get_next_id(self) -> int:
         """次のタスクIDを取得"""
-        if not self.tasks:
-            return 1
-        return max(task['id'] for task in self.tasks) + 1
+        return self.store.next_id
+    
+    def reset(self) -> None:
+        """全タスクを削除"""
+        with self.write_lock:
+            self.store.clear()
+            self._notify(ACTION_RESET, None)
+    
+    def upcoming_tasks(self, limit: int = DEFAULT_UPCOMING_TASKS,
+                       now: Optional[datetime] = None) -> Tuple[str, List[Dict[str, Any]]]:
+        """期日が近い順の未着手タスク（期限切れを除く）と基準時刻を返す"""
+        now_key = due_key(now if now is not None else datetime.now())
+        return now_key, self.store.upcoming(now_key, limit)
+    
+    def overdue_tasks(self, limit: Optional[int] = None,
+                      now: Optional[datetime] = None) -> Tuple[str, List[Dict[str, Any]]]:
+        """期日を過ぎた未着手タスク（期日の古い順）と基準時刻を返す"""
+        now_key = due_key(now if now is not None else datetime.now())
+        return now_key, self.store.overdue(now_key, limit)
+    
+    def tasks_etag(self, pretty: bool = False, revision: Optional[int] = None, variant: str = '') -> str:
+        """全タスクのJSONを識別するETag（シリアライズせずにリビジョンから作る）
+
+        variantは同じリビジョンの別の表現（一覧のページなど）を区別する文字列。
+        """
+        etag = self.revision_token(revision) + ('-pretty' if pretty else '')
+        return f'{etag}-{variant}' if variant else etag
+    
+    def revision_token(self, revision: Optional[int] = None) -> str:
+        """現在（またはrevision）のリビジョンをクライアントに渡す形にする（changes_sinceのsince）"""
+        if revision is None:
+            revision = self.store.revision
+        return revision_token(self.store.store_id, revision)
+    
+    def tasks_json(self, pretty: bool = False) -> Tuple[int, str]:
+        """全タスクのJSONとそのリビジョン（リビジョンが変わるまで前回の文字列を使い回す）"""
+        revision = self.store.revision
+        cached = self._tasks_json.get(pretty)
+        if cached is not None and cached[0] == revision:
+            if metrics.enabled:
+                metrics.inc('shibu_tasks_json_cache_total', (('result', 'hit'),))
+            return cached
+        if metrics.enabled:
+            metrics.inc('shibu_tasks_json_cache_total', (('result', 'miss'),))
+        cached = (revision, dump_json(self.store.all(), pretty))
+        self._tasks_json[pretty] = cached
+        return cached
     
-    def parse_date(self, text: str) -> Optional[str]:
+    def task_page(self, query: TaskQuery, limit: int = DEFAULT_PAGE_SIZE,
+                  after: Optional[tuple] = None) -> Tuple[int, TaskPage]:
+        """条件に合うタスクの1ページとリビジョン（afterは前のページのnext_key）"""
+        revision = self.store.revision
+        return revision, self.store.page(query, limit, after)
+    
+    def changes_since(self, since: Optional[str]) -> Dict[str, Any]:
+        """以前に返したリビジョンsince（revision_token）より後に作成・変更されたタスクを返す
+
+        差分を作れない（別のストアのリビジョン・古すぎる・未来）か多すぎるときは全件を返す。
+        区画が作り直されるとリビジョンは0からになるので、ストアが違えば番号が範囲内でも全件にする。
+        sinceの形式が不正ならValueError。
+        戻り値は {'revision': 現在のリビジョン（revision_token）, 'full': 全件かどうか, 'tasks': タスクのリスト}
+        """
+        store = self.store
+        # 先にリビジョンを読む（その後の変更が差分に混ざっても次回また送られるだけ）
+        revision = store.revision
+        token = revision_token(store.store_id, revision)
+        changed = None
+        if since is not None:
+            store_id, since_revision = parse_revision_token(since)
+            if store_id == store.store_id and store.base_revision <= since_revision <= revision:
+                changed = store.changed_since(since_revision, limit=MAX_DELTA_TASKS)
+        if changed is None:
+            return {'revision': token, 'full': True, 'tasks': store.all()}
+        return {'revision': token, 'full': False, 'tasks': changed}
+    
+    def parse_date(self, text: str, base_date: Optional[datetime] = None) -> Optional[str]:
         """テキストから日付を解析してISO8601形式で返す（高度パーサー使用）"""
-        from datetime import timedelta
-        
         # 高度パーサーを使用
-        result = self.date_parser.parse(text)
+        result = self.date_parser.parse(text, base_date)
         if result:
             return result
+        return self.default_due(base_date)
+    
+    @staticmethod
+    def default_due(base_date: Optional[datetime] = None) -> str:
+        """フォールバックの期日：デフォルトは今日から1週間後"""
+        from datetime import timedelta
         
-        # フォールバック：デフォルトは今日から1週間後
-        today = datetime.now()
+        if metrics.enabled:
+            metrics.inc('shibu_parse_fallback_total')
+        today = base_date if base_date is not None else datetime.now()
         today = today.replace(hour=12, minute=0, second=0, microsecond=0)
         default_date = today + timedelta(days=7)
         return default_date.strftime("%Y-%m-%dT12:00")
@@ -150,125 +353,173 @@ class ShibuTaskAgent:
         
         return None
     
-    def extract_link_label(self, text: str) -> str:
-        """テキストからリンクラベルを抽出"""
-        link_keywords = {
-            'powerpoint': 'PowerPoint Web',
-            'パワーポイント': 'PowerPoint Web',
-            'プレゼン': 'PowerPoint Web',
-            'スライド': 'PowerPoint Web',
-            'word': 'Word Web',
-            'ワード': 'Word Web',
-            '文書': 'Word Web',
-            'excel': 'Excel Web',
-            'エクセル': 'Excel Web',
-            '表': 'Excel Web',
-            'シート': 'Excel Web',
-            'outlook': 'Outlook Web',
-            'アウトルック': 'Outlook Web',
-            'メール': 'Outlook Web',
-            '連絡': 'Outlook Web'
-        }
+    def analyze_input(self, text: str, base_date: Optional[datetime] = None) -> InputAnalysis:
+        """入力を分類し、作成なら日付・タイトル・アプリをまとめて求める（ストアには触れない）
+
+        完了・該当なしでは分類だけで返す。作成では小文字化と日付の解析を一度だけ行い、
+        タイトル・期日・アプリはその結果から求める。
+        """
+        if self.is_task_completion(text):
+            return COMPLETED_ANALYSIS
+        if not self.is_task_creation(text):
+            return NO_ACTION_ANALYSIS
         
         text_lower = text.lower()
-        for keyword, label in link_keywords.items():
+        date = self.date_parser.analyze(text, base_date, text_lower)
+        return InputAnalysis(ACTION_CREATED, date,
+                             self.extract_title(text, date.date_spans),
+                             date.due or self.default_due(base_date),
+                             self.extract_link_label(text, text_lower))
+    
+    def classify_input(self, text: str, text_lower: Optional[str] = None) -> InputIntent:
+        """意図（完了を作成より優先）とアプリをまとめて判定
+
+        キーワードごとの部分文字列の照合（C実装の`in`）が最も速いので、照合はそのまま使う。
+        text_lowerには小文字化したテキストを渡せる（既にあれば小文字化し直さない）。
+        """
+        if self.is_task_completion(text):
+            action = ACTION_COMPLETED
+        elif self.is_task_creation(text):
+            action = ACTION_CREATED
+        else:
+            action = ACTION_NONE
+        return InputIntent(action, self.extract_link_label(text, text_lower))
+    
+    def extract_link_label(self, text: str, text_lower: Optional[str] = None) -> str:
+        """テキストからリンクラベルを抽出（LINK_KEYWORDSの順で最初に見つかったもの）"""
+        if text_lower is None:
+            text_lower = text.lower()
+        for keyword, label in LINK_KEYWORDS.items():
             if keyword in text_lower:
                 return label
         
         # デフォルトはWord Web
-        return 'Word Web'
+        return DEFAULT_LINK_LABEL
     
     def is_task_creation(self, text: str) -> bool:
         """新規タスク作成かどうかを判定"""
-        creation_keywords = [
-            'タスク', '作業', '仕事', 'やること', 'TODO', 'todo',
-            '作成', '作る', '書く', '準備', '用意', '調査', '確認',
-            'までに', 'まで', '期限', '締切', '資料', '報告書'
-        ]
-        
-        return any(keyword in text for keyword in creation_keywords)
+        return any(keyword in text for keyword in CREATION_KEYWORDS)
     
     def is_task_completion(self, text: str) -> bool:
         """タスク完了かどうかを判定"""
-        completion_keywords = [
-            '完了', '終了', '終わった', '済んだ', '済み', 'できた',
-            '終わり', '完成', '提出した', '送った', '提出'
-        ]
-        
-        return any(keyword in text for keyword in completion_keywords)
+        return any(keyword in text for keyword in COMPLETION_KEYWORDS)
     
     def find_task_to_complete(self, text: str) -> Optional[Dict[str, Any]]:
         """完了対象のタスクを検索"""
-        # 未完了のタスクから部分一致で検索
-        incomplete_tasks = [task for task in self.tasks if task['status'] == '未着手']
-        
-        # キーワードベースでマッチング
-        text_lower = text.lower()
-        for task in incomplete_tasks:
-            title_lower = task['title'].lower()
-            # タイトルの主要単語がテキストに含まれているかチェック
-            title_words = [w for w in title_lower.split() if len(w) > 2]
-            if title_words and any(word in text_lower for word in title_words):
-                return task
-            
-            # より柔軟な一致（営業→営業資料など）
-            key_terms = ['営業', '資料', '調査', '報告', '会議', 'データ', '分析', '提案']
-            for term in key_terms:
-                if term in title_lower and term in text_lower:
-                    return task
+        if not metrics.enabled:
+            return self._find_task_to_complete(text)
+        started = perf_counter()
+        task = self._find_task_to_complete(text)
+        metrics.observe('shibu_find_task_seconds', perf_counter() - started)
+        return task
+    
+    def _find_task_to_complete(self, text: str) -> Optional[Dict[str, Any]]:
+        # 未完了タスクのタイトル索引から最もよく一致するものを探す
+        task = self.store.match_incomplete(text)
+        if task is not None:
+            return task
         
         # 見つからない場合は最新の未完了タスクを返す
-        if incomplete_tasks:
-            return incomplete_tasks[-1]
+        return self.store.latest(STATUS_TODO)
+    
+    def process_input(self, user_input: str, structured: bool = False) -> Union[str, List[Dict[str, Any]]]:
+        """ユーザー入力を処理して全タスクを返す
+
+        既定ではJSON文字列、structured=Trueならタスクのリストをそのまま返す。
+        """
+        self.apply_input(user_input)
+        if structured:
+            return self.store.all()
         
-        return None
+        # 全タスクをJSON形式で返却
+        return json.dumps(plain_tasks(self.store.all()), ensure_ascii=False, indent=2)
     
-    def process_input(self, user_input: str) -> str:
-        """ユーザー入力を処理してJSON形式で結果を返す"""
-        if self.is_task_completion(user_input):
+    def apply_input(self, user_input: str) -> Optional[Dict[str, Any]]:
+        """ユーザー入力を処理して、作成・完了したタスクを返す（変更なしはNone）"""
+        # 解析はロックの外で行い、採番・完了だけをロックする
+        analysis = self.analyze_input(user_input)
+        if analysis.action == ACTION_NONE:
+            return None
+        with self.write_lock:
+            task = self._commit(user_input, analysis)
+            self._notify(analysis.action, task)
+            return task
+    
+    def apply_batch(self, inputs: List[str], base_date: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """複数の入力を順に処理して、入力ごとの結果を返す
+        
+        基準日時は全件で共通（省略時は現在時刻）。解析を先にまとめて行い、
+        ストアへの反映は1回のロック・トランザクションの中で入力順に行う。
+        """
+        if base_date is None:
+            base_date = datetime.now()
+        analyses = [self.analyze_input(user_input, base_date) for user_input in inputs]
+        
+        outcomes = []
+        with self.write_lock:
+            with self.store.batch():
+                for index, (user_input, analysis) in enumerate(zip(inputs, analyses)):
+                    task = self._commit(user_input, analysis)
+                    outcomes.append({
+                        'index': index,
+                        'input': user_input,
+                        'action': analysis.action if task is not None else ACTION_NONE,
+                        'task': task,
+                    })
+            # 通知はトランザクションが確定してから
+            for outcome in outcomes:
+                self._notify(outcome['action'], outcome['task'])
+        return outcomes
+    
+    def _notify(self, action: str, task: Optional[Dict[str, Any]]) -> None:
+        """変更をon_changeに知らせる（変更がなければ何もしない）"""
+        if self.on_change is not None and (task is not None or action == ACTION_RESET):
+            self.on_change(action, task)
+    
+    def _commit(self, user_input: str, analysis: InputAnalysis) -> Optional[Dict[str, Any]]:
+        """解析結果をストアに反映（write_lockを持って呼ぶ）"""
+        if analysis.action == ACTION_COMPLETED:
             # タスク完了処理
             task_to_complete = self.find_task_to_complete(user_input)
             if task_to_complete:
-                task_to_complete['status'] = '完了'
-        
-        elif self.is_task_creation(user_input):
+                return self.store.complete(task_to_complete['id'])
+            return None
+        if analysis.action == ACTION_CREATED:
             # 新規タスク作成
-            title = self.extract_title(user_input)
-            due_date = self.parse_date(user_input)
-            link_label = self.extract_link_label(user_input)
-            
-            new_task = {
-                'id': self.get_next_id(),
-                'title': title,
-                'due': due_date,
-                'link': link_label,
-                'status': '未着手'
-            }
-            
-            self.tasks.append(new_task)
+            return self.store.add(analysis.title, analysis.due, analysis.link_label)
+        return None
+    
+    def extract_title(self, text: str, date_spans: Optional[Tuple[Tuple[int, int], ...]] = None) -> str:
+        """テキストからタスクタイトルを抽出
         
-        # 全タスクをJSON形式で返却
-        return json.dumps(self.tasks, ensure_ascii=False, indent=2)
-    
-    def extract_title(self, text: str) -> str:
-        """テキストからタスクタイトルを抽出"""
-        # 日付表現を除去
-        cleaned_text = re.sub(r'\d{1,2}月\d{1,2}日', '', text)
-        cleaned_text = re.sub(r'\d{4}年\d{1,2}月\d{1,2}日', '', cleaned_text)
-        cleaned_text = re.sub(r'\d{4}-\d{1,2}-\d{1,2}', '', cleaned_text)
+        date_spansは日付パーサーが求めた日付表記の位置（省略時はここで求める）。
+        """
+        if date_spans is None:
+            date_spans = self.date_parser.date_spans(text)
+        
+        # 日付表現を位置で除去
+        cleaned_text = text
+        if date_spans:
+            pieces = []
+            position = 0
+            for start, end in date_spans:
+                pieces.append(text[position:start])
+                position = end
+            pieces.append(text[position:])
+            cleaned_text = ''.join(pieces)
         
         # 不要な語尾を除去
-        cleaned_text = re.sub(r'(してください|します|する|です|である)$', '', cleaned_text)
-        cleaned_text = re.sub(r'(まで|までに)$', '', cleaned_text)
+        for pattern in TITLE_ENDING_PATTERNS:
+            cleaned_text = pattern.sub('', cleaned_text)
         
         # 余分な空白を削除
-        cleaned_text = re.sub(r'\s+', ' ', cleaned_text.strip())
+        cleaned_text = WHITESPACE_PATTERN.sub(' ', cleaned_text.strip())
         
         # 空の場合や短すぎる場合の処理
         if not cleaned_text or len(cleaned_text) < 3:
             # 元のテキストから主要部分を抽出
             words = text.split()
-            meaningful_words = [w for w in words if len(w) > 1 and not re.match(r'\d+月\d+日', w)]
+            meaningful_words = [w for w in words if len(w) > 1 and not MONTH_DAY_PATTERN.match(w)]
             if meaningful_words:
                 cleaned_text = ' '.join(meaningful_words[:3])
         
@@ -297,5 +548,55 @@ def main():
         print(f"出力:\n{result}")
 
 
+def cli(argv: Optional[List[str]] = None) -> None:
+    """コマンドライン（サブコマンドなしはmain()のテスト処理）
+
+    python shibu_task_agent.py export --db tasks.db --user alice -o alice.ndjson [--resume]
+    python shibu_task_agent.py import --db tasks.db --user bob -i alice.ndjson [--after ID]
+    """
+    import argparse
+    import sys
+    from sqlite_task_store import SQLiteTaskStore
+    from task_ndjson import export_ndjson, import_ndjson, resume_cursor
+    
+    parser = argparse.ArgumentParser(description='ShibuTaskAgent')
+    commands = parser.add_subparsers(dest='command')
+    export_parser = commands.add_parser('export', help='タスクをNDJSONで書き出す')
+    import_parser = commands.add_parser('import', help='NDJSONのタスクを取り込む')
+    for command in (export_parser, import_parser):
+        command.add_argument('--db', required=True, help='SQLiteのファイル')
+        command.add_argument('--user', default='default', help='ユーザー名')
+        command.add_argument('--after', type=int, default=0, help='このIDより後から処理する（再開用カーソル）')
+    export_parser.add_argument('-o', '--output', help='出力ファイル（省略時は標準出力）')
+    export_parser.add_argument('--resume', action='store_true', help='出力ファイルの最後の行の続きから書き出す')
+    import_parser.add_argument('-i', '--input', help='入力ファイル（省略時は標準入力）')
+    args = parser.parse_args(argv)
+    
+    if args.command is None:
+        main()
+        return
+    
+    store = SQLiteTaskStore(args.db, user=args.user)
+    if args.command == 'export':
+        after_id = args.after
+        if args.resume and args.output:
+            after_id = max(after_id, resume_cursor(args.output))
+        out = open(args.output, 'a' if args.resume else 'w', encoding='utf-8') if args.output else sys.stdout
+        try:
+            out.writelines(export_ndjson(store, after_id))
+        finally:
+            if out is not sys.stdout:
+                out.close()
+    else:
+        source = open(args.input, encoding='utf-8') if args.input else sys.stdin
+        try:
+            for cursor in import_ndjson(store, source, args.after):
+                # 中断したら --after にこの値を渡すと続きから取り込める
+                print(f'cursor {cursor}', file=sys.stderr)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+
+
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    cli() 
\ No newline at end of file
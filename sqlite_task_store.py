@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLiteによるタスクストア
+WALモードで複数プロセス（gunicornのワーカーなど）から同じファイルを共有できます。
+変更は対象の行だけを書き込みます。
+"""
+
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+from task_store import BaseTaskStore, STATUS_TODO, TASK_FIELDS, TaskPage, TaskQuery
+from title_index import MAX_POSTINGS, best_match, tokenize
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    user TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    due TEXT,
+    link TEXT NOT NULL,
+    status TEXT NOT NULL,
+    revision INTEGER NOT NULL,
+    PRIMARY KEY (user, id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_tasks_user_status_due ON tasks (user, status, due);
+CREATE INDEX IF NOT EXISTS idx_tasks_user_due ON tasks (user, due);
+CREATE INDEX IF NOT EXISTS idx_tasks_user_revision ON tasks (user, revision);
+CREATE INDEX IF NOT EXISTS idx_tasks_user_status_id ON tasks (user, status, id);
+CREATE INDEX IF NOT EXISTS idx_tasks_user_link_id ON tasks (user, link, id);
+CREATE TABLE IF NOT EXISTS task_revisions (
+    user TEXT PRIMARY KEY,
+    revision INTEGER NOT NULL,
+    base_revision INTEGER NOT NULL,
+    store_id TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS task_tokens (
+    user TEXT NOT NULL,
+    token TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    PRIMARY KEY (user, token, id)
+) WITHOUT ROWID;
+"""
+
+# SQL文は定数にしておき、接続ごとのステートメントキャッシュで使い回す
+_COLUMNS = ', '.join(TASK_FIELDS)
+SQL_NEXT_ID = "SELECT COALESCE(MAX(id), 0) + 1 FROM tasks WHERE user = ?"
+SQL_INSERT = ("INSERT INTO tasks (user, id, title, due, link, status, revision) "
+              "VALUES (?, ?, ?, ?, ?, ?, ?)")
+SQL_GET = f"SELECT {_COLUMNS} FROM tasks WHERE user = ? AND id = ?"
+SQL_SET_STATUS = "UPDATE tasks SET status = ?, revision = ? WHERE user = ? AND id = ?"
+SQL_BY_STATUS = f"SELECT {_COLUMNS} FROM tasks WHERE user = ? AND status = ? ORDER BY id"
+SQL_LATEST = f"SELECT {_COLUMNS} FROM tasks WHERE user = ? AND status = ? ORDER BY id DESC LIMIT 1"
+SQL_COUNT_BY_STATUS = "SELECT COUNT(*) FROM tasks WHERE user = ? AND status = ?"
+SQL_BY_DUE = f"SELECT {_COLUMNS} FROM tasks WHERE user = ? AND due IS NOT NULL ORDER BY due, id"
+SQL_BY_STATUS_DUE = (f"SELECT {_COLUMNS} FROM tasks WHERE user = ? AND status = ? AND due IS NOT NULL "
+                     "ORDER BY due, id")
+SQL_UPCOMING = (f"SELECT {_COLUMNS} FROM tasks WHERE user = ? AND status = ? AND due >= ? "
+                "ORDER BY due, id LIMIT ?")
+SQL_OVERDUE = (f"SELECT {_COLUMNS} FROM tasks WHERE user = ? AND status = ? AND due < ? "
+               "ORDER BY due, id LIMIT ?")
+SQL_ALL = f"SELECT {_COLUMNS} FROM tasks WHERE user = ? ORDER BY id"
+SQL_PAGE = f"SELECT {_COLUMNS} FROM tasks WHERE user = ? AND id > ? ORDER BY id LIMIT ?"
+SQL_COUNT = "SELECT COUNT(*) FROM tasks WHERE user = ?"
+SQL_CLEAR = "DELETE FROM tasks WHERE user = ?"
+SQL_USERS = "SELECT DISTINCT user FROM tasks ORDER BY user"
+SQL_INSERT_TOKEN = "INSERT OR IGNORE INTO task_tokens (user, token, id) VALUES (?, ?, ?)"
+SQL_DELETE_TOKENS = "DELETE FROM task_tokens WHERE user = ? AND id = ?"
+SQL_CLEAR_TOKENS = "DELETE FROM task_tokens WHERE user = ?"
+SQL_TOKEN_POSTINGS = "SELECT id FROM task_tokens WHERE user = ? AND token = ? LIMIT ?"
+SQL_REVISION = "SELECT revision, base_revision FROM task_revisions WHERE user = ?"
+SQL_BUMP_REVISION = ("INSERT INTO task_revisions (user, revision, base_revision) VALUES (?, 1, 0) "
+                     "ON CONFLICT (user) DO UPDATE SET revision = revision + 1")
+SQL_RESET_BASE_REVISION = "UPDATE task_revisions SET base_revision = revision WHERE user = ?"
+SQL_STORE_ID = "SELECT store_id FROM task_revisions WHERE user = ?"
+# 先に決まった名前があればそれを使う（複数のプロセスが同時に決めても1つになる）
+SQL_INIT_STORE_ID = ("INSERT INTO task_revisions (user, revision, base_revision, store_id) VALUES (?, 0, 0, ?) "
+                     "ON CONFLICT (user) DO UPDATE SET store_id = COALESCE(store_id, excluded.store_id)")
+# 一覧のページの並び順と、続きの位置の条件（(期日, ID) の行値で比べて索引を範囲で読む）
+SQL_PAGE_ORDERS = {
+    'id': ("id > ?", "ORDER BY id"),
+    '-id': ("id < ?", "ORDER BY id DESC"),
+    'due': ("(due, id) > (?, ?)", "ORDER BY due, id"),
+    '-due': ("(due, id) < (?, ?)", "ORDER BY due DESC, id DESC"),
+}
+SQL_CHANGED_SINCE = (f"SELECT {_COLUMNS} FROM tasks WHERE user = ? AND revision > ? "
+                     "ORDER BY revision LIMIT ?")
+
+
+class SQLiteDatabase:
+    """SQLiteファイルへの接続（スレッドごとに1本）とスキーマの管理"""
+
+    def __init__(self, path: str, timeout: float = 5.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self.connection()  # スキーマを作成しておく
+
+    def connection(self) -> sqlite3.Connection:
+        """このスレッドの接続を取得"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # トランザクションは自前で管理する（isolation_level=None）
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None,
+                                   cached_statements=64)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._migrate(conn)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection) -> None:
+        """以前のスキーマで作ったファイルに足りない列を追加する"""
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(task_revisions)")}
+        if 'store_id' not in columns:
+            try:
+                conn.execute("ALTER TABLE task_revisions ADD COLUMN store_id TEXT")
+            except sqlite3.OperationalError:
+                # 別のプロセスが先に追加した
+                if 'store_id' not in {row[1] for row in conn.execute("PRAGMA table_info(task_revisions)")}:
+                    raise
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """書き込みトランザクション（開始時に書き込みロックを取る）
+
+        トランザクション中に入れ子で呼ぶと、外側のトランザクションにまとめられる。
+        """
+        conn = self.connection()
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def users(self) -> List[str]:
+        """タスクを持っているユーザー名（名前順）"""
+        return [row[0] for row in self.connection().execute(SQL_USERS)]
+
+    def close(self) -> None:
+        """このスレッドの接続を閉じる"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class SQLiteTaskStore(BaseTaskStore):
+    """ユーザー単位のSQLiteタスクストア"""
+
+    persistent = True
+
+    def __init__(self, database, user: str = 'default'):
+        self.db = database if isinstance(database, SQLiteDatabase) else SQLiteDatabase(database)
+        self.user = user
+        self._store_id: Optional[str] = None
+
+    @property
+    def store_id(self) -> str:
+        """ユーザーとデータベースファイルごとの名前（task_revisionsに保存し、全削除をまたいで変わらない）
+
+        ファイルを作り直したり別のユーザーのリビジョンを送られたりしても、差分と取り違えないようにする。
+        """
+        if self._store_id is None:
+            conn = self.db.connection()
+            row = conn.execute(SQL_STORE_ID, (self.user,)).fetchone()
+            if row is None or row[0] is None:
+                with self.db.transaction() as conn:
+                    conn.execute(SQL_INIT_STORE_ID, (self.user, uuid.uuid4().hex[:12]))
+                    row = conn.execute(SQL_STORE_ID, (self.user,)).fetchone()
+            self._store_id = row[0]
+        return self._store_id
+
+    @property
+    def next_id(self) -> int:
+        return self.db.connection().execute(SQL_NEXT_ID, (self.user,)).fetchone()[0]
+
+    @property
+    def revision(self) -> int:
+        return self._revisions()[0]
+
+    @property
+    def base_revision(self) -> int:
+        return self._revisions()[1]
+
+    def _revisions(self) -> tuple:
+        row = self.db.connection().execute(SQL_REVISION, (self.user,)).fetchone()
+        return row if row else (0, 0)
+
+    def _bump_revision(self, conn) -> int:
+        """トランザクション内でリビジョンを進めて新しい値を返す"""
+        conn.execute(SQL_BUMP_REVISION, (self.user,))
+        return conn.execute(SQL_REVISION, (self.user,)).fetchone()[0]
+
+    def changed_since(self, revision: int, limit: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+        # 上限+1件まで読めば上限を超えたかどうか判定できる
+        rows = self._fetch(SQL_CHANGED_SINCE, (self.user, revision, -1 if limit is None else limit + 1))
+        if limit is not None and len(rows) > limit:
+            return None
+        return rows
+
+    def add(self, title: str, due: Optional[str], link: str,
+            status: str = STATUS_TODO) -> Dict[str, Any]:
+        with self.db.transaction() as conn:
+            task_id = conn.execute(SQL_NEXT_ID, (self.user,)).fetchone()[0]
+            conn.execute(SQL_INSERT, (self.user, task_id, title, due, link, status, self._bump_revision(conn)))
+            if status == STATUS_TODO:
+                conn.executemany(SQL_INSERT_TOKEN, ((self.user, token, task_id) for token in tokenize(title)))
+        return dict(zip(TASK_FIELDS, (task_id, title, due, link, status)))
+
+    def get(self, task_id: int) -> Optional[Dict[str, Any]]:
+        row = self.db.connection().execute(SQL_GET, (self.user, task_id)).fetchone()
+        return dict(zip(TASK_FIELDS, row)) if row else None
+
+    def set_status(self, task_id: int, status: str) -> Dict[str, Any]:
+        with self.db.transaction() as conn:
+            row = conn.execute(SQL_GET, (self.user, task_id)).fetchone()
+            if row is None:
+                raise KeyError(task_id)
+            task = dict(zip(TASK_FIELDS, row))
+            if task['status'] != status:
+                conn.execute(SQL_SET_STATUS, (status, self._bump_revision(conn), self.user, task_id))
+                if status == STATUS_TODO:
+                    conn.executemany(SQL_INSERT_TOKEN,
+                                     ((self.user, token, task_id) for token in tokenize(task['title'])))
+                else:
+                    conn.execute(SQL_DELETE_TOKENS, (self.user, task_id))
+                task['status'] = status
+        return task
+
+    def by_status(self, status: str) -> List[Dict[str, Any]]:
+        return self._fetch(SQL_BY_STATUS, (self.user, status))
+
+    def latest(self, status: str) -> Optional[Dict[str, Any]]:
+        row = self.db.connection().execute(SQL_LATEST, (self.user, status)).fetchone()
+        return dict(zip(TASK_FIELDS, row)) if row else None
+
+    def count_by_status(self, status: str) -> int:
+        return self.db.connection().execute(SQL_COUNT_BY_STATUS, (self.user, status)).fetchone()[0]
+
+    def by_due(self, status: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        if status is None:
+            cursor = self.db.connection().execute(SQL_BY_DUE, (self.user,))
+        else:
+            cursor = self.db.connection().execute(SQL_BY_STATUS_DUE, (self.user, status))
+        for row in cursor:
+            yield dict(zip(TASK_FIELDS, row))
+
+    def upcoming(self, now: str, limit: int, status: str = STATUS_TODO) -> List[Dict[str, Any]]:
+        # (user, status, due) のインデックスを範囲で読む
+        return self._fetch(SQL_UPCOMING, (self.user, status, now, limit))
+
+    def overdue(self, now: str, limit: Optional[int] = None,
+                status: str = STATUS_TODO) -> List[Dict[str, Any]]:
+        return self._fetch(SQL_OVERDUE, (self.user, status, now, -1 if limit is None else limit))
+
+    def page(self, query: TaskQuery, limit: int, after: Optional[tuple] = None) -> TaskPage:
+        # 条件の組み合わせごとにSQL文が決まるので、ステートメントキャッシュが効く
+        conditions = ['user = ?']
+        params: List[Any] = [self.user]
+        for condition, value in (('status = ?', query.status),
+                                 ('link = ?', query.link),
+                                 ('due >= ?', query.due_from),
+                                 ('due < ?', query.due_to),
+                                 ('instr(title, ?) > 0', query.title)):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        if query.by_due:
+            conditions.append('due IS NOT NULL')
+        after_condition, order = SQL_PAGE_ORDERS[query.sort]
+        if after is not None:
+            conditions.append(after_condition)
+            params.extend(after)
+        # 上限+1件まで読めば続きがあるかどうか判定できる
+        params.append(limit + 1)
+        rows = self._fetch(f"SELECT {_COLUMNS} FROM tasks WHERE {' AND '.join(conditions)} {order} LIMIT ?",
+                           tuple(params))
+        if len(rows) > limit:
+            return TaskPage(rows[:limit], query.key(rows[limit - 1]))
+        return TaskPage(rows, None)
+
+    def match_incomplete(self, text: str) -> Optional[Dict[str, Any]]:
+        conn = self.db.connection()
+        postings = {}
+        for token in tokenize(text):
+            # 上限+1件まで読めば「多すぎて使わない」トークンかどうか判定できる
+            rows = conn.execute(SQL_TOKEN_POSTINGS, (self.user, token, MAX_POSTINGS + 1)).fetchall()
+            if rows:
+                postings[token] = [row[0] for row in rows]
+        if not postings:
+            return None
+        task_id = best_match(postings, self.count_by_status(STATUS_TODO))
+        return self.get(task_id) if task_id is not None else None
+
+    def all(self) -> List[Dict[str, Any]]:
+        return self._fetch(SQL_ALL, (self.user,))
+
+    def iter_tasks(self, after_id: int = 0, page_size: int = 500) -> Iterator[Dict[str, Any]]:
+        # 主キーの範囲で少しずつ読む（読み出し中に長いトランザクションを張らない）
+        while True:
+            page = self._fetch(SQL_PAGE, (self.user, after_id, page_size))
+            yield from page
+            if len(page) < page_size:
+                return
+            after_id = page[-1]['id']
+
+    def batch(self):
+        return self.db.transaction()
+
+    def clear(self) -> None:
+        with self.db.transaction() as conn:
+            conn.execute(SQL_CLEAR, (self.user,))
+            conn.execute(SQL_CLEAR_TOKENS, (self.user,))
+            self._bump_revision(conn)
+            conn.execute(SQL_RESET_BASE_REVISION, (self.user,))
+
+    def __len__(self) -> int:
+        return self.db.connection().execute(SQL_COUNT, (self.user,)).fetchone()[0]
+
+    def _fetch(self, sql: str, params: tuple) -> List[Dict[str, Any]]:
+        """クエリ結果をタスクのリストにする"""
+        return [dict(zip(TASK_FIELDS, row)) for row in self.db.connection().execute(sql, params)]
@@ -197,7 +197,14 @@ class ShibuTaskApp {
         if (!confirm('すべてのタスクをリセットしますか？')) return;
 
         try {
-            const response = await fetch('/api/reset', { method: 'POST' });
+            // ユーザーを指定しないリセットはサーバーが受け付けない（この画面はanonymousのタスクを使う）
+            const response = await fetch('/api/reset', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({ user: 'anonymous' })
+            });
             const data = await response.json();
 
             if (data.success) {
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+タスクのNDJSON（1行1タスクのJSON）エクスポート・インポート
+ジェネレーターで1件ずつ処理するので、タスク数が多くてもメモリ使用量は増えません。
+カーソルは最後に処理した元のタスクIDで、途中で止まってもその続きから再開できます。
+"""
+
+import json
+import os
+from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, Tuple
+from task_store import BaseTaskStore, STATUS_DONE, STATUS_TODO, TASK_FIELDS
+
+# インポートで1トランザクションにまとめる件数
+IMPORT_CHUNK_SIZE = 500
+
+
+def dump_task(task: Dict[str, Any]) -> str:
+    """タスクを1行のJSONにする（改行付き）"""
+    return json.dumps({field: task[field] for field in TASK_FIELDS},
+                      ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+def export_ndjson(store: BaseTaskStore, after_id: int = 0) -> Iterator[str]:
+    """IDがafter_idより大きいタスクをID順にNDJSONの行で返す"""
+    for task in store.iter_tasks(after_id):
+        yield dump_task(task)
+
+
+def parse_task_line(line: str, line_no: int) -> Dict[str, Any]:
+    """NDJSONの1行をタスクとして検証して返す（不正ならValueError）"""
+    try:
+        task = json.loads(line)
+    except ValueError as e:
+        raise ValueError(f'{line_no}行目: JSONとして読めません: {e}') from None
+    if not isinstance(task, dict):
+        raise ValueError(f'{line_no}行目: オブジェクトではありません')
+    if not isinstance(task.get('id'), int) or not isinstance(task.get('title'), str):
+        raise ValueError(f'{line_no}行目: idとtitleが必要です')
+    if task.get('status', STATUS_TODO) not in (STATUS_TODO, STATUS_DONE):
+        raise ValueError(f"{line_no}行目: 不明なstatusです: {task['status']}")
+    due = task.get('due')
+    if due is not None:
+        try:
+            datetime.fromisoformat(due)
+        except (TypeError, ValueError):
+            raise ValueError(f'{line_no}行目: dueは日時の文字列かnullにしてください: {due!r}') from None
+    if not isinstance(task.get('link', ''), str):
+        raise ValueError(f"{line_no}行目: linkは文字列にしてください: {task['link']!r}")
+    return task
+
+
+def read_tasks(lines: Iterable[str], after_id: int = 0) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """NDJSONの行から (元のID, タスク) を順に返す（空行と元のIDがafter_id以下の行は飛ばす）"""
+    for line_no, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        task = parse_task_line(line, line_no)
+        if task['id'] > after_id:
+            yield task['id'], task
+
+
+def import_ndjson(store: BaseTaskStore, lines: Iterable[str], after_id: int = 0,
+                  chunk_size: int = IMPORT_CHUNK_SIZE) -> Iterator[int]:
+    """NDJSONの行からタスクを追加し、chunk_size件をコミットするたびにカーソルを返す
+
+    IDは追加先のストアで採番し直す。返すカーソル（元のID）をafter_idに渡すと続きから再開できる。
+    """
+    tasks = read_tasks(lines, after_id)
+    while True:
+        chunk = list(islice(tasks, chunk_size))
+        if not chunk:
+            return
+        with store.batch():
+            for _, task in chunk:
+                store.add(task['title'], task.get('due'), task.get('link', 'Word Web'),
+                          task.get('status', STATUS_TODO))
+        yield chunk[-1][0]
+
+
+def resume_cursor(path: str) -> int:
+    """エクスポート途中のNDJSONファイルから再開用のカーソル（最後の完全な行のID）を返す
+
+    書きかけの最終行（改行で終わらない部分）は取り除く。ファイルは末尾から読むだけで、全体は読み込まない。
+    """
+    if not os.path.exists(path):
+        return 0
+    with open(path, 'rb+') as f:
+        size = f.seek(0, os.SEEK_END)
+        end, line = _last_complete_line(f, size)
+        if end != size:
+            f.truncate(end)
+    return json.loads(line)['id'] if line.strip() else 0
+
+
+def _last_complete_line(f, size: int, block_size: int = 65536) -> Tuple[int, bytes]:
+    """(最後の改行の直後の位置, 最後の完全な行) をファイル末尾から探す"""
+    buffer = b''
+    position = size
+    while position > 0:
+        step = min(block_size, position)
+        position -= step
+        f.seek(position)
+        buffer = f.read(step) + buffer
+        end = buffer.rfind(b'\n')
+        if end < 0:
+            continue
+        start = buffer.rfind(b'\n', 0, end)
+        if start >= 0 or position == 0:
+            return position + end + 1, buffer[start + 1:end]
+    return 0, b''
@@ -0,0 +1,628 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+タスクストア
+IDの採番・状態別の一覧・期日順の一覧をインデックスで管理します。
+保存先はBaseTaskStoreを実装して差し替えられます（インメモリ / SQLite）。
+"""
+
+import heapq
+import math
+import sys
+import uuid
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import Mapping
+from contextlib import nullcontext
+from functools import lru_cache
+from datetime import date, datetime
+from itertools import islice
+from typing import Any, ContextManager, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+from title_index import TitleIndex
+
+# タスクの状態
+STATUS_TODO = '未着手'
+STATUS_DONE = '完了'
+
+# APIで返すタスクの項目（この順で並べる）
+TASK_FIELDS = ('id', 'title', 'due', 'link', 'status')
+
+# 状態の文字列は定数と同じオブジェクトを使う
+_STATUSES = {STATUS_TODO: STATUS_TODO, STATUS_DONE: STATUS_DONE}
+
+# エポック分（1970-01-01T00:00からの分数。期日と同じくタイムゾーンなし）の起点
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+# 一覧の並び順（-付きは降順）。期日順には期日のないタスクを含めない
+SORT_ORDERS = ('id', '-id', 'due', '-due')
+
+# 1ページを作るときに調べる候補の上限（該当が少なくても、ここで打ち切って続きの位置を返す）
+MAX_PAGE_SCAN = 10000
+
+
+def due_key(moment: datetime) -> str:
+    """期日の文字列（ISO8601の分まで）と大小比較できる形にする"""
+    return moment.strftime('%Y-%m-%dT%H:%M')
+
+
+def due_minutes(due: str) -> int:
+    """期日の文字列をエポック分にする（秒以下は切り捨て）"""
+    moment = datetime.fromisoformat(due)
+    return (moment.toordinal() - _EPOCH_ORDINAL) * 1440 + moment.hour * 60 + moment.minute
+
+
+def format_due(minutes: int) -> str:
+    """エポック分を期日の文字列（due_keyの形）にする"""
+    days, minute = divmod(minutes, 1440)
+    return _day_prefix(days) + _CLOCK_TIMES[minute]
+
+
+# 1日の分ごとの 'HH:MM'（JSONにするたびに期日を組み立てるので、日付部分と合わせて使い回す）
+_CLOCK_TIMES = tuple(f'{minute // 60:02d}:{minute % 60:02d}' for minute in range(1440))
+
+
+@lru_cache(maxsize=4096)
+def _day_prefix(days: int) -> str:
+    return date.fromordinal(days + _EPOCH_ORDINAL).isoformat() + 'T'
+
+
+class Task(Mapping):
+    """インメモリのタスク（読み取り専用）
+
+    dictと同じく task['due'] のように読め、dictとも等しく比較できる。
+    期日はエポック分の整数で持ち、読むときに文字列にする（due_keyの形でない期日は文字列のまま持つ）。
+    状態とアプリ名は共有の文字列を参照するので、1件あたりはスロット5つ分で済む。
+    """
+
+    __slots__ = ('id', 'title', '_due', 'link', 'status')
+
+    def __init__(self, id: int, title: str, due: Optional[str], link: str, status: str = STATUS_TODO):
+        self.id = id
+        self.title = title
+        self._due = _compact_due(due)
+        self.link = sys.intern(link)
+        self.status = _STATUSES.get(status) or sys.intern(status)
+
+    @property
+    def due(self) -> Optional[str]:
+        due = self._due
+        return format_due(due) if type(due) is int else due
+
+    @property
+    def due_minutes(self) -> Optional[int]:
+        """期日のエポック分（期日なしはNone）"""
+        due = self._due
+        if due is None or type(due) is int:
+            return due
+        try:
+            return due_minutes(due)
+        except ValueError:
+            return None  # 日時として読めない期日は期日順のインデックスに入れない
+
+    def replace(self, **fields: Any) -> 'Task':
+        """項目を差し替えた新しいタスク"""
+        task = Task.__new__(Task)
+        task.id, task.title, task._due, task.link, task.status = self.id, self.title, self._due, self.link, self.status
+        for name, value in fields.items():
+            if name not in TASK_FIELDS:
+                raise KeyError(name)
+            if name == 'due':
+                task._due = _compact_due(value)
+            elif name == 'status':
+                task.status = _STATUSES.get(value) or sys.intern(value)
+            else:
+                setattr(task, name, value)
+        return task
+
+    def to_dict(self) -> Dict[str, Any]:
+        """APIで返す形（TASK_FIELDSの順のdict）"""
+        due = self._due
+        if type(due) is int:
+            due = format_due(due)
+        return {'id': self.id, 'title': self.title, 'due': due, 'link': self.link, 'status': self.status}
+
+    def __getitem__(self, key: str) -> Any:
+        if key == 'due':
+            return self.due
+        if key in _PLAIN_FIELDS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(TASK_FIELDS)
+
+    def __len__(self) -> int:
+        return len(TASK_FIELDS)
+
+    def __repr__(self) -> str:
+        return f'Task({self.to_dict()!r})'
+
+
+_PLAIN_FIELDS = frozenset(TASK_FIELDS) - {'due'}
+
+
+def _compact_due(due: Optional[str]) -> Union[int, str, None]:
+    """due_keyの形の期日はエポック分に、それ以外はそのまま"""
+    if due is None:
+        return None
+    try:
+        minutes = due_minutes(due)
+    except ValueError:
+        return due
+    return minutes if format_due(minutes) == due else due
+
+
+def plain_tasks(payload: Any) -> Any:
+    """レスポンスに含まれるTaskの一覧をdictの一覧にする（1段下のdictの値まで）
+
+    json.dumpsのdefaultで1件ずつ変換するより速い。それより深いものはjson_defaultで変換する。
+    """
+    if isinstance(payload, list):
+        return [value.to_dict() if type(value) is Task else value for value in payload]
+    if isinstance(payload, dict):
+        return {key: plain_tasks(value) if isinstance(value, list) else value for key, value in payload.items()}
+    return payload
+
+
+def json_default(value: Any) -> Any:
+    """json.dumpsのdefault（Taskをdictにする）"""
+    if type(value) is Task:
+        return value.to_dict()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+class TaskQuery(NamedTuple):
+    """タスク一覧の絞り込みと並び順（期日はdue_keyの形）"""
+    status: Optional[str] = None
+    link: Optional[str] = None
+    # due_from以上、due_to未満
+    due_from: Optional[str] = None
+    due_to: Optional[str] = None
+    # タイトルに含まれる文字列
+    title: Optional[str] = None
+    sort: str = 'id'
+
+    @property
+    def by_due(self) -> bool:
+        return self.sort.lstrip('-') == 'due'
+
+    @property
+    def descending(self) -> bool:
+        return self.sort.startswith('-')
+
+    def key(self, task: Dict[str, Any]) -> tuple:
+        """並び順のキー（ページの続きの位置に使う）"""
+        return (task['due'], task['id']) if self.by_due else (task['id'],)
+
+    def matches(self, task: Dict[str, Any]) -> bool:
+        """タスクが絞り込みの条件を満たすか"""
+        if self.status is not None and task['status'] != self.status:
+            return False
+        if self.link is not None and task['link'] != self.link:
+            return False
+        due = task['due']
+        if due is None:
+            if self.by_due or self.due_from is not None or self.due_to is not None:
+                return False
+        elif (self.due_from is not None and due < self.due_from) or (self.due_to is not None and due >= self.due_to):
+            return False
+        return self.title is None or self.title in task['title']
+
+
+class TaskPage(NamedTuple):
+    """一覧の1ページ"""
+    tasks: List[Dict[str, Any]]
+    # 続きがあれば、最後に調べた位置の並びのキー（次のページのafterに渡す）。なければNone
+    next_key: Optional[tuple]
+
+
+class BaseTaskStore(ABC):
+    """タスクストアの共通インターフェース"""
+
+    # タスクをメモリ外（ファイルなど）に保存するストアはTrue
+    persistent = False
+    # リビジョン番号の系列を区別する名前（ETagとクライアントに渡すリビジョンに使う）
+    store_id = 'store'
+
+    @property
+    @abstractmethod
+    def next_id(self) -> int:
+        """次に採番されるタスクID"""
+
+    @property
+    @abstractmethod
+    def revision(self) -> int:
+        """変更のたびに1ずつ増えるリビジョン番号"""
+
+    @property
+    @abstractmethod
+    def base_revision(self) -> int:
+        """最後に全削除したときのリビジョン（これより前からの差分は作れない）"""
+
+    @abstractmethod
+    def changed_since(self, revision: int, limit: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+        """指定リビジョンより後に作成・変更されたタスク（変更順）
+
+        limitより多く変わっていればNoneを返す（呼び出し側で全件を返す）。
+        """
+
+    @abstractmethod
+    def add(self, title: str, due: Optional[str], link: str,
+            status: str = STATUS_TODO) -> Dict[str, Any]:
+        """タスクを追加してIDを採番"""
+
+    @abstractmethod
+    def get(self, task_id: int) -> Optional[Dict[str, Any]]:
+        """IDでタスクを取得"""
+
+    @abstractmethod
+    def set_status(self, task_id: int, status: str) -> Dict[str, Any]:
+        """タスクの状態を変更"""
+
+    def complete(self, task_id: int) -> Dict[str, Any]:
+        """タスクを完了にする"""
+        return self.set_status(task_id, STATUS_DONE)
+
+    @abstractmethod
+    def by_status(self, status: str) -> List[Dict[str, Any]]:
+        """指定状態のタスク（作成順）"""
+
+    @abstractmethod
+    def latest(self, status: str) -> Optional[Dict[str, Any]]:
+        """指定状態で最後に作成されたタスク"""
+
+    @abstractmethod
+    def count_by_status(self, status: str) -> int:
+        """指定状態のタスク数"""
+
+    @abstractmethod
+    def by_due(self, status: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """期日の早い順にタスクを返す（statusで絞り込み可）"""
+
+    def upcoming(self, now: str, limit: int, status: str = STATUS_TODO) -> List[Dict[str, Any]]:
+        """期日がnow以降のタスクを期日の早い順にlimit件（nowはdue_keyの形）"""
+        return list(islice((task for task in self.by_due(status) if task['due'] >= now), limit))
+
+    def overdue(self, now: str, limit: Optional[int] = None,
+                status: str = STATUS_TODO) -> List[Dict[str, Any]]:
+        """期日がnowより前のタスクを期日の古い順に（limit件まで）"""
+        tasks = []
+        for task in self.by_due(status):
+            if task['due'] >= now or (limit is not None and len(tasks) >= limit):
+                break
+            tasks.append(task)
+        return tasks
+
+    def page(self, query: TaskQuery, limit: int, after: Optional[tuple] = None) -> TaskPage:
+        """条件に合うタスクを並び順にlimit件（afterは前のページのnext_key）"""
+        key = query.key
+        tasks = sorted((task for task in self.all() if query.matches(task)), key=key, reverse=query.descending)
+        if after is not None:
+            tasks = [task for task in tasks if (key(task) < after if query.descending else key(task) > after)]
+        return TaskPage(tasks[:limit], key(tasks[limit - 1]) if len(tasks) > limit else None)
+
+    @abstractmethod
+    def match_incomplete(self, text: str) -> Optional[Dict[str, Any]]:
+        """テキストに最もよく一致する未着手タスク（一致なしはNone）"""
+
+    @abstractmethod
+    def all(self) -> List[Dict[str, Any]]:
+        """全タスク（作成順）"""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """全タスクを削除（IDも1から採番し直す）"""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """タスク数"""
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.all())
+
+    def iter_tasks(self, after_id: int = 0) -> Iterator[Dict[str, Any]]:
+        """IDがafter_idより大きいタスクをID順に1件ずつ返す"""
+        for task in self.all():
+            if task['id'] > after_id:
+                yield task
+
+    def batch(self) -> ContextManager:
+        """複数の書き込みを1つのトランザクションにまとめる（インメモリでは何もしない）"""
+        return nullcontext()
+
+
+class _TaskState:
+    """インメモリストアの中身（タスクとインデックス）
+
+    全削除では新しいものに丸ごと差し替える。読み出しは最初に1回だけ参照を取るので、
+    全削除と並行してもタスクとインデックスが別の世代にならない。
+    """
+
+    __slots__ = ('next_id', 'tasks', 'by_status', 'by_link', 'by_due', 'title_index', 'changes')
+
+    def __init__(self):
+        self.next_id = 1
+        self.tasks: Dict[int, Task] = {}
+        # 状態ごとのタスクIDの昇順リスト
+        self.by_status: Dict[str, List[int]] = {STATUS_TODO: [], STATUS_DONE: []}
+        # アプリ名ごとのタスクIDの昇順リスト（アプリ名は変わらないので追記のみ）
+        self.by_link: Dict[str, List[int]] = {}
+        # 状態ごとの (期日のエポック分, ID) の昇順リスト（期日のないタスクは含めない）
+        self.by_due: Dict[str, List[Tuple[int, int]]] = {STATUS_TODO: [], STATUS_DONE: []}
+        # 未着手タスクのタイトル索引（完了報告の照合用）
+        self.title_index = TitleIndex()
+        # (リビジョン, タスクID) の変更履歴（追記のみ、読み出し中も安全）
+        self.changes: List[Tuple[int, int]] = []
+
+
+class TaskStore(BaseTaskStore):
+    """ID・状態・期日のインデックスを持つインメモリのタスクストア
+
+    書き込みは呼び出し側で1スレッドずつに揃える（ShibuTaskAgentがロックする）。
+    読み出しはロックなしで書き込みと並行してよい：タスク（Task）は書き換えずに差し替え、
+    一覧はスナップショット（tuple/list化はGILの下で一度に行われる）から作る。
+    全削除は中身（_TaskState）の参照を1回で差し替える。
+    """
+
+    def __init__(self):
+        # インメモリのリビジョンはインスタンスごとに0から始まるので、インスタンスごとに別の名前を付ける
+        self.store_id = uuid.uuid4().hex[:12]
+        self._revision = 0
+        self._base_revision = 0
+        self._state = _TaskState()
+
+    @property
+    def next_id(self) -> int:
+        return self._state.next_id
+
+    @property
+    def revision(self) -> int:
+        return self._revision
+
+    @property
+    def base_revision(self) -> int:
+        return self._base_revision
+
+    @property
+    def title_index(self) -> TitleIndex:
+        """未着手タスクのタイトル索引"""
+        return self._state.title_index
+
+    def clear(self) -> None:
+        # 読み出し中のスレッドは差し替え前の中身を最後まで読む
+        self._state = _TaskState()
+        # リビジョンは全削除をまたいで増やし続ける
+        self._revision += 1
+        self._base_revision = self._revision
+
+    def _touch(self, state: _TaskState, task_id: int) -> None:
+        """リビジョンを進めてタスクを変更済みにする"""
+        self._revision += 1
+        state.changes.append((self._revision, task_id))
+        if len(state.changes) > 2 * len(state.tasks) + 64:
+            # 同じタスクの古い履歴を捨てる（新しいリストに差し替えるので読み出し中でもよい）
+            latest = {task_id: rev for rev, task_id in state.changes}
+            state.changes = sorted((rev, task_id) for task_id, rev in latest.items())
+
+    def changed_since(self, revision: int, limit: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+        state = self._state
+        tasks = state.tasks
+        changes = state.changes
+        changes = changes[bisect_right(changes, (revision, math.inf)):]
+        changed = []
+        seen = set()
+        # 新しい変更から見て、同じタスクは最後の変更だけを数える
+        for _, task_id in reversed(changes):
+            if task_id in seen:
+                continue
+            if limit is not None and len(seen) >= limit:
+                return None
+            seen.add(task_id)
+            changed.append(tasks[task_id])
+        changed.reverse()
+        return changed
+
+    def add(self, title: str, due: Optional[str], link: str,
+            status: str = STATUS_TODO) -> Task:
+        state = self._state
+        task = Task(state.next_id, title, due, link, status)
+        state.next_id += 1
+        self._index(state, task)
+        self._touch(state, task.id)
+        return task
+
+    @staticmethod
+    def _index(state: _TaskState, task: Task) -> None:
+        """タスクを各インデックスに登録"""
+        state.tasks[task.id] = task
+        # IDは増える一方なので末尾に追加すれば昇順のまま
+        state.by_status.setdefault(task.status, []).append(task.id)
+        state.by_link.setdefault(task.link, []).append(task.id)
+        due = task.due_minutes
+        if due is not None:
+            insort(state.by_due.setdefault(task.status, []), (due, task.id))
+        if task.status == STATUS_TODO:
+            state.title_index.add(task.id, task.title)
+
+    def get(self, task_id: int) -> Optional[Task]:
+        return self._state.tasks.get(task_id)
+
+    def set_status(self, task_id: int, status: str) -> Task:
+        state = self._state
+        task = state.tasks[task_id]
+        if task.status != status:
+            ids = state.by_status[task.status]
+            del ids[bisect_left(ids, task_id)]
+            insort(state.by_status.setdefault(status, []), task_id)
+            due = task.due_minutes
+            if due is not None:
+                entry = (due, task_id)
+                by_due = state.by_due[task.status]
+                del by_due[bisect_left(by_due, entry)]
+                insort(state.by_due.setdefault(status, []), entry)
+            # 読み出し中のスレッドが持つタスクは変えずに、新しいタスクに差し替える
+            task = task.replace(status=status)
+            state.tasks[task_id] = task
+            if status == STATUS_TODO:
+                state.title_index.add(task_id, task.title)
+            else:
+                state.title_index.remove(task_id)
+            self._touch(state, task_id)
+        return task
+
+    def by_status(self, status: str) -> List[Dict[str, Any]]:
+        state = self._state
+        tasks = state.tasks
+        return [tasks[task_id] for task_id in tuple(state.by_status.get(status, ()))]
+
+    def latest(self, status: str) -> Optional[Dict[str, Any]]:
+        state = self._state
+        ids = state.by_status.get(status)
+        return state.tasks[ids[-1]] if ids else None
+
+    def count_by_status(self, status: str) -> int:
+        return len(self._state.by_status.get(status, ()))
+
+    def by_due(self, status: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        state = self._state
+        tasks = state.tasks
+        if status is None:
+            entries = heapq.merge(*(list(by_due) for by_due in state.by_due.values()))
+        else:
+            entries = list(state.by_due.get(status, ()))
+        for _, task_id in entries:
+            yield tasks[task_id]
+
+    def upcoming(self, now: str, limit: int, status: str = STATUS_TODO) -> List[Dict[str, Any]]:
+        # 二分探索で位置を求め、必要な件数だけ切り出す（O(log n + k)）
+        state = self._state
+        by_due = state.by_due.get(status, [])
+        now = due_minutes(now)
+        start = bisect_left(by_due, (now,))
+        return self._due_tasks(state, by_due[start:start + limit], now, status)
+
+    def overdue(self, now: str, limit: Optional[int] = None,
+                status: str = STATUS_TODO) -> List[Dict[str, Any]]:
+        state = self._state
+        by_due = state.by_due.get(status, [])
+        now = due_minutes(now)
+        end = bisect_left(by_due, (now,))
+        return self._due_tasks(state, by_due[:end if limit is None else min(end, limit)], now, status, before=True)
+
+    @staticmethod
+    def _due_tasks(state: _TaskState, entries: List[Tuple[int, int]], now: int, status: str,
+                   before: bool = False) -> List[Task]:
+        """期日インデックスの切り出しをタスクにする
+
+        探索と切り出しの間に書き込みが入ると境界が1件ずれうるので、条件を満たすものだけ返す。
+        """
+        tasks = state.tasks
+        result = []
+        for due, task_id in entries:
+            task = tasks.get(task_id)
+            if task is not None and task.status == status and (due < now) == before:
+                result.append(task)
+        return result
+
+    def page(self, query: TaskQuery, limit: int, after: Optional[tuple] = None) -> TaskPage:
+        # インデックスから並び順に候補を読み、残りの条件で絞る。
+        # 該当がまばらでも調べるのはMAX_PAGE_SCAN件までで、そこまでの位置を続きとして返す
+        state = self._state
+        tasks = state.tasks
+        page = []
+        scanned = 0
+        if query.by_due:
+            entries = self._due_entries(state, query, after)
+        else:
+            entries = self._id_entries(state, query, after)
+        for key, task_id in entries:
+            task = tasks.get(task_id)
+            # 読み出し中に状態が変わることがあるので、条件はタスク自体で確かめる
+            if task is not None and query.matches(task):
+                if len(page) == limit:
+                    return TaskPage(page, query.key(page[-1]))
+                page.append(task)
+            scanned += 1
+            if scanned >= MAX_PAGE_SCAN:
+                return TaskPage(page, (format_due(key[0]), key[1]) if query.by_due else key)
+        return TaskPage(page, None)
+
+    @staticmethod
+    def _id_entries(state: _TaskState, query: TaskQuery,
+                    after: Optional[tuple]) -> Iterator[Tuple[tuple, int]]:
+        """ID順の候補の (キー, ID)。状態・アプリ名の索引のうち短い方を使う"""
+        after_id = after[0] if after is not None else None
+        indexes = []
+        if query.status is not None:
+            indexes.append(state.by_status.get(query.status, []))
+        if query.link is not None:
+            indexes.append(state.by_link.get(query.link, []))
+        if not indexes:
+            # IDは1から欠番なしで採番されるので、IDの範囲をそのまま読む
+            if query.descending:
+                start = state.next_id if after_id is None else after_id
+                task_ids = range(start - 1, 0, -1)
+            else:
+                task_ids = range((after_id or 0) + 1, state.next_id)
+            for task_id in task_ids:
+                yield (task_id,), task_id
+            return
+
+        ids = min(indexes, key=len)
+        if query.descending:
+            end = len(ids) if after_id is None else bisect_left(ids, after_id)
+            positions = range(end - 1, -1, -1)
+        else:
+            positions = range(0 if after_id is None else bisect_right(ids, after_id), len(ids))
+        for position in positions:
+            if position >= len(ids):
+                return  # 読み出し中に状態が変わって短くなった
+            yield (ids[position],), ids[position]
+
+    def _due_entries(self, state: _TaskState, query: TaskQuery,
+                     after: Optional[tuple]) -> Iterator[Tuple[tuple, int]]:
+        """期日順の候補の ((エポック分, ID), ID)。状態ごとの期日索引を範囲で読み、状態の指定がなければ併合する"""
+        if after is not None:
+            after = (due_minutes(after[0]), after[1])
+        if query.status is not None:
+            return self._due_range(state.by_due.get(query.status, []), query, after)
+        ranges = [self._due_range(by_due, query, after) for by_due in state.by_due.values()]
+        return heapq.merge(*ranges, reverse=query.descending)
+
+    @staticmethod
+    def _due_range(by_due: List[Tuple[int, int]], query: TaskQuery,
+                   after: Optional[tuple]) -> Iterator[Tuple[tuple, int]]:
+        start = bisect_left(by_due, (due_minutes(query.due_from),)) if query.due_from is not None else 0
+        end = bisect_left(by_due, (due_minutes(query.due_to),)) if query.due_to is not None else len(by_due)
+        if after is not None:
+            if query.descending:
+                end = min(end, bisect_left(by_due, after))
+            else:
+                start = max(start, bisect_right(by_due, after))
+        positions = range(end - 1, start - 1, -1) if query.descending else range(start, end)
+        for position in positions:
+            if position >= len(by_due):
+                return
+            entry = by_due[position]
+            yield entry, entry[1]
+
+    def match_incomplete(self, text: str) -> Optional[Dict[str, Any]]:
+        state = self._state
+        task_id = state.title_index.best_match(text)
+        return state.tasks[task_id] if task_id is not None else None
+
+    def all(self) -> List[Dict[str, Any]]:
+        return list(self._state.tasks.values())
+
+    def iter_tasks(self, after_id: int = 0) -> Iterator[Dict[str, Any]]:
+        # IDは1から欠番なしで採番されるので、一覧を複製せずにIDで順に引ける
+        state = self._state
+        tasks = state.tasks
+        for task_id in range(after_id + 1, state.next_id):
+            task = tasks.get(task_id)
+            if task is not None:
+                yield task
+
+    def __len__(self) -> int:
+        return len(self._state.tasks)
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+from contextlib import contextmanager
+from datetime import datetime
+import app as web
+from shibu_task_agent import ShibuTaskAgent, MAX_DELTA_TASKS
+
+TEST_INPUTS = [
+    '6月17日までに営業資料をパワーポイントで作成してください',
+    '顧客データの調査をエクセルで6月14日まで',
+    '明日までに会議の議事録を作成',
+    '営業資料の作成が完了しました',
+]
+
+
+@contextmanager
+def _client():
+    with web.using_partitions():
+        yield web.app.test_client()
+
+
+def test_structured_mode_matches_json_mode():
+    """structured=Trueでも同じタスク一覧が返ること"""
+    json_agent = ShibuTaskAgent()
+    structured_agent = ShibuTaskAgent()
+    for text in TEST_INPUTS:
+        assert structured_agent.process_input(text, structured=True) == json.loads(json_agent.process_input(text))
+    assert structured_agent.apply_input('こんにちは') is None
+    assert structured_agent.apply_input('議事録が終わった')['status'] == '完了'
+
+
+def test_compact_response_with_pretty_opt_in():
+    """既定は空白なしのJSONで、?prettyのときだけ整形されること"""
+    with _client() as client:
+        for text in TEST_INPUTS:
+            response = client.post('/api/process', json={'input': text, 'user': 'alice'})
+            assert response.get_json()['success']
+
+        compact = client.get('/api/tasks?user=alice')
+        pretty = client.get('/api/tasks?user=alice&pretty')
+        assert compact.get_json() == pretty.get_json()
+        assert len(compact.get_json()) == 3
+        assert b'\n' not in compact.data and b'\n' in pretty.data
+        assert len(compact.data) < len(pretty.data) * 0.8
+
+
+def test_delta_since_revision():
+    """since以降に変わったタスクだけが返り、古すぎるときは全件になること"""
+    with _client() as client:
+        first = client.post('/api/process', json={'input': TEST_INPUTS[0], 'user': 'alice'}).get_json()
+        assert first['full'] and len(first['tasks']) == 1
+        revision = first['revision']
+
+        second = client.post('/api/process', json={'input': TEST_INPUTS[1], 'user': 'alice', 'since': revision}).get_json()
+        assert not second['full']
+        assert [task['id'] for task in second['tasks']] == [2]
+
+        # 完了にしたタスクだけが差分として返る
+        done = client.post('/api/process',
+                           json={'input': TEST_INPUTS[3], 'user': 'alice', 'since': second['revision']}).get_json()
+        assert [(task['id'], task['status']) for task in done['tasks']] == [(1, '完了')]
+
+        delta = client.get(f'/api/tasks?user=alice&since={revision}').get_json()
+        assert [task['id'] for task in delta['tasks']] == [2, 1]
+        latest = client.get(f"/api/tasks?user=alice&since={done['revision']}").get_json()
+        assert latest == {'revision': done['revision'], 'full': False, 'tasks': []}
+
+        # リセットより前のリビジョンからは全件
+        client.post('/api/reset', json={'user': 'alice'})
+        after_reset = client.get(f"/api/tasks?user=alice&since={done['revision']}").get_json()
+        assert after_reset['full'] and after_reset['tasks'] == []
+        assert client.get('/api/tasks?user=alice&since=abc').status_code == 400
+        assert client.get('/api/tasks?user=alice&since=3').status_code == 400
+
+        response = client.get('/api/tasks?user=alice')
+        assert response.headers['X-Task-Revision'] == after_reset['revision']
+
+
+def test_delta_from_another_store_is_full():
+    """作り直した区画（別のストア）のリビジョンからは、番号が範囲内でも全件を返すこと"""
+    with _client() as client:
+        for subject in ('議事録', '予算書'):
+            old = client.post('/api/process', json={'input': f'{subject}を作成', 'user': 'alice'}).get_json()
+        web.partitions.evict('alice')
+
+        for subject in ('報告書', '見積書', '企画書'):
+            client.post('/api/process', json={'input': f'{subject}を作成', 'user': 'alice'})
+        stale = client.get(f"/api/tasks?user=alice&since={old['revision']}").get_json()
+        assert stale['full'] and [task['id'] for task in stale['tasks']] == [1, 2, 3]
+        assert stale['revision'] != old['revision']
+
+
+def test_delta_falls_back_to_full_snapshot():
+    """差分が多すぎるときは全件を返すこと"""
+    agent = ShibuTaskAgent()
+    for i in range(MAX_DELTA_TASKS + 1):
+        agent.apply_input(f'会議{i}の資料を作成')
+    assert agent.changes_since(agent.revision_token(0))['full']
+    assert not agent.changes_since(agent.revision_token(1))['full']
+    assert agent.changes_since(agent.revision_token(agent.store.revision + 1))['full']
+
+
+def test_conditional_get_with_etag():
+    """変更がなければ304を返し、変更後は新しい一覧を返すこと"""
+    with _client() as client:
+        client.post('/api/process', json={'input': TEST_INPUTS[0], 'user': 'alice'})
+
+        first = client.get('/api/tasks?user=alice')
+        etag = first.headers['ETag']
+        assert first.status_code == 200 and etag
+
+        cached = client.get('/api/tasks?user=alice', headers={'If-None-Match': etag})
+        assert cached.status_code == 304 and cached.data == b''
+
+        # 整形出力は別のETag
+        pretty = client.get('/api/tasks?user=alice&pretty', headers={'If-None-Match': etag})
+        assert pretty.status_code == 200 and pretty.headers['ETag'] != etag
+
+        client.post('/api/process', json={'input': TEST_INPUTS[1], 'user': 'alice'})
+        changed = client.get('/api/tasks?user=alice', headers={'If-None-Match': etag})
+        assert changed.status_code == 200 and len(changed.get_json()) == 2
+        assert changed.headers['ETag'] != etag
+
+
+def test_tasks_json_is_cached_per_revision():
+    """同じリビジョンの間はシリアライズ結果を使い回すこと"""
+    agent = ShibuTaskAgent()
+    agent.apply_input(TEST_INPUTS[0])
+    revision, body = agent.tasks_json()
+    assert agent.tasks_json() == (revision, body)
+    assert agent.tasks_json()[1] is body
+    assert json.loads(agent.tasks_json(pretty=True)[1]) == json.loads(body)
+
+    agent.apply_input(TEST_INPUTS[1])
+    assert agent.tasks_json()[0] == revision + 1
+    assert len(json.loads(agent.tasks_json()[1])) == 2
+
+    # 別のインスタンスとはETagが衝突しない
+    assert ShibuTaskAgent().tasks_etag() != ShibuTaskAgent().tasks_etag()
+
+
+def test_upcoming_and_overdue_endpoints():
+    """次の期日・期限切れの一覧が基準時刻と件数の指定どおりに返ること"""
+    with _client() as client:
+        for text in ['6月17日までに営業資料を作成', '6月20日の朝9時までに議事録を作成',
+                     '6月19日までに予算書を用意する', '6月14日までに調査する']:
+            client.post('/api/process', json={'input': text, 'user': 'alice'})
+
+        # 月日だけの期日は今年になる
+        now = f'{datetime.now().year}-06-18T10:30'
+        data = client.get(f'/api/tasks/upcoming?user=alice&now={now}&limit=1').get_json()
+        assert data['now'] == now
+        assert [task['title'] for task in data['tasks']] == ['までに予算書を用意']
+        data = client.get(f'/api/tasks/overdue?user=alice&now={now}').get_json()
+        assert [task['title'] for task in data['tasks']] == ['までに調査', 'までに営業資料を作成']
+
+        assert client.get('/api/tasks/upcoming?limit=0').status_code == 400
+        assert client.get(f'/api/tasks/overdue?limit={web.MAX_DUE_TASKS + 1}').status_code == 400
+        assert client.get('/api/tasks/upcoming?now=tomorrow').status_code == 400
+
+        # ストアの失敗は他のAPIと同じくJSONのエラーで返す
+        def broken(*args):
+            raise RuntimeError('store unavailable')
+
+        agent = web.partitions.get('alice')
+        agent.upcoming_tasks = agent.overdue_tasks = broken
+        for path in ('/api/tasks/upcoming', '/api/tasks/overdue'):
+            response = client.get(f'{path}?user=alice')
+            assert response.status_code == 500
+            assert response.get_json() == {'error': 'store unavailable'}
+
+
+def test_paginated_filtered_task_list():
+    """/api/tasksの絞り込み・並び順・カーソルでのページ送り"""
+    with _client() as client:
+        subjects = ['議事録', '予算書', '報告書', '見積書', '企画書', '請求書', '提案書', '契約書', '仕様書', '日報']
+        client.post('/api/process/batch', json={'user': 'alice', 'inputs': [
+            f'6月{10 + i}日までに{subject}をエクセルで作成' if i % 2 else f'6月{10 + i}日までに{subject}を作成'
+            for i, subject in enumerate(subjects)]})
+        client.post('/api/process', json={'input': '見積書の作成が完了しました', 'user': 'alice'})
+
+        ids = []
+        response = client.get('/api/tasks?user=alice&limit=4')
+        while True:
+            data = response.get_json()
+            assert data['revision'].endswith('-11') and len(data['tasks']) <= 4
+            ids.extend(task['id'] for task in data['tasks'])
+            if data['next_cursor'] is None:
+                break
+            response = client.get(f"/api/tasks?user=alice&limit=4&cursor={data['next_cursor']}")
+        assert ids == list(range(1, 11))
+
+        data = client.get('/api/tasks?user=alice&status=todo&link=Excel Web&sort=-due').get_json()
+        assert [task['id'] for task in data['tasks']] == [10, 8, 6, 2]
+        year = datetime.now().year
+        data = client.get(f'/api/tasks?user=alice&status=todo&q=書&due_from={year}-06-12&due_to={year}-06-16').get_json()
+        assert [task['id'] for task in data['tasks']] == [3, 5, 6]
+
+        # 同じページは変わっていなければ304
+        response = client.get('/api/tasks?user=alice&status=done')
+        assert [task['id'] for task in response.get_json()['tasks']] == [4]
+        assert client.get('/api/tasks?user=alice&status=done',
+                          headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+        assert client.get('/api/tasks?user=alice&status=todo',
+                          headers={'If-None-Match': response.headers['ETag']}).status_code == 200
+
+        cursor = client.get('/api/tasks?user=alice&limit=1').get_json()['next_cursor']
+        assert client.get(f'/api/tasks?user=alice&sort=due&cursor={cursor}').status_code == 400
+        assert client.get('/api/tasks?cursor=broken').status_code == 400
+        assert client.get(f"/api/tasks?sort=due&cursor={web.encode_cursor(web.TaskQuery(sort='due'), ('x', 1))}").status_code == 400
+        assert client.get('/api/tasks?sort=title').status_code == 400
+        assert client.get('/api/tasks?status=later').status_code == 400
+        assert client.get(f'/api/tasks?limit={web.MAX_PAGE_SIZE + 1}').status_code == 400
+        # 何も指定しなければ従来どおり全件の配列
+        assert len(client.get('/api/tasks?user=alice').get_json()) == 10
+
+if __name__ == "__main__":
+    test_structured_mode_matches_json_mode()
+    test_compact_response_with_pretty_opt_in()
+    test_delta_since_revision()
+    test_delta_from_another_store_is_full()
+    test_delta_falls_back_to_full_snapshot()
+    test_conditional_get_with_etag()
+    test_tasks_json_is_cached_per_revision()
+    test_upcoming_and_overdue_endpoints()
+    test_paginated_filtered_task_list()
+    print('✅ すべてのテストが成功しました')
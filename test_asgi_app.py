@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from asgi_app import TaskAPI
+from app import create_agent
+from shibu_task_agent import ShibuTaskAgent
+from sqlite_task_store import SQLiteDatabase, SQLiteTaskStore
+from user_partitions import UserPartitions
+
+
+def call(api, method, path, body=None, headers=()):
+    """ASGIアプリを1リクエスト分呼び出して (ステータス, ヘッダー, 本文) を返す"""
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http',
+        'method': method,
+        'path': path,
+        'query_string': query.encode(),
+        'headers': [(name.encode(), value.encode()) for name, value in headers],
+    }
+    payload = json.dumps(body).encode() if body is not None else b''
+    messages = [{'type': 'http.request', 'body': payload, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(api(scope, receive, send))
+    start, content = sent
+    return start['status'], dict(start['headers']), content['body']
+
+
+def test_asgi_routes_match_flask():
+    """ASGI版でもFlask版と同じ結果・ETag・差分が返ること"""
+    api = TaskAPI(UserPartitions(create_agent))
+    status, _, content = call(api, 'POST', '/api/process', {'input': '明日までに会議の議事録を作成', 'user': 'alice'})
+    assert status == 200
+    first = json.loads(content)
+    assert first['success'] and [task['id'] for task in first['tasks']] == [1]
+
+    status, headers, content = call(api, 'GET', '/api/tasks?user=alice')
+    assert status == 200 and len(json.loads(content)) == 1
+    etag = headers[b'etag'].decode()
+    status, _, content = call(api, 'GET', '/api/tasks?user=alice', headers=[('If-None-Match', etag)])
+    assert status == 304 and content == b''
+
+    call(api, 'POST', '/api/process', {'input': '月末までに予算書を用意する', 'user': 'alice'})
+    status, _, content = call(api, 'GET', f"/api/tasks?user=alice&since={first['revision']}")
+    assert [task['id'] for task in json.loads(content)['tasks']] == [2]
+
+    assert call(api, 'GET', '/api/tasks?user=bob')[2] == b'[]'
+    assert call(api, 'POST', '/api/process', {'user': 'alice'})[0] == 400
+    assert call(api, 'GET', '/api/unknown')[0] == 404
+
+    status, _, content = call(api, 'GET', '/api/tasks/upcoming?user=alice&limit=1')
+    assert status == 200 and len(json.loads(content)['tasks']) == 1
+    assert call(api, 'GET', '/api/tasks/overdue?limit=x')[0] == 400
+
+    status, headers, content = call(api, 'GET', '/api/tasks?user=alice&limit=1&sort=-id')
+    page = json.loads(content)
+    assert [task['id'] for task in page['tasks']] == [2] and b'etag' in headers
+    status, _, content = call(api, 'GET', f"/api/tasks?user=alice&limit=1&sort=-id&cursor={page['next_cursor']}")
+    assert [task['id'] for task in json.loads(content)['tasks']] == [1]
+    assert call(api, 'GET', '/api/tasks?sort=x')[0] == 400
+
+    status, _, content = call(api, 'POST', '/api/reset', {'user': 'alice'})
+    assert json.loads(content)['success']
+    assert call(api, 'POST', '/api/reset')[0] == 400
+    assert call(api, 'GET', '/api/tasks?user=alice')[2] == b'[]'
+
+
+class RecordingExecutor(ThreadPoolExecutor):
+    """スレッドプールで実行した処理の名前を記録する"""
+
+    def __init__(self):
+        super().__init__(max_workers=2)
+        self.calls = []
+
+    def submit(self, fn, *args, **kwargs):
+        self.calls.append(fn.__name__)
+        return super().submit(fn, *args, **kwargs)
+
+
+def test_serialization_and_queries_run_in_executor():
+    """全件のシリアライズ・差分・SQLiteの読み出しはイベントループ上で行わないこと"""
+    executor = RecordingExecutor()
+    api = TaskAPI(UserPartitions(create_agent), executor=executor)
+    call(api, 'POST', '/api/process', {'input': '明日までに会議の議事録を作成', 'since': 'x-0'})
+    assert executor.calls == ['apply_input', 'changes_since']
+
+    executor.calls.clear()
+    etag = call(api, 'GET', '/api/tasks')[1][b'etag'].decode()
+    call(api, 'GET', '/api/tasks?since=x-0')
+    assert call(api, 'GET', '/api/tasks', headers=[('If-None-Match', etag)])[0] == 304
+    # インメモリのETagはイベントループ上で求める
+    assert executor.calls == ['tasks_json', 'changes_since']
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        database = SQLiteDatabase(os.path.join(tmpdir, 'tasks.db'))
+        executor = RecordingExecutor()
+        api = TaskAPI(UserPartitions(lambda user: ShibuTaskAgent(SQLiteTaskStore(database, user=user))),
+                      executor=executor)
+        call(api, 'POST', '/api/process', {'input': '明日までに会議の議事録を作成'})
+        executor.calls.clear()
+        etag = call(api, 'GET', '/api/tasks')[1][b'etag'].decode()
+        assert call(api, 'GET', '/api/tasks', headers=[('If-None-Match', etag)])[0] == 304
+        call(api, 'GET', '/api/tasks?limit=1')
+        assert executor.calls == ['tasks_etag', 'tasks_json', 'tasks_etag', 'tasks_etag', 'task_page']
+        database.close()
+
+
+if __name__ == "__main__":
+    test_asgi_routes_match_flask()
+    test_serialization_and_queries_run_in_executor()
+    print('✅ すべてのテストが成功しました')
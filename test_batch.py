@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+from datetime import datetime
+import app as web
+from shibu_task_agent import ShibuTaskAgent
+from sqlite_task_store import SQLiteTaskStore
+
+BASE_DATE = datetime(2025, 6, 18, 10, 30)
+
+INPUTS = [
+    '6月17日までに営業資料をパワーポイントで作成してください',
+    'こんにちは',
+    '明日までに会議の議事録を作成',
+    '営業資料の作成が完了しました',
+    '月末までに予算書を用意する',
+    '議事録が終わった',
+]
+
+
+def test_batch_matches_sequential_processing():
+    """バッチでも1件ずつ処理したときと同じタスクになること"""
+    sequential = ShibuTaskAgent()
+    for text in INPUTS:
+        sequential.apply_input(text)
+
+    agent = ShibuTaskAgent()
+    results = agent.apply_batch(INPUTS)
+    assert agent.tasks == sequential.tasks
+    assert [result['action'] for result in results] == [
+        'created', 'none', 'created', 'completed', 'created', 'completed']
+    assert [result['index'] for result in results] == list(range(len(INPUTS)))
+    assert results[3]['task']['id'] == 1 and results[1]['task'] is None
+
+
+def test_batch_uses_one_base_date():
+    """全件が同じ基準日で解析されること"""
+    agent = ShibuTaskAgent()
+    results = agent.apply_batch(['明日までに議事録を作成', '来週までに資料を作成', '報告書を作成'], BASE_DATE)
+    assert [result['task']['due'] for result in results] == [
+        '2025-06-19T12:00', '2025-06-25T12:00', '2025-06-25T12:00']
+
+
+def test_title_and_due_from_one_analysis():
+    """タイトルと期日が1回の解析からまとめて求まり、個別の結果と一致すること"""
+    agent = ShibuTaskAgent()
+    for text in ['6月17日までに営業資料をパワーポイントで作成してください',
+                 '2025-07-01 までに報告書を作成します', '議事録を作成']:
+        analysis = agent.analyze_input(text, BASE_DATE)
+        assert (analysis.title, analysis.due) == (agent.extract_title(text), agent.parse_date(text, BASE_DATE))
+    analysis = agent.analyze_input('6月17日までに営業資料を作成してください', BASE_DATE)
+    assert (analysis.title, analysis.due) == ('までに営業資料を作成', '2025-06-17T12:00')
+
+
+def test_sqlite_batch_is_one_transaction():
+    """SQLiteでは途中で失敗したら全件が取り消されること"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        store = SQLiteTaskStore(os.path.join(tmpdir, 'tasks.db'))
+        agent = ShibuTaskAgent(store)
+        agent.apply_batch(INPUTS[:3])
+        assert len(store) == 2
+
+        original_add = store.add
+
+        def failing_add(title, due, link, status='未着手'):
+            if title.startswith('月末'):
+                raise RuntimeError('disk full')
+            return original_add(title, due, link, status)
+
+        store.add = failing_add
+        try:
+            agent.apply_batch(INPUTS[3:])
+        except RuntimeError:
+            pass
+        assert [task['status'] for task in store.all()] == ['未着手', '未着手']
+        store.db.close()
+
+
+def test_batch_endpoint():
+    """バッチAPIが入力ごとの結果と最後の一覧を返すこと"""
+    with web.using_partitions():
+        client = web.app.test_client()
+        data = client.post('/api/process/batch', json={'inputs': INPUTS, 'user': 'alice'}).get_json()
+        assert data['success'] and data['full']
+        assert len(data['results']) == len(INPUTS)
+        assert [task['status'] for task in data['tasks']] == ['完了', '完了', '未着手']
+
+        delta = client.post('/api/process/batch', json={
+            'inputs': ['予算書を提出した'], 'user': 'alice', 'since': data['revision']}).get_json()
+        assert [(task['id'], task['status']) for task in delta['tasks']] == [(3, '完了')]
+
+        assert client.post('/api/process/batch', json={'inputs': []}).status_code == 400
+        assert client.post('/api/process/batch', json={'inputs': ['a', 1]}).status_code == 400
+        too_many = ['資料を作成'] * (web.MAX_BATCH_INPUTS + 1)
+        assert client.post('/api/process/batch', json={'inputs': too_many}).status_code == 400
+
+
+if __name__ == "__main__":
+    test_batch_matches_sequential_processing()
+    test_batch_uses_one_base_date()
+    test_title_and_due_from_one_analysis()
+    test_sqlite_batch_is_one_transaction()
+    test_batch_endpoint()
+    print('✅ すべてのテストが成功しました')
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import app as web
+from benchmark_suite import (BenchmarkResult, benchmarks, compare, measure, synthetic_phrases,
+                             synthetic_utterances, to_baseline)
+from shibu_task_agent import ACTION_CREATED, ShibuTaskAgent
+
+
+def test_synthetic_corpora_are_reproducible():
+    """同じ種なら同じコーパスになり、発話はすべてタスク作成になること"""
+    assert synthetic_utterances(50) == synthetic_utterances(50)
+    assert synthetic_utterances(50, seed=1) != synthetic_utterances(50, seed=2)
+    assert synthetic_phrases('numeric', 20) == synthetic_phrases('numeric', 20)
+
+    agent = ShibuTaskAgent()
+    assert all(agent.classify_input(text).action == ACTION_CREATED for text in synthetic_utterances(50))
+
+
+def test_measure_and_compare_flag_regressions():
+    """計測結果をベースラインにでき、しきい値を超えた遅れだけが悪化になること"""
+    calls = []
+    result = measure('noop', lambda state: calls.append(state), setup=lambda: 'state', inner=2, runs=3)
+    assert calls == ['state'] * 3 and result.runs == 3 and result.loops == 1
+
+    baseline = to_baseline([BenchmarkResult('a', 10e-6, 9e-6, 0.0, 5, 1),
+                            BenchmarkResult('b', 10e-6, 9e-6, 0.0, 5, 1)])
+    assert baseline['benchmarks']['a']['median_us'] == 10.0
+
+    current = [BenchmarkResult('a', 10.5e-6, 9.5e-6, 0.0, 5, 1),
+               BenchmarkResult('b', 12e-6, 11e-6, 0.0, 5, 1),
+               BenchmarkResult('new', 1e-6, 1e-6, 0.0, 5, 1)]
+    rows = compare(baseline, current, threshold=0.1)
+    assert [(name, before, after, regressed) for name, before, after, regressed in rows] == [
+        ('a', 9.0, 9.5, False), ('b', 9.0, 11.0, True)]
+
+    # 中央値だけが遅い（一部の計測がぶれた）ときや、遅れがばらつきの範囲内なら悪化にしない
+    noisy = [BenchmarkResult('a', 20e-6, 9.2e-6, 5e-6, 5, 1),
+             BenchmarkResult('b', 12e-6, 11e-6, 1.5e-6, 5, 1)]
+    assert [regressed for *_, regressed in compare(baseline, noisy, threshold=0.1)] == [False, False]
+
+
+def test_flask_benchmark_restores_app_partitions():
+    """Flaskのベンチマークが終わったら、アプリの区画が元に戻っていること"""
+    original = web.partitions
+    run = dict(benchmarks(quick=True))['flask./api/process']
+    assert run(1).runs == 1
+    assert web.partitions is original and 'bench' not in original
+
+
+if __name__ == "__main__":
+    test_synthetic_corpora_are_reproducible()
+    test_measure_and_compare_flag_regressions()
+    test_flask_benchmark_restores_app_partitions()
+    print('✅ すべてのテストが成功しました')
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from datetime import date, datetime
+from advanced_date_parser import AdvancedDateParser
+from calendar_anchors import CalendarAnchors
+
+
+def test_anchor_table():
+    """基準日（2025年6月18日・水曜）から各基準点が計算されること"""
+    anchors = CalendarAnchors(datetime(2025, 6, 18, 10, 30))
+
+    assert anchors.today == date(2025, 6, 18)
+    assert anchors.tomorrow == date(2025, 6, 19)
+    assert anchors.this_weekend == date(2025, 6, 21)
+    assert anchors.next_weekend == date(2025, 6, 28)
+    assert anchors.month_end == date(2025, 6, 30)
+    assert anchors.next_month_end == date(2025, 7, 31)
+    assert anchors.year_end == date(2025, 12, 31)
+    assert anchors.next_year == date(2026, 1, 1)
+
+    # 今日（水曜）は含めず、直近の水曜は来週になる
+    assert anchors.upcoming_weekdays[0] == date(2025, 6, 23)
+    assert anchors.upcoming_weekdays[2] == date(2025, 6, 25)
+    assert anchors.upcoming_weekdays[4] == date(2025, 6, 20)
+    assert anchors.next_week_weekdays[0] == date(2025, 6, 23)
+    assert anchors.next_week_weekdays[4] == date(2025, 6, 27)
+
+    assert anchors.after_days(30) == date(2025, 7, 18)
+
+
+def test_month_day_fallbacks():
+    """存在しない日付は月末に丸められること"""
+    anchors = CalendarAnchors(date(2025, 1, 31))
+    assert anchors.next_month_end == date(2025, 2, 28)
+    assert anchors.next_month_day(15) == date(2025, 2, 15)
+    assert anchors.next_month_day(30) == date(2025, 2, 28)
+    assert anchors.this_month_day(32) == date(2025, 1, 31)
+
+    anchors = CalendarAnchors(date(2025, 12, 10))
+    assert anchors.next_month_end == date(2026, 1, 31)
+
+
+def test_parser_reuses_anchors_per_day():
+    """同じ日の解析では暦テーブルが使い回されること"""
+    parser = AdvancedDateParser(cache_size=0)
+    first = parser.anchors_for(datetime(2025, 6, 18, 9))
+    assert parser.anchors_for(datetime(2025, 6, 18, 18)) is first
+    assert parser.anchors_for(datetime(2025, 6, 19, 9)) is not first
+
+    assert parser.parse('来月30日までに', datetime(2025, 1, 31)) == '2025-02-28T12:00'
+
+
+if __name__ == "__main__":
+    test_anchor_table()
+    test_month_day_fallbacks()
+    test_parser_reuses_anchors_per_day()
+    print('✅ すべてのテストが成功しました')
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import app as web
+from shibu_task_agent import ShibuTaskAgent
+from sqlite_task_store import SQLiteDatabase, SQLiteTaskStore
+import task_store
+from task_store import TaskStore, STATUS_DONE
+from title_index import TitleIndex
+
+THREADS = 16
+REQUESTS = 400
+
+
+def test_concurrent_creation_assigns_unique_ids():
+    """並行してタスクを作成・完了・読み出ししてもIDが重複しないこと"""
+    agent = ShibuTaskAgent()
+
+    def work(i):
+        agent.apply_input(f'会議{i}の資料を作成')
+        if i % 10 == 0:
+            agent.apply_input(f'会議{i - 5}の資料が完了しました')
+        agent.tasks_json()
+        agent.changes_since(agent.revision_token(i))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(THREADS) as pool:
+        list(pool.map(work, range(REQUESTS)))
+    elapsed = time.perf_counter() - started
+
+    ids = [task['id'] for task in agent.tasks]
+    assert sorted(ids) == list(range(1, REQUESTS + 1))
+    assert agent.store.next_id == REQUESTS + 1
+    assert agent.store.count_by_status(STATUS_DONE) == REQUESTS // 10
+    print(f'  agent: {REQUESTS / elapsed:.0f} 件/秒')
+
+
+def test_concurrent_requests_per_user():
+    """並行リクエストでもユーザーごとにIDが1から連番になること（全削除と差分の読み出しを含む）"""
+    with web.using_partitions():
+        users = ['alice', 'bob', 'carol', 'dave']
+        # erinは作成・差分の読み出し・全削除を混ぜる（他のユーザーには影響しない）
+        since = web.app.test_client().get('/api/tasks?user=erin').headers['X-Task-Revision']
+
+        def request(i):
+            client = web.app.test_client()
+            if i % (len(users) + 1) == len(users):
+                step = i // (len(users) + 1) % 4
+                if step == 0:
+                    response = client.post('/api/reset', json={'user': 'erin'})
+                elif step == 1:
+                    response = client.get(f'/api/tasks?user=erin&since={since}')
+                elif step == 2:
+                    response = client.post('/api/process',
+                                           json={'input': f'{i}件目の資料を作成', 'user': 'erin', 'since': since})
+                else:
+                    response = client.post('/api/process', json={'input': f'{i}件目の資料を作成', 'user': 'erin'})
+                assert response.status_code == 200
+                return
+            i -= i // (len(users) + 1)
+            user = users[i % len(users)]
+            if (i // len(users)) % 4 == 3:
+                response = client.get(f'/api/tasks?user={user}')
+            else:
+                response = client.post('/api/process', json={'input': f'{i}件目の資料を作成', 'user': user})
+            assert response.status_code == 200
+
+        total = REQUESTS + REQUESTS // len(users)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(THREADS) as pool:
+            list(pool.map(request, range(total)))
+        elapsed = time.perf_counter() - started
+
+        for user in users:
+            ids = [task['id'] for task in web.partitions.get(user).tasks]
+            assert sorted(ids) == list(range(1, REQUESTS // len(users) * 3 // 4 + 1))
+        ids = [task['id'] for task in web.partitions.get('erin').tasks]
+        assert sorted(ids) == list(range(1, len(ids) + 1))
+        print(f'  Flask: {total / elapsed:.0f} リクエスト/秒')
+
+
+def test_read_in_the_middle_of_reset():
+    """全削除の途中で差分を読んでも、全削除の前か後のどちらかの状態が返ること"""
+    agent = ShibuTaskAgent()
+    for i in range(3):
+        agent.apply_input(f'会議{i}の資料を作成')
+    since = agent.revision_token(1)
+    results = []
+
+    def title_index():
+        # 全削除が新しい索引を作るところで読み出しを割り込ませる
+        results.append(agent.changes_since(since))
+        return TitleIndex()
+
+    task_store.TitleIndex = title_index
+    try:
+        agent.reset()
+    finally:
+        task_store.TitleIndex = TitleIndex
+    assert [task['id'] for task in results[0]['tasks']] == [2, 3]
+    assert agent.changes_since(since)['tasks'] == []
+
+
+def test_reads_do_not_block_on_writes():
+    """書き込みロック中でも読み出しが終わること"""
+    agent = ShibuTaskAgent()
+    agent.apply_input('明日までに会議の議事録を作成')
+    results = []
+
+    def read():
+        results.append((agent.tasks, agent.tasks_json()[0], agent.changes_since(None)['revision']))
+
+    with agent.write_lock:
+        reader = threading.Thread(target=read)
+        reader.start()
+        reader.join(timeout=5)
+        assert not reader.is_alive()
+    assert agent.revision_token(results[0][1]) == results[0][2] == agent.revision_token(1)
+
+
+def test_change_log_compaction_keeps_latest_revision():
+    """変更履歴を詰めても差分が正しいこと"""
+    store = TaskStore()
+    for i in range(10):
+        store.add(f'タスク{i}', None, 'Word Web')
+    for _ in range(20):
+        for task_id in range(1, 11):
+            store.set_status(task_id, STATUS_DONE)
+            store.set_status(task_id, '未着手')
+    assert len(store._state.changes) <= 2 * len(store) + 64
+    revision = store.revision
+    store.complete(3)
+    store.complete(7)
+    assert [task['id'] for task in store.changed_since(revision)] == [3, 7]
+    assert [task['id'] for task in store.changed_since(revision - 3)] == [9, 10, 3, 7]
+
+
+def test_sqlite_concurrent_writers():
+    """SQLiteでも別々の接続から同時に追加してIDが重複しないこと"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'tasks.db')
+        SQLiteDatabase(path).close()
+        per_thread = 25
+
+        def work(n):
+            database = SQLiteDatabase(path, timeout=30)
+            store = SQLiteTaskStore(database, user='alice')
+            for i in range(per_thread):
+                store.add(f'タスク{n}-{i}', None, 'Word Web')
+            database.close()
+
+        threads = [threading.Thread(target=work, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        database = SQLiteDatabase(path)
+        ids = [task['id'] for task in SQLiteTaskStore(database, user='alice').all()]
+        database.close()
+        assert ids == list(range(1, 8 * per_thread + 1))
+
+
+if __name__ == "__main__":
+    test_concurrent_creation_assigns_unique_ids()
+    test_concurrent_requests_per_user()
+    test_read_in_the_middle_of_reset()
+    test_reads_do_not_block_on_writes()
+    test_change_log_compaction_keeps_latest_revision()
+    test_sqlite_concurrent_writers()
+    print('✅ すべてのテストが成功しました')
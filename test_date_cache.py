@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import time
+from datetime import date, datetime
+from advanced_date_parser import AdvancedDateParser
+from date_cache import LRUCache
+
+
+def test_lru_eviction_and_ttl():
+    """件数上限と有効期限でエントリが破棄されること"""
+    cache = LRUCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1  # aを最近使用に
+    cache.put('c', 3)           # 最も古いbが押し出される
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+
+    cache = LRUCache(maxsize=10, ttl=0.01)
+    cache.put('a', 1)
+    time.sleep(0.02)
+    assert cache.get('a') is None
+    assert len(cache) == 0
+
+
+def test_roll_over_clears_entries():
+    """日付が変わったらキャッシュが破棄されること"""
+    cache = LRUCache()
+    cache.roll_over(date(2025, 6, 18))
+    cache.put('a', 1)
+    cache.roll_over(date(2025, 6, 18))
+    assert cache.get('a') == 1
+    cache.roll_over(date(2025, 6, 19))
+    assert cache.get('a') is None
+
+
+def test_parser_cache_hits_on_repeated_phrases():
+    """同じ日付表現は本文が違ってもキャッシュから返ること"""
+    parser = AdvancedDateParser()
+    base_date = datetime(2025, 6, 18, 10, 30)
+
+    assert parser.parse('明日までに企画書を作成', base_date) == '2025-06-19T12:00'
+    assert parser.parse('明日までに営業資料を提出', base_date) == '2025-06-19T12:00'
+    # 時刻が違っても基準日の日付が同じならヒットする
+    assert parser.parse('明日までに議事録', base_date.replace(hour=18)) == '2025-06-19T12:00'
+    stats = parser.cache.stats()
+    assert (stats['hits'], stats['misses']) == (2, 1)
+
+    # 日付表現に関わる部分だけをキーにする
+    assert parser.date_bearing_text('3ヶ月後までに企画書') == '3ヶ月後'
+    assert parser.date_bearing_text('資料を作成') == ''
+
+
+def test_parser_without_cache():
+    """cache_size=0でキャッシュを無効にできること"""
+    parser = AdvancedDateParser(cache_size=0)
+    assert parser.cache is None
+    assert parser.parse('明日までに', datetime(2025, 6, 18)) == '2025-06-19T12:00'
+
+
+if __name__ == "__main__":
+    test_lru_eviction_and_ttl()
+    test_roll_over_clears_entries()
+    test_parser_cache_hits_on_repeated_phrases()
+    test_parser_without_cache()
+    print('✅ すべてのテストが成功しました')
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from advanced_date_parser import AdvancedDateParser, TIME_CONFIDENCE_EXPLICIT, TIME_CONFIDENCE_APPROXIMATE
+from datetime import datetime
+
+# 基準日時: 2025年6月18日（水）10:30
+BASE_DATE = datetime(2025, 6, 18, 10, 30)
+
+# 段階別パーサー（従来実装）の出力をそのまま期待値として固定
+EXPECTED = [
+    ('今日の午後3時までに', '2025-06-18T15:00'),
+    ('明日の朝9時までに', '2025-06-19T09:00'),
+    ('明後日の夕方までに', '2025-06-20T17:00'),
+    ('3日後までに', '2025-06-21T12:00'),
+    ('1週間後までに', '2025-06-25T12:00'),
+    ('2ヶ月後までに', '2025-08-17T12:00'),
+    ('月曜までに', '2025-06-23T12:00'),
+    ('来週の水曜までに', '2025-06-25T12:00'),
+    ('今週末までに', '2025-06-21T12:00'),
+    ('来週末までに', '2025-06-28T12:00'),
+    ('月末までに', '2025-06-30T12:00'),
+    ('来月末までに', '2025-06-30T12:00'),
+    ('年末までに', '2025-12-31T12:00'),
+    ('来週の月曜の午前中までに', '2025-06-23T12:00'),
+    ('今度の土曜の夜までに', '2025-06-21T19:00'),
+    ('今月25日までに', '2025-06-25T12:00'),
+    ('来月15日までに', '2025-07-15T12:00'),
+    ('6月21日までに', '2025-06-21T12:00'),
+    ('2025年12月31日までに', '2025-12-31T12:00'),
+    ('明後日の日曜までに', '2025-06-20T12:00'),
+    ('無効な日付', None),
+    ('3日後18時までに', '2025-06-21T18:00'),
+    ('明日の深夜までに', '2025-06-19T23:00'),
+    ('再来週までに', '2025-06-25T12:00'),
+    ('6/21までに', '2025-06-21T12:00'),
+]
+
+
+def test_engine_matches_staged_results():
+    """単一走査エンジンが段階別解析と同じ結果を返すこと"""
+    parser = AdvancedDateParser()
+    for text, expected in EXPECTED:
+        assert parser.parse(text, BASE_DATE) == expected, text
+
+
+def test_scan_reports_overlapping_keywords():
+    """重なり合うキーワードもすべて検出されること"""
+    parser = AdvancedDateParser()
+    tokens = parser._scan('来月末の明日曜3時')
+    for keyword in ('来月末', '来月', '月末', '明日', '日曜'):
+        assert keyword in tokens, keyword
+    assert '時' in tokens
+    assert '明後' not in tokens
+
+
+def test_parse_time_of_day():
+    """時刻だけを取り出せること（位置と確からしさ付き）"""
+    parser = AdvancedDateParser()
+    
+    time_of_day = parser.parse_time_of_day('明日の午後3時までに')
+    assert time_of_day.hour == 15
+    assert time_of_day.span == (3, 7)
+    assert time_of_day.confidence == TIME_CONFIDENCE_EXPLICIT
+    
+    time_of_day = parser.parse_time_of_day('金曜の夕方までに')
+    assert (time_of_day.hour, time_of_day.span) == (17, (3, 5))
+    assert time_of_day.confidence == TIME_CONFIDENCE_APPROXIMATE
+    
+    assert parser.parse_time_of_day('資料を作成する') is None
+
+
+def test_parse_many_keeps_order_and_dedupes():
+    """一括解析が入力順を保ち、同一テキストを一度だけ解析すること"""
+    parser = AdvancedDateParser(cache_size=0)
+    calls = []
+    parse_uncached = parser._parse_uncached
+    parser._parse_uncached = lambda text, base_date: calls.append(text) or parse_uncached(text, base_date)
+    
+    texts = [text for text, _ in EXPECTED] * 3
+    results = list(parser.parse_many(iter(texts), BASE_DATE, chunk_size=len(texts)))
+    assert results == [expected for _, expected in EXPECTED] * 3
+    assert len(calls) == len(EXPECTED)
+
+
+def test_analyze_returns_due_and_date_spans():
+    """期日と日付表記の位置がまとめて返ること（「6/21」「年」は位置に含めない）"""
+    parser = AdvancedDateParser()
+    analysis = parser.analyze('2025年6月17日と2025-07-01までに資料', BASE_DATE)
+    assert analysis.due == '2025-06-17T12:00'
+    assert analysis.date_spans == ((5, 10), (11, 21))
+    assert parser.date_spans('6/21までに') == ()
+    analysis = parser.analyze('資料を作成', BASE_DATE)
+    assert (analysis.due, analysis.date_spans, analysis.keywords) == (None, (), ())
+    assert parser.analyze('明日の朝', BASE_DATE).keywords == ((0, '明日'), (3, '朝'))
+
+
+if __name__ == "__main__":
+    test_engine_matches_staged_results()
+    test_scan_reports_overlapping_keywords()
+    test_parse_time_of_day()
+    test_parse_many_keeps_order_and_dedupes()
+    test_analyze_returns_due_and_date_spans()
+    print('✅ すべてのテストが成功しました')
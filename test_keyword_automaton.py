@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from datetime import datetime
+from keyword_automaton import KeywordAutomaton
+from shibu_task_agent import ACTION_COMPLETED, ACTION_CREATED, ACTION_NONE, ShibuTaskAgent
+
+
+def test_overlapping_and_prefix_keywords():
+    """重なり合うキーワードや接頭辞のキーワードもすべて見つかること"""
+    automaton = KeywordAutomaton(['まで', 'までに', '提出', '提出した', '出し'])
+    found = automaton.find('金曜までに提出した')
+    assert found == {'まで': 2, 'までに': 2, '提出': 5, '提出した': 5, '出し': 6}
+    assert automaton.find('なにもなし') == {}
+    assert KeywordAutomaton().find('まで') == {}
+
+
+def test_classify_input():
+    """完了が作成より優先され、アプリはキーワードの優先順で決まること"""
+    agent = ShibuTaskAgent()
+    assert agent.classify_input('資料の作成が完了しました').action == ACTION_COMPLETED
+    assert agent.classify_input('明日までに資料を作成').action == ACTION_CREATED
+    assert agent.classify_input('こんにちは') == (ACTION_NONE, 'Word Web')
+
+    # 文中の順ではなくLINK_KEYWORDSの順（PowerPointがExcelより先）
+    assert agent.classify_input('表をスライドにまとめる資料').link_label == 'PowerPoint Web'
+    assert agent.classify_input('EXCELで集計する作業').link_label == 'Excel Web'
+    assert agent.extract_link_label('OutLookで連絡') == 'Outlook Web'
+
+
+def test_analyze_input_matches_separate_steps():
+    """一度だけの解析が、判定・タイトル・期日・アプリを別々に求めた結果と一致すること"""
+    agent = ShibuTaskAgent()
+    base_date = datetime(2025, 6, 18, 10, 30)
+    text = '6月17日の夜までに営業資料をエクセルで作成してください'
+    analysis = agent.analyze_input(text, base_date)
+    assert analysis.action == agent.classify_input(text).action == ACTION_CREATED
+    assert analysis.link_label == agent.classify_input(text).link_label == 'Excel Web'
+    assert analysis.date.date_spans == ((0, 5),)
+    assert analysis.date.keywords == ((1, '月'), (6, '夜'))
+    assert analysis.title == agent.extract_title(text)
+    assert analysis.due == agent.parse_date(text, base_date) == '2025-06-17T19:00'
+
+    # 完了・該当なしでは分類だけ（日付・タイトル・アプリは求めない）
+    analysis = agent.analyze_input('営業資料の作成が完了しました', base_date)
+    assert analysis.action == ACTION_COMPLETED
+    assert (analysis.date, analysis.title, analysis.due, analysis.link_label) == (None, None, None, None)
+    assert agent.analyze_input('こんにちは', base_date).action == ACTION_NONE
+
+
+if __name__ == "__main__":
+    test_overlapping_and_prefix_keywords()
+    test_classify_input()
+    test_analyze_input_matches_separate_steps()
+    print('✅ すべてのテストが成功しました')
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import pstats
+import tempfile
+from datetime import datetime
+import app as web
+from advanced_date_parser import AdvancedDateParser
+from asgi_app import TaskAPI
+from metrics import Metrics, metrics
+from shibu_task_agent import ShibuTaskAgent
+from test_asgi_app import call
+from user_partitions import UserPartitions
+
+BASE_DATE = datetime(2025, 6, 18, 10, 30)
+
+
+def enable_metrics():
+    metrics.reset()
+    metrics.enabled = True
+
+
+def disable_metrics():
+    metrics.enabled = False
+    metrics.reset()
+
+
+def test_render_prometheus_text():
+    """カウンター・タイマー・ゲージがPrometheusのテキスト形式になること"""
+    registry = Metrics(enabled=True)
+    registry.inc('shibu_parse_stage_matched_total', (('stage', 'basic'),))
+    registry.inc('shibu_parse_stage_matched_total', (('stage', 'basic'),))
+    registry.observe('shibu_find_task_seconds', 0.25)
+    registry.observe('shibu_find_task_seconds', 0.5)
+    text = registry.render(gauges=[('shibu_users', (), 3), ('odd', (('name', 'a"b'),), 1.5)])
+    assert '# TYPE shibu_parse_stage_matched_total counter' in text
+    assert 'shibu_parse_stage_matched_total{stage="basic"} 2\n' in text
+    assert '# TYPE shibu_find_task_seconds summary' in text
+    assert 'shibu_find_task_seconds_count 2\n' in text and 'shibu_find_task_seconds_sum 0.75\n' in text
+    assert 'shibu_users 3\n' in text and 'odd{name="a\\"b"} 1.5\n' in text
+
+
+def test_parser_and_agent_instrumentation():
+    """段階・フォールバック・検索時間・JSONキャッシュが有効なときだけ記録されること"""
+    agent = ShibuTaskAgent(date_parser=AdvancedDateParser(cache_size=0))
+    agent.apply_batch(['明日までに議事録を作成'], BASE_DATE)
+    assert metrics.counter('shibu_parse_stage_matched_total', (('stage', 'basic'),)) == 0
+
+    enable_metrics()
+    try:
+        agent.apply_batch(['明日までに議事録を作成', '3日後までに資料を作成',
+                           '報告書を作成', '議事録が終わった'], BASE_DATE)
+        assert metrics.counter('shibu_parse_stage_matched_total', (('stage', 'basic'),)) == 1
+        assert metrics.counter('shibu_parse_stage_matched_total', (('stage', 'numeric'),)) == 1
+        assert metrics.counter('shibu_parse_stage_matched_total', (('stage', 'none'),)) == 1
+        assert metrics.counter('shibu_parse_fallback_total') == 1
+        # 複合表現の段階は毎回試される
+        assert metrics.timer('shibu_parse_stage_seconds', (('stage', 'complex'),))[0] == 3
+        assert metrics.timer('shibu_find_task_seconds')[0] == 1
+
+        agent.tasks_json()
+        agent.tasks_json()
+        assert metrics.counter('shibu_tasks_json_cache_total', (('result', 'miss'),)) == 1
+        assert metrics.counter('shibu_tasks_json_cache_total', (('result', 'hit'),)) == 1
+    finally:
+        disable_metrics()
+
+
+def test_metrics_endpoint_and_profile_dump():
+    """/api/metricsで計測値が取れ、?profileでプロファイルが保存されること"""
+    with web.using_partitions():
+        client = web.app.test_client()
+        enable_metrics()
+        try:
+            client.post('/api/process', json={'input': '月末までに予算書を用意する', 'user': 'alice'})
+            response = client.get('/api/metrics')
+            assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+            text = response.get_data(as_text=True)
+            assert 'shibu_request_seconds_count{endpoint="process_input"} 1\n' in text
+            assert 'shibu_json_encode_seconds_count' in text
+            assert 'shibu_users 1\n' in text and 'shibu_parse_cache_misses_total' in text
+
+            metrics.reset()
+            api = TaskAPI(UserPartitions(web.create_agent))
+            call(api, 'POST', '/api/process', {'input': '月末までに予算書を用意する', 'user': 'bob'})
+            status, headers, content = call(api, 'GET', '/api/metrics')
+            assert status == 200 and b'shibu_request_seconds_count{endpoint="process_input"} 1\n' in content
+        finally:
+            disable_metrics()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            web.PROFILE_DIR = tmpdir
+            try:
+                assert 'X-Profile-Dump' not in client.get('/api/tasks?user=alice').headers
+                dump = client.get('/api/tasks?user=alice&profile').headers['X-Profile-Dump']
+                assert dump.endswith('.prof') and 'get_tasks' in dump
+                pstats.Stats(os.path.join(tmpdir, dump))
+            finally:
+                web.PROFILE_DIR = None
+
+
+if __name__ == "__main__":
+    test_render_prometheus_text()
+    test_parser_and_agent_instrumentation()
+    test_metrics_endpoint_and_profile_dump()
+    print('✅ すべてのテストが成功しました')
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from functools import partial
+from reminder_scheduler import COMPACT_MIN_ENTRIES, ReminderScheduler
+from shibu_task_agent import ShibuTaskAgent
+from sqlite_task_store import SQLiteDatabase, SQLiteTaskStore
+from task_store import TaskStore
+from user_partitions import UserPartitions
+
+BASE_DATE = datetime(2025, 6, 18, 10, 30)
+OFFSETS = (timedelta(hours=1), timedelta(minutes=10))
+
+
+def at(moment: datetime) -> float:
+    return moment.timestamp()
+
+
+def test_agent_events_schedule_and_cancel():
+    """作成で登録、完了で取り消し、期日の前のタイミングごとに1回ずつ発火すること"""
+    fired = []
+    scheduler = ReminderScheduler(fired.append, OFFSETS, clock=lambda: at(BASE_DATE))
+    agent = ShibuTaskAgent(on_change=partial(scheduler.task_changed, 'alice'))
+    agent.apply_batch(['明日の15時までに議事録を作成', '明日の17時までに報告書を作成'], BASE_DATE)
+    assert scheduler.pending() == 2 and len(scheduler) == 4
+
+    agent.apply_batch(['報告書を提出した'], BASE_DATE)
+    assert scheduler.pending() == 1
+
+    assert scheduler.run_pending(at(datetime(2025, 6, 19, 13, 59))) == 0
+    assert scheduler.run_pending(at(datetime(2025, 6, 19, 14, 0))) == 1
+    assert scheduler.run_pending(at(datetime(2025, 6, 19, 18, 0))) == 1
+    title = agent.store.get(1)['title']
+    assert [(r.user, r.task_id, r.title, r.due, r.offset) for r in fired] == [
+        ('alice', 1, title, '2025-06-19T15:00', timedelta(hours=1)),
+        ('alice', 1, title, '2025-06-19T15:00', timedelta(minutes=10)),
+    ]
+    # 報告書の項目は取り消し済みなので発火しない
+    assert scheduler.pending() == 0 and len(scheduler) == 0
+
+    agent.apply_batch(['明日の15時までに資料を作成'], BASE_DATE)
+    agent.reset()
+    assert scheduler.pending() == 0 and scheduler.run_pending(at(datetime(2025, 6, 20))) == 0
+
+
+def test_past_offsets_are_skipped():
+    """発火時刻を過ぎたタイミングは登録しないこと"""
+    scheduler = ReminderScheduler(lambda reminder: None, OFFSETS, clock=lambda: at(BASE_DATE))
+    assert scheduler.schedule('alice', {'id': 1, 'title': 'a', 'due': '2025-06-18T11:00', 'status': '未着手'}) == 1
+    assert scheduler.schedule('alice', {'id': 2, 'title': 'b', 'due': '2025-06-18T10:35', 'status': '未着手'}) == 0
+    assert scheduler.schedule('alice', {'id': 3, 'title': 'c', 'due': None, 'status': '未着手'}) == 0
+    assert scheduler.pending() == 1
+
+
+def test_rebuild_from_stores():
+    """起動時に、ストアの未着手で期日前のタスクから登録し直すこと"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        database = SQLiteDatabase(os.path.join(tmpdir, 'tasks.db'))
+        bob = SQLiteTaskStore(database, user='bob')
+        bob.add('請求書', '2025-06-18T12:00', 'Excel Web')
+        bob.complete(bob.add('見積書', '2025-06-18T12:00', 'Excel Web')['id'])
+        memory = TaskStore()
+        memory.add('期限切れ', '2025-06-18T09:00', 'Word Web')
+        memory.add('議事録', '2025-06-19T09:00', 'Word Web')
+        assert database.users() == ['bob']
+
+        fired = []
+        scheduler = ReminderScheduler(fired.append, OFFSETS, clock=lambda: at(BASE_DATE))
+        assert scheduler.rebuild([('alice', memory)] + [(user, SQLiteTaskStore(database, user=user))
+                                                        for user in database.users()]) == 2
+        scheduler.run_pending(at(datetime(2025, 6, 19, 9, 0)))
+        assert [(r.user, r.title) for r in fired] == [('bob', '請求書'), ('bob', '請求書'),
+                                                      ('alice', '議事録'), ('alice', '議事録')]
+        database.close()
+
+
+def test_cancelled_entries_are_compacted():
+    """取り消した項目が多くなるとヒープを作り直し、項目数が登録数に比例すること"""
+    scheduler = ReminderScheduler(lambda reminder: None, OFFSETS, clock=lambda: at(BASE_DATE))
+    count = COMPACT_MIN_ENTRIES * 2
+    for task_id in range(count):
+        scheduler.schedule('alice', {'id': task_id, 'title': 't', 'due': '2025-07-01T09:00'})
+    assert len(scheduler) == count * 2
+    for task_id in range(count - 10):
+        scheduler.cancel('alice', task_id)
+    assert scheduler.pending() == 10 and len(scheduler) <= COMPACT_MIN_ENTRIES
+    # 置き換えても項目が増え続けない
+    for _ in range(COMPACT_MIN_ENTRIES):
+        scheduler.schedule('alice', {'id': 0, 'title': 't', 'due': '2025-07-01T09:00'})
+    assert len(scheduler) <= COMPACT_MIN_ENTRIES + 2
+    assert scheduler.cancel_user('alice') == 11 and scheduler.cancel('alice', 1) is False
+
+
+def test_unreadable_due_is_skipped():
+    """日時として読めない期日のタスクは登録せず、エラーにもしないこと"""
+    scheduler = ReminderScheduler(lambda reminder: None, OFFSETS, clock=lambda: at(BASE_DATE))
+    assert scheduler.schedule('alice', {'id': 1, 'title': 'a', 'due': 'someday', 'status': '未着手'}) == 0
+    memory = TaskStore()
+    memory.add('いつか', 'someday', 'Word Web')
+    memory.add('議事録', '2025-06-19T09:00', 'Word Web')
+    assert scheduler.rebuild([('alice', memory)]) == 1
+
+
+def test_app_starts_scheduler_on_first_request():
+    """Flaskアプリは最初のリクエストで一度だけ登録し直して動かし始めること"""
+    import app as web
+
+    saved = web.reminders
+    web.reminders = ReminderScheduler(lambda reminder: None, OFFSETS)
+    rebuilt = []
+    try:
+        assert not web.reminders.started
+        client = web.app.test_client()
+        client.get('/api/metrics')
+        client.get('/api/metrics')
+        assert web.reminders.started
+        assert web.reminders.ensure_started(lambda: rebuilt.append(1) or ()) is False and rebuilt == []
+    finally:
+        web.reminders.stop()
+        web.reminders = saved
+
+
+def test_evicted_partitions_notify():
+    """区画を破棄するとon_evictが呼ばれること"""
+    evicted = []
+    partitions = UserPartitions(lambda user: ShibuTaskAgent(), max_users=1,
+                                on_evict=lambda user, agent: evicted.append(user))
+    partitions.get('alice')
+    partitions.get('bob')
+    assert evicted == ['alice']
+
+
+def test_run_wakes_up_for_new_reminders():
+    """イベントループで眠っていても、新しい登録で起きて発火時刻に呼ぶこと"""
+    due = datetime(2025, 6, 19, 15, 0)
+    # 時計を期日の0.1秒前からずらして進める
+    shift = at(due) - 0.1 - time.time()
+
+    async def scenario():
+        fired = asyncio.Event()
+        scheduler = ReminderScheduler(lambda reminder: fired.set(), (timedelta(0),),
+                                      clock=lambda: time.time() + shift)
+        runner = asyncio.create_task(scheduler.run())
+        await asyncio.sleep(0.01)
+        scheduler.schedule('alice', {'id': 1, 'title': 't', 'due': '2025-06-19T15:00'})
+        await asyncio.wait_for(fired.wait(), 5)
+        scheduler.stop()
+        await runner
+        return scheduler.fired
+
+    assert asyncio.run(scenario()) == 1
+
+
+if __name__ == "__main__":
+    test_agent_events_schedule_and_cancel()
+    test_past_offsets_are_skipped()
+    test_rebuild_from_stores()
+    test_cancelled_entries_are_compacted()
+    test_unreadable_due_is_skipped()
+    test_app_starts_scheduler_on_first_request()
+    test_evicted_partitions_notify()
+    test_run_wakes_up_for_new_reminders()
+    print('✅ すべてのテストが成功しました')
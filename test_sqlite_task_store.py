@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sqlite3
+import tempfile
+from shibu_task_agent import ShibuTaskAgent
+from sqlite_task_store import SQLiteDatabase, SQLiteTaskStore
+from task_store import TaskStore, STATUS_TODO, STATUS_DONE
+from test_task_store import PAGE_QUERIES, fill_page_store, walk_pages
+
+TEST_INPUTS = [
+    '6月17日までに営業資料をパワーポイントで作成してください',
+    '顧客データの調査をエクセルで6月14日まで',
+    '明日までに会議の議事録を作成',
+    '営業資料の作成が完了しました',
+    '月末までに予算書を用意する',
+    '議事録が終わった',
+    '全部終わった',
+]
+
+
+def test_sqlite_matches_memory_store():
+    """SQLiteとインメモリで同じ入力に同じ結果を返すこと"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'tasks.db')
+        memory_agent = ShibuTaskAgent(TaskStore())
+        sqlite_agent = ShibuTaskAgent(SQLiteTaskStore(path))
+        for text in TEST_INPUTS:
+            assert sqlite_agent.process_input(text) == memory_agent.process_input(text), text
+
+        store = sqlite_agent.store
+        assert store.next_id == 5
+        assert [task['id'] for task in store.by_status(STATUS_DONE)] == [1, 3, 4]
+        assert store.latest(STATUS_TODO)['id'] == 2
+        assert [task['id'] for task in store.by_due()] == list(
+            task['id'] for task in memory_agent.store.by_due())
+        assert store.revision == memory_agent.store.revision
+        sqlite_changes = sqlite_agent.changes_since(sqlite_agent.revision_token(3))
+        memory_changes = memory_agent.changes_since(memory_agent.revision_token(3))
+        assert not sqlite_changes['full'] and sqlite_changes['tasks'] == memory_changes['tasks']
+        assert sqlite_changes['revision'] == sqlite_agent.revision_token(memory_agent.store.revision)
+        store.db.close()
+
+
+def test_sqlite_shared_between_connections_and_users():
+    """別の接続（別プロセス相当）から同じデータが見え、ユーザー間は分離されること"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'tasks.db')
+        writer = SQLiteTaskStore(SQLiteDatabase(path), user='alice')
+        reader = SQLiteTaskStore(SQLiteDatabase(path), user='alice')
+        other = SQLiteTaskStore(SQLiteDatabase(path), user='bob')
+
+        writer.add('営業資料を作成', '2025-06-20T12:00', 'Word Web')
+        assert reader.get(1)['title'] == '営業資料を作成'
+        assert len(other) == 0
+        assert other.add('議事録', None, 'Word Web')['id'] == 1
+
+        writer.clear()
+        assert len(reader) == 0 and len(other) == 1
+        for store in (writer, reader, other):
+            store.db.close()
+
+
+def test_sqlite_due_queries_match_memory_store():
+    """次の期日・期限切れの問い合わせがインメモリと同じ結果になること"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        sqlite_store = SQLiteTaskStore(os.path.join(tmpdir, 'tasks.db'))
+        memory_store = TaskStore()
+        for store in (sqlite_store, memory_store):
+            for i in range(30):
+                store.add(f'タスク{i}', None if i % 7 == 0 else f'2025-06-{10 + i % 15:02d}T12:00', 'Word Web')
+            store.complete(5)
+        for now in ('2025-06-01T00:00', '2025-06-18T12:00', '2025-07-01T00:00'):
+            assert sqlite_store.upcoming(now, 5) == memory_store.upcoming(now, 5), now
+            assert sqlite_store.overdue(now) == memory_store.overdue(now), now
+            assert sqlite_store.overdue(now, 3) == memory_store.overdue(now, 3), now
+        sqlite_store.db.close()
+
+
+def test_sqlite_pages_match_memory_store():
+    """絞り込み・並び順・続きの位置がインメモリと同じになること"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        sqlite_store = fill_page_store(SQLiteTaskStore(os.path.join(tmpdir, 'tasks.db')))
+        memory_store = fill_page_store(TaskStore())
+        for query in PAGE_QUERIES:
+            assert walk_pages(sqlite_store, query, 7) == walk_pages(memory_store, query, 7), query
+            assert sqlite_store.page(query, 4) == memory_store.page(query, 4), query
+        sqlite_store.db.close()
+
+def test_sqlite_revision_tokens_differ_per_user_and_file():
+    """別のユーザー・作り直したファイルのリビジョンを送られたら全件を返すこと"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'tasks.db')
+        database = SQLiteDatabase(path)
+        alice = ShibuTaskAgent(SQLiteTaskStore(database, user='alice'))
+        bob = ShibuTaskAgent(SQLiteTaskStore(database, user='bob'))
+        for agent in (alice, bob):
+            agent.apply_input('明日までに会議の議事録を作成')
+            agent.apply_input('月末までに予算書を用意する')
+        assert alice.store.store_id != bob.store.store_id
+        assert bob.changes_since(alice.revision_token(1))['full']
+        assert not alice.changes_since(alice.revision_token(1))['full']
+
+        # 別の接続からも、全削除の後も同じ名前
+        token = alice.revision_token(1)
+        assert SQLiteTaskStore(SQLiteDatabase(path), user='alice').store_id == alice.store.store_id
+        alice.reset()
+        assert SQLiteTaskStore(path, user='alice').store_id == alice.store.store_id
+        database.close()
+
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        recreated = ShibuTaskAgent(SQLiteTaskStore(path, user='alice'))
+        for text in ('明日までに会議の議事録を作成', '月末までに予算書を用意する', '報告書を作成'):
+            recreated.apply_input(text)
+        assert recreated.store.store_id != alice.store.store_id
+        assert recreated.changes_since(token)['full']
+        recreated.store.db.close()
+
+
+def test_sqlite_adds_store_id_to_old_files():
+    """store_id列のない以前のファイルも開けて、名前が付くこと"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'tasks.db')
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE task_revisions (user TEXT PRIMARY KEY, revision INTEGER NOT NULL, "
+                     "base_revision INTEGER NOT NULL) WITHOUT ROWID")
+        conn.execute("INSERT INTO task_revisions VALUES ('alice', 3, 0)")
+        conn.commit()
+        conn.close()
+
+        store = SQLiteTaskStore(path, user='alice')
+        assert store.revision == 3
+        assert store.store_id and store.store_id == SQLiteTaskStore(path, user='alice').store_id
+        store.db.close()
+
+
+if __name__ == "__main__":
+    test_sqlite_matches_memory_store()
+    test_sqlite_shared_between_connections_and_users()
+    test_sqlite_due_queries_match_memory_store()
+    test_sqlite_pages_match_memory_store()
+    test_sqlite_revision_tokens_differ_per_user_and_file()
+    test_sqlite_adds_store_id_to_old_files()
+    print('✅ すべてのテストが成功しました')
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+from shibu_task_agent import ShibuTaskAgent, cli
+from sqlite_task_store import SQLiteTaskStore
+from task_ndjson import export_ndjson, import_ndjson, resume_cursor
+from task_store import TaskStore
+
+INPUTS = [
+    '6月17日までに営業資料をパワーポイントで作成してください',
+    '顧客データの調査をエクセルで6月14日まで',
+    '明日までに会議の議事録を作成',
+    '営業資料の作成が完了しました',
+]
+
+
+def test_export_import_round_trip():
+    """エクスポートしたNDJSONを取り込むと同じタスクになること"""
+    agent = ShibuTaskAgent()
+    for text in INPUTS:
+        agent.apply_input(text)
+
+    lines = list(export_ndjson(agent.store))
+    assert len(lines) == 3 and all(line.endswith('\n') for line in lines)
+    assert [line for line in export_ndjson(agent.store, after_id=2)] == lines[2:]
+
+    target = TaskStore()
+    cursors = list(import_ndjson(target, lines, chunk_size=2))
+    assert cursors == [2, 3]
+    assert target.all() == agent.tasks
+    # 取り込んだ完了タスクは完了報告の照合対象にならない
+    assert target.match_incomplete('営業資料') is None
+
+
+def test_import_resumes_from_cursor():
+    """カーソルを渡すと続きだけが取り込まれ、不正な行はエラーになること"""
+    source = TaskStore()
+    for i in range(5):
+        source.add(f'タスク{i}', None, 'Word Web')
+    lines = list(export_ndjson(source))
+
+    target = TaskStore()
+    cursor = next(import_ndjson(target, lines, chunk_size=2))
+    assert cursor == 2
+    list(import_ndjson(target, lines, after_id=cursor))
+    assert [task['title'] for task in target.all()] == [task['title'] for task in source.all()]
+
+    try:
+        list(import_ndjson(TaskStore(), ['{"id": 1}\n']))
+        assert False, '不正な行を受け付けた'
+    except ValueError as e:
+        assert '1行目' in str(e)
+
+    # 期日・アプリの型や書式が不正な行も、ストアに追加する前にエラーになること
+    for bad in ('{"due": 123}', '{"due": "someday"}', '{"link": null}', '{"link": 1}'):
+        target = TaskStore()
+        line = '{"id": 1, "title": "t", ' + bad[1:] + '\n'
+        try:
+            list(import_ndjson(target, ['{"id": 2, "title": "ok"}\n', line]))
+            assert False, f'不正な行を受け付けた: {bad}'
+        except ValueError as e:
+            assert '2行目' in str(e)
+        assert len(target) == 0
+
+
+def test_cli_export_resume_and_import():
+    """CLIで途中まで書き出したファイルの続きを書き出し、別ユーザーに取り込めること"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db = os.path.join(tmpdir, 'tasks.db')
+        out = os.path.join(tmpdir, 'alice.ndjson')
+        store = SQLiteTaskStore(db, user='alice')
+        for i in range(1200):
+            store.add(f'タスク{i}', None, 'Word Web')
+        store.complete(7)
+
+        cli(['export', '--db', db, '--user', 'alice', '-o', out])
+        with open(out, encoding='utf-8') as f:
+            full = f.read()
+
+        # 途中で止まったファイル（最終行が書きかけ）から再開する
+        with open(out, 'w', encoding='utf-8') as f:
+            f.write(full[:30000])
+        assert 0 < resume_cursor(out) < 1200
+        cli(['export', '--db', db, '--user', 'alice', '-o', out, '--resume'])
+        with open(out, encoding='utf-8') as f:
+            assert f.read() == full
+
+        cli(['import', '--db', db, '--user', 'bob', '-i', out])
+        assert ''.join(export_ndjson(SQLiteTaskStore(db, user='bob'))) == full
+        store.db.close()
+
+
+if __name__ == "__main__":
+    test_export_import_round_trip()
+    test_import_resumes_from_cursor()
+    test_cli_export_resume_and_import()
+    print('✅ すべてのテストが成功しました')
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import task_store
+from shibu_task_agent import ShibuTaskAgent, dump_json
+from task_store import (BaseTaskStore, Task, TaskQuery, TaskStore, STATUS_TODO, STATUS_DONE,
+                        due_minutes, format_due)
+
+PAGE_QUERIES = [
+    TaskQuery(),
+    TaskQuery(sort='-id'),
+    TaskQuery(sort='due'),
+    TaskQuery(status=STATUS_TODO, sort='-due'),
+    TaskQuery(status=STATUS_DONE),
+    TaskQuery(link='Excel Web', sort='-id'),
+    TaskQuery(status=STATUS_TODO, link='Word Web', title='1'),
+    TaskQuery(due_from='2025-06-12T00:00', due_to='2025-06-20T00:00', sort='due'),
+    TaskQuery(due_from='2025-06-15T00:00', title='タスク2', sort='-id'),
+]
+
+
+def fill_page_store(store):
+    """ページの検証用のタスク（期日なし・完了・アプリ名が混ざる）"""
+    links = ('Word Web', 'Excel Web', 'PowerPoint Web')
+    for i in range(60):
+        store.add(f'タスク{i}', None if i % 7 == 0 else f'2025-06-{10 + i % 15:02d}T12:00', links[i % 3])
+    for task_id in range(1, 61, 4):
+        store.complete(task_id)
+    return store
+
+
+def walk_pages(store, query, limit):
+    """next_keyをたどって全ページのタスクIDをつなげる"""
+    ids = []
+    after = None
+    while True:
+        page = store.page(query, limit, after)
+        ids.extend(task['id'] for task in page.tasks)
+        if page.next_key is None:
+            return ids
+        after = page.next_key
+
+
+def test_ids_are_monotonic():
+    """IDが作成順に1から採番されること"""
+    store = TaskStore()
+    ids = [store.add(f'タスク{i}', None, 'Word Web')['id'] for i in range(5)]
+    assert ids == [1, 2, 3, 4, 5]
+    assert store.next_id == 6
+    assert store.get(3)['title'] == 'タスク2'
+
+
+def test_status_and_due_indexes():
+    """状態別・期日順の一覧がインデックスから引けること"""
+    store = TaskStore()
+    store.add('資料作成', '2025-06-20T12:00', 'Word Web')
+    store.add('メール送信', '2025-06-19T09:00', 'Outlook Web')
+    store.add('集計', '2025-06-25T12:00', 'Excel Web')
+
+    store.complete(2)
+    assert [task['id'] for task in store.by_status(STATUS_TODO)] == [1, 3]
+    assert [task['id'] for task in store.by_status(STATUS_DONE)] == [2]
+    assert store.count_by_status(STATUS_TODO) == 2
+
+    assert [task['id'] for task in store.by_due()] == [2, 1, 3]
+    assert [task['id'] for task in store.by_due(STATUS_TODO)] == [1, 3]
+
+
+def test_agent_uses_store():
+    """エージェントの作成・完了がストア経由で反映されること"""
+    agent = ShibuTaskAgent()
+    agent.process_input('明日までに営業資料をパワーポイントで作成してください')
+    agent.process_input('顧客データの調査をエクセルで6月14日まで')
+    assert agent.get_next_id() == 3
+
+    agent.process_input('営業資料の作成が完了しました')
+    assert [task['status'] for task in agent.tasks] == [STATUS_DONE, STATUS_TODO]
+    assert agent.store.count_by_status(STATUS_DONE) == 1
+
+
+def test_upcoming_and_overdue():
+    """期日インデックスから次の期日・期限切れの未着手タスクが引けること"""
+    store = TaskStore()
+    for title, due in [('A', '2025-06-20T12:00'), ('B', '2025-06-18T09:00'), ('C', None),
+                       ('D', '2025-06-18T10:30'), ('E', '2025-06-25T12:00'), ('F', '2025-06-17T12:00')]:
+        store.add(title, due, 'Word Web')
+    store.complete(1)
+
+    now = '2025-06-18T10:30'
+    assert [task['title'] for task in store.upcoming(now, 2)] == ['D', 'E']
+    assert [task['title'] for task in store.overdue(now)] == ['F', 'B']
+    assert [task['title'] for task in store.overdue(now, limit=1)] == ['F']
+    assert [task['title'] for task in store.upcoming(now, 10, STATUS_DONE)] == ['A']
+    # 完了を戻すと期日インデックスも戻る
+    store.set_status(1, STATUS_TODO)
+    assert [task['title'] for task in store.upcoming(now, 10)] == ['D', 'A', 'E']
+    assert [task['title'] for task in store.by_due()] == ['F', 'B', 'D', 'A', 'E']
+
+
+def test_page_uses_indexes_and_matches_full_scan():
+    """索引から読むページが、全件を絞り込んで並べた結果と同じになること"""
+    store = fill_page_store(TaskStore())
+    for query in PAGE_QUERIES:
+        expected = BaseTaskStore.page(store, query, len(store)).tasks
+        assert [task['id'] for task in expected] == walk_pages(store, query, 7), query
+        assert all(query.matches(task) for task in expected)
+    assert [task['id'] for task in store.page(TaskQuery(sort='-id'), 3).tasks] == [60, 59, 58]
+
+    # 該当がまばらなら、調べた件数の上限で打ち切って続きの位置を返す
+    original = task_store.MAX_PAGE_SCAN
+    task_store.MAX_PAGE_SCAN = 10
+    try:
+        page = store.page(TaskQuery(title='タスク59'), 5)
+        assert page.tasks == [] and page.next_key == (10,)
+        assert walk_pages(store, TaskQuery(title='タスク59'), 5) == [60]
+    finally:
+        task_store.MAX_PAGE_SCAN = original
+
+
+
+def test_compact_task_reads_and_serializes_like_dict():
+    """Taskはdictと同じように読め、dictと等しく、同じJSONになること"""
+    task = Task(1, '議事録', '2025-06-18T09:05', 'Word Web')
+    as_dict = {'id': 1, 'title': '議事録', 'due': '2025-06-18T09:05', 'link': 'Word Web', 'status': STATUS_TODO}
+    assert task == as_dict and dict(task) == as_dict and list(task) == list(as_dict)
+    assert task['due'] == '2025-06-18T09:05' and task.get('missing') is None
+    assert not hasattr(task, '__dict__')
+    assert task.due_minutes == due_minutes('2025-06-18T09:05') and type(task._due) is int
+    assert format_due(due_minutes('1969-12-31T23:59')) == '1969-12-31T23:59'
+
+    done = task.replace(status=STATUS_DONE)
+    assert done['status'] is STATUS_DONE and task['status'] == STATUS_TODO
+
+    # due_keyの形でない期日は文字列のまま返す
+    assert Task(2, 'a', '2025-06-18T09:05:30', 'Word Web')['due'] == '2025-06-18T09:05:30'
+    assert Task(3, 'b', '来週', 'Word Web')['due'] == '来週' and Task(4, 'c', None, 'Word Web')['due'] is None
+
+    store = fill_page_store(TaskStore())
+    dicts = [dict(task) for task in store.all()]
+    for pretty in (False, True):
+        assert dump_json(store.all(), pretty) == dump_json(dicts, pretty)
+        assert dump_json({'tasks': store.all(), 'revision': 1}, pretty) == dump_json({'tasks': dicts, 'revision': 1}, pretty)
+    assert json.loads(ShibuTaskAgent(store).process_input('特になし')) == dicts
+
+
+if __name__ == "__main__":
+    test_ids_are_monotonic()
+    test_status_and_due_indexes()
+    test_agent_uses_store()
+    test_upcoming_and_overdue()
+    test_page_uses_indexes_and_matches_full_scan()
+    test_compact_task_reads_and_serializes_like_dict()
+    print('✅ すべてのテストが成功しました')
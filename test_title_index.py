@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from shibu_task_agent import ShibuTaskAgent
+from title_index import TitleIndex, tokenize
+
+
+def test_tokenize():
+    """英単語は単語のまま、日本語は文字バイグラム（ひらがなのみは除外）になること"""
+    tokens = tokenize('PowerPointで営業資料をまとめる')
+    assert 'powerpoint' in tokens
+    assert {'営業', '業資', '資料'} <= tokens
+    assert 'まと' not in tokens
+
+
+def test_best_match_scores_rare_tokens_higher():
+    """共通の語より固有の語が一致したタスクを優先すること"""
+    index = TitleIndex()
+    index.add(1, '営業資料を作成')
+    index.add(2, '予算資料を作成')
+    index.add(3, '議事録を作成')
+
+    assert index.best_match('予算資料できた') == 2
+    assert index.best_match('議事録が終わった') == 3
+    assert index.best_match('こんにちは') is None
+
+    index.remove(2)
+    assert index.best_match('予算資料できた') == 1
+
+
+def test_agent_completion_uses_index():
+    """完了報告が最新タスクではなく一致するタスクに反映されること"""
+    agent = ShibuTaskAgent()
+    agent.process_input('月末までに予算書を用意する')
+    agent.process_input('明日までに会議の議事録を作成')
+    agent.process_input('データ分析の準備をする')
+
+    agent.process_input('予算書を提出した')
+    assert [task['status'] for task in agent.tasks] == ['完了', '未着手', '未着手']
+
+    # 一致しない場合は従来どおり最新の未着手タスク
+    agent.process_input('全部終わった')
+    assert [task['status'] for task in agent.tasks] == ['完了', '未着手', '完了']
+
+
+if __name__ == "__main__":
+    test_tokenize()
+    test_best_match_scores_rare_tokens_higher()
+    test_agent_completion_uses_index()
+    print('✅ すべてのテストが成功しました')
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+from shibu_task_agent import ShibuTaskAgent
+from user_partitions import UserPartitions
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_partitions_are_isolated_and_lazy():
+    """ユーザーごとに別のタスク一覧が初回アクセス時に作られること"""
+    created = []
+
+    def factory(user):
+        created.append(user)
+        return ShibuTaskAgent()
+
+    partitions = UserPartitions(factory)
+    assert len(partitions) == 0
+
+    with partitions.session('alice') as agent:
+        agent.process_input('明日までに会議の議事録を作成')
+    with partitions.session('bob') as agent:
+        agent.process_input('月末までに予算書を用意する')
+        agent.process_input('データ分析の準備をする')
+
+    assert [task['title'] for task in partitions.get('alice').tasks] == ['明日までに会議の議事録を作成']
+    assert len(partitions.get('bob').tasks) == 2
+    assert created == ['alice', 'bob']
+    assert partitions.stats()['resident_tasks'] == 3
+
+
+def test_eviction_by_lru_idle_and_memory():
+    """ユーザー数・放置時間・総タスク数の上限で古い区画から破棄されること"""
+    clock = FakeClock()
+    partitions = UserPartitions(lambda user: ShibuTaskAgent(), max_users=2,
+                                idle_timeout=60, max_tasks=None, clock=clock)
+    partitions.get('a')
+    partitions.get('b')
+    partitions.get('a')  # aを最近使用に
+    partitions.get('c')  # 最も古いbが押し出される
+    assert 'b' not in partitions and 'a' in partitions and 'c' in partitions
+
+    clock.now = 100.0
+    partitions.get('d')  # a, cは放置時間切れ
+    assert list(partitions._partitions) == ['d']
+
+    partitions = UserPartitions(lambda user: ShibuTaskAgent(), max_tasks=2)
+    with partitions.session('a') as agent:
+        agent.process_input('明日までに会議の議事録を作成')
+        agent.process_input('月末までに予算書を用意する')
+    with partitions.session('b') as agent:
+        agent.process_input('データ分析の準備をする')
+    assert 'a' not in partitions and 'b' in partitions
+    assert partitions.stats()['resident_tasks'] == 1
+
+
+def test_defaults_keep_in_memory_tasks():
+    """既定では放置時間・総タスク数で区画を破棄しないこと（インメモリのタスクが消えない）"""
+    clock = FakeClock()
+    partitions = UserPartitions(lambda user: ShibuTaskAgent(), clock=clock)
+    with partitions.session('alice') as agent:
+        agent.process_input('明日までに会議の議事録を作成')
+    clock.now = 86400.0 * 30
+    with partitions.session('bob') as agent:
+        for i in range(3):
+            agent.process_input(f'資料{i}を準備する')
+    assert len(partitions.get('alice').tasks) == 1 and partitions.evictions == 0
+
+
+def test_sessions_pin_partitions():
+    """使用中の区画は上限を超えても破棄されず、並行するsessionが同じエージェントを使うこと"""
+    clock = FakeClock()
+    partitions = UserPartitions(lambda user: ShibuTaskAgent(), max_users=1,
+                                idle_timeout=60, clock=clock)
+    with partitions.session('alice') as alice:
+        partitions.get('bob')  # aliceは使用中なので残る
+        assert 'alice' in partitions and len(partitions) == 2
+        clock.now = 100.0
+        with partitions.session('carol'):
+            assert 'alice' in partitions and 'bob' not in partitions
+        with partitions.session('alice') as again:
+            assert again is alice
+    # 使い終わったら次のアクセスで上限が適用される
+    partitions.get('dave')
+    assert list(partitions._partitions) == ['dave']
+
+
+def test_app_routes_use_user_partitions():
+    """Flaskアプリがuserごとにタスクを分けること"""
+    import app as web
+
+    with web.using_partitions():
+        client = web.app.test_client()
+        client.post('/api/process', json={'input': '明日までに会議の議事録を作成', 'user': 'alice'})
+        client.post('/api/process', json={'input': '月末までに予算書を用意する', 'user': 'bob'})
+
+        alice = client.get('/api/tasks?user=alice').get_json()
+        assert [task['title'] for task in alice] == ['明日までに会議の議事録を作成']
+
+        client.post('/api/reset', json={'user': 'alice'})
+        assert client.get('/api/tasks?user=alice').get_json() == []
+        assert len(client.get('/api/tasks?user=bob').get_json()) == 1
+
+
+def test_reset_from_frontend_clears_user_tasks():
+    """フロントエンドと同じリセット要求でログイン中のユーザーのタスクが消え、userなしは拒否されること"""
+    import app as web
+
+    with web.using_partitions():
+        client = web.app.test_client()
+        client.post('/api/process', json={'input': '明日までに会議の議事録を作成', 'user': 'alice'})
+        client.post('/api/process', json={'input': '月末までに予算書を用意する', 'user': 'bob'})
+
+        # public/static/js/app.js の resetTasks と同じ fetch('/api/reset', {...})
+        response = client.post('/api/reset', data=json.dumps({'user': 'alice'}),
+                               headers={'Content-Type': 'application/json'})
+        assert response.get_json()['success']
+        assert client.get('/api/tasks?user=alice').get_json() == []
+
+        # 以前のフロントエンドの本文なしのリセットは、どのユーザーのタスクも消さない
+        assert client.post('/api/reset').status_code == 400
+        assert len(client.get('/api/tasks?user=bob').get_json()) == 1
+
+
+if __name__ == "__main__":
+    test_partitions_are_isolated_and_lazy()
+    test_eviction_by_lru_idle_and_memory()
+    test_defaults_keep_in_memory_tasks()
+    test_sessions_pin_partitions()
+    test_app_routes_use_user_partitions()
+    test_reset_from_frontend_clears_user_tasks()
+    print('✅ すべてのテストが成功しました')
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+タスクタイトルの転置インデックス
+完了報告の文からどのタスクのことかを、タスク数によらない手間で探します。
+日本語のタイトルは空白で区切られないため、文字バイグラムで索引します。
+"""
+
+import math
+import re
+from typing import Collection, Dict, Optional, Set, Tuple
+
+# 英数字の単語と、それ以外の文字の連なり（日本語など）
+_TOKEN_RUN = re.compile(r'[0-9a-z]+|[^\W0-9a-z_]+')
+_HIRAGANA = re.compile(r'[ぁ-ゖ]+')
+
+# これより多くのタスクに出現するトークンは識別に役立たないので照合に使わない
+MAX_POSTINGS = 256
+
+
+def tokenize(text: str) -> Set[str]:
+    """照合用のトークン（英数字の単語と文字バイグラム）に分割"""
+    tokens = set()
+    for run in _TOKEN_RUN.findall(text.lower()):
+        if run[0].isascii():
+            if len(run) > 1:
+                tokens.add(run)
+            continue
+        if len(run) == 1:
+            tokens.add(run)
+            continue
+        for i in range(len(run) - 1):
+            bigram = run[i:i + 2]
+            # ひらがなだけのバイグラム（助詞・送り仮名）は除外
+            if not _HIRAGANA.fullmatch(bigram):
+                tokens.add(bigram)
+    return tokens
+
+
+class TitleIndex:
+    """タイトルのトークン → タスクIDの転置インデックス"""
+
+    def __init__(self):
+        self._postings: Dict[str, Set[int]] = {}
+        # 削除用にタスクごとのトークンを持つ（setより小さいtupleで）
+        self._tokens_by_id: Dict[int, Tuple[str, ...]] = {}
+
+    def add(self, task_id: int, title: str) -> None:
+        """タスクを索引に追加"""
+        tokens = tokenize(title)
+        self._tokens_by_id[task_id] = tuple(tokens)
+        for token in tokens:
+            self._postings.setdefault(token, set()).add(task_id)
+
+    def remove(self, task_id: int) -> None:
+        """タスクを索引から削除"""
+        for token in self._tokens_by_id.pop(task_id, ()):
+            postings = self._postings[token]
+            postings.discard(task_id)
+            if not postings:
+                del self._postings[token]
+
+    def __len__(self) -> int:
+        return len(self._tokens_by_id)
+
+    def best_match(self, text: str) -> Optional[int]:
+        """テキストに最もよく一致するタスクIDを返す（一致なしはNone）"""
+        postings = {token: self._postings[token] for token in tokenize(text) if token in self._postings}
+        return best_match(postings, len(self._tokens_by_id))
+
+
+def best_match(postings: Dict[str, Collection[int]], total: int) -> Optional[int]:
+    """トークンごとの該当タスクIDから、最もよく一致するタスクIDを選ぶ
+
+    スコアは一致したトークンのIDF（出現タスクが少ないほど高い）の合計。
+    同点なら先に作成されたタスクを優先する。
+    """
+    scores: Dict[int, float] = {}
+    for task_ids in postings.values():
+        if not task_ids or len(task_ids) > MAX_POSTINGS:
+            continue
+        weight = math.log(1 + total / len(task_ids))
+        for task_id in task_ids:
+            scores[task_id] = scores.get(task_id, 0.0) + weight
+
+    if not scores:
+        return None
+    return min(scores, key=lambda task_id: (-scores[task_id], task_id))
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ユーザーごとのタスク区画
+ユーザーごとにエージェント（タスクストア）を分け、初回アクセス時に作成します。
+しばらく使われていない区画や上限を超えた分は、最も古く使われたものから破棄します。
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+from shibu_task_agent import ShibuTaskAgent
+
+DEFAULT_USER = 'anonymous'
+
+
+class _Partition:
+    """1ユーザー分の区画"""
+
+    __slots__ = ('agent', 'last_access', 'resident_tasks', 'sessions')
+
+    def __init__(self, agent: ShibuTaskAgent, now: float):
+        self.agent = agent
+        self.last_access = now
+        # メモリ上に保持しているタスク数（永続ストアは0）
+        self.resident_tasks = 0
+        # 使用中のsessionの数（使用中は上限による破棄の対象にしない）
+        self.sessions = 0
+
+
+class UserPartitions:
+    """ユーザー名 → エージェントのLRU（ユーザー数・放置時間・総タスク数で上限を設ける）
+
+    インメモリの区画を破棄するとそのユーザーのタスクも消えます。
+    SQLiteなど永続ストアの区画は、破棄しても次のアクセスで読み直されます。
+    放置時間・総タスク数の上限は既定では無効です（Noneで無効）。
+    sessionで使用中の区画は、上限を超えていても破棄しません。
+    """
+
+    def __init__(self, factory: Callable[[str], ShibuTaskAgent],
+                 max_users: int = 1000,
+                 idle_timeout: Optional[float] = None,
+                 max_tasks: Optional[int] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 on_evict: Optional[Callable[[str, ShibuTaskAgent], None]] = None):
+        self.factory = factory
+        self.max_users = max_users
+        self.idle_timeout = idle_timeout
+        self.max_tasks = max_tasks
+        self.clock = clock
+        # 区画を破棄したときに (ユーザー名, エージェント) で呼ぶ（ロックを持ったまま呼ばれる）
+        self.on_evict = on_evict
+        self.evictions = 0
+        self._partitions: "OrderedDict[str, _Partition]" = OrderedDict()
+        self._resident_tasks = 0
+        self._lock = threading.Lock()
+
+    def get(self, user: Optional[str] = None) -> ShibuTaskAgent:
+        """ユーザーのエージェントを取得（なければ作成）"""
+        return self._acquire(user or DEFAULT_USER, 0).agent
+
+    def _acquire(self, user: str, sessions: int) -> _Partition:
+        """区画を取得（なければ作成）し、使用中のsessionの数にsessionsを足す"""
+        now = self.clock()
+        with self._lock:
+            partition = self._partitions.get(user)
+            if partition is None:
+                partition = _Partition(self.factory(user), now)
+                self._partitions[user] = partition
+            else:
+                partition.last_access = now
+                self._partitions.move_to_end(user)
+            partition.sessions += sessions
+            self._evict(now, keep=user)
+            return partition
+
+    @contextmanager
+    def session(self, user: Optional[str] = None) -> Iterator[ShibuTaskAgent]:
+        """ユーザーのエージェントを使い、終わったらタスク数を数え直して上限を確認する
+
+        使用中は区画を破棄しないので、同じユーザーの並行リクエストは同じエージェントを使う。
+        """
+        user = user or DEFAULT_USER
+        partition = self._acquire(user, 1)
+        try:
+            yield partition.agent
+        finally:
+            self._release(user, partition)
+
+    def _release(self, user: str, partition: _Partition) -> None:
+        """sessionの終了。区画のタスク数を更新し、上限を超えていれば古い区画を破棄"""
+        store = partition.agent.store
+        resident = 0 if store.persistent else len(store)
+        with self._lock:
+            partition.sessions -= 1
+            if self._partitions.get(user) is not partition:
+                return  # 使用中にevict()で破棄された
+            self._resident_tasks += resident - partition.resident_tasks
+            partition.resident_tasks = resident
+            self._evict(self.clock(), keep=user)
+
+    def _evict(self, now: float, keep: str) -> None:
+        """放置された区画と上限を超えた区画を古い順に破棄（keepと使用中の区画は残す）"""
+        partitions = self._partitions
+        if self.idle_timeout is not None:
+            deadline = now - self.idle_timeout
+            for user, partition in list(partitions.items()):
+                if partition.last_access > deadline:
+                    break
+                if user != keep and not partition.sessions:
+                    self._drop(user)
+        while len(partitions) > self.max_users:
+            user = self._oldest(keep)
+            if user is None:
+                break
+            self._drop(user)
+        if self.max_tasks is not None:
+            while self._resident_tasks > self.max_tasks:
+                user = self._oldest(keep)
+                if user is None:
+                    break
+                self._drop(user)
+
+    def _oldest(self, keep: str) -> Optional[str]:
+        """最も古く使われた、破棄できる区画のユーザー名（keepと使用中の区画を除く。なければNone）"""
+        for user, partition in self._partitions.items():
+            if user != keep and not partition.sessions:
+                return user
+        return None
+
+    def _drop(self, user: str) -> None:
+        partition = self._partitions.pop(user)
+        self._resident_tasks -= partition.resident_tasks
+        self.evictions += 1
+        if self.on_evict is not None:
+            self.on_evict(user, partition.agent)
+
+    def evict(self, user: str) -> bool:
+        """区画を破棄（存在しなければFalse）"""
+        with self._lock:
+            if user not in self._partitions:
+                return False
+            self._drop(user)
+            return True
+
+    def __contains__(self, user: str) -> bool:
+        return user in self._partitions
+
+    def __len__(self) -> int:
+        return len(self._partitions)
+
+    def stats(self) -> Dict[str, Any]:
+        """区画数などの統計情報"""
+        with self._lock:
+            return {
+                'users': len(self._partitions),
+                'max_users': self.max_users,
+                'resident_tasks': self._resident_tasks,
+                'max_tasks': self.max_tasks,
+                'evictions': self.evictions,
+            }